@@ -21,6 +21,27 @@ short_description: HttpApi Plugin for F5 Cloud Services
 description:
   - This HttpApi plugin provides methods to connect to F5 Cloud Services over a HTTP(S)-based api.
 version_added: "2.10"
+options:
+  catalog_cache_path:
+    description:
+      - File in which the service catalogs are kept between connections.
+      - When not set, the catalogs are only kept for the life of the persistent connection.
+    type: str
+    env:
+      - name: F5_CS_CATALOG_CACHE_PATH
+    vars:
+      - name: ansible_f5_cs_catalog_cache_path
+    version_added: 1.3
+  catalog_cache_ttl:
+    description:
+      - Seconds for which the catalogs in C(catalog_cache_path) are used before they are read again.
+    type: int
+    default: 86400
+    env:
+      - name: F5_CS_CATALOG_CACHE_TTL
+    vars:
+      - name: ansible_f5_cs_catalog_cache_ttl
+    version_added: 1.3
 """
 
 try:
@@ -28,10 +49,21 @@ try:
 except ImportError:
     import simplejson as json
 
+try:
+    from library.module_utils.catalogs import CATALOGS_URL
+    from library.module_utils.catalogs import DEFAULT_CATALOG_TTL
+    from library.module_utils.catalogs import CatalogRegistry
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.catalogs import CATALOGS_URL
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.catalogs import DEFAULT_CATALOG_TTL
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.catalogs import CatalogRegistry
+
 BASE_HEADERS = {'Content-Type': 'application/json'}
+MERGE_PATCH_HEADERS = {'Content-Type': 'application/merge-patch+json'}
 LOGIN_URL = "/v1/svc-auth/login"
 LOGOUT_URL = "/v1/svc-auth/logout"
 RELOG_URL = "/v1/svc-auth/relogin"
+CURRENT_USER_URL = "/v1/svc-account/user"
 
 
 class HttpApi(HttpApiBase):
@@ -41,6 +73,8 @@ class HttpApi(HttpApiBase):
         self.access_token = None
         self.refresh_token = None
         self.token_timeout = None
+        self.catalogs = None
+        self.current_user = None
 
     def login(self, username, password):
         if username and password:
@@ -130,6 +164,33 @@ class HttpApi(HttpApiBase):
         except ValueError:
             raise ConnectionError('Invalid JSON response: %s' % response_text)
 
+    def _option(self, name, default=None):
+        try:
+            value = self.get_option(name)
+        except Exception:
+            # Options are only set when the plugin is loaded by a connection
+            return default
+        return default if value is None else value
+
+    def get_catalogs(self):
+        """The service catalogs, read once per persistent connection."""
+        if self.catalogs is None:
+            self.catalogs = CatalogRegistry(
+                lambda: self.send_request(CATALOGS_URL, method='GET', headers=BASE_HEADERS),
+                path=self._option('catalog_cache_path'),
+                ttl=self._option('catalog_cache_ttl', DEFAULT_CATALOG_TTL),
+            )
+        return self.catalogs.get()
+
+    def get_current_user(self):
+        """The user logged in with, read once per persistent connection."""
+        if self.current_user is None:
+            response = self.send_request(CURRENT_USER_URL, method='GET', headers=BASE_HEADERS)
+            if response['code'] != 200:
+                return response
+            self.current_user = response
+        return self.current_user
+
     def delete(self, url, account_id=None, **kwargs):
         if account_id:
             headers = {'X-F5aaS-Preferred-Account-Id': account_id}
@@ -138,6 +199,10 @@ class HttpApi(HttpApiBase):
         return self.send_request(url, method='DELETE', headers=BASE_HEADERS, **kwargs)
 
     def get(self, url, account_id=None, **kwargs):
+        if url == CATALOGS_URL and not kwargs:
+            return self.get_catalogs()
+        if url == CURRENT_USER_URL and not kwargs:
+            return self.get_current_user()
         if account_id:
             headers = {'X-F5aaS-Preferred-Account-Id': account_id}
             headers.update(BASE_HEADERS)
@@ -147,9 +212,9 @@ class HttpApi(HttpApiBase):
     def patch(self, url, data=None, account_id=None, **kwargs):
         if account_id:
             headers = {'X-F5aaS-Preferred-Account-Id': account_id}
-            headers.update(BASE_HEADERS)
+            headers.update(MERGE_PATCH_HEADERS)
             return self.send_request(url, method='PATCH', data=data, headers=headers, **kwargs)
-        return self.send_request(url, method='PATCH', data=data, headers=BASE_HEADERS, **kwargs)
+        return self.send_request(url, method='PATCH', data=data, headers=MERGE_PATCH_HEADERS, **kwargs)
 
     def post(self, url, data=None, account_id=None, **kwargs):
         if account_id:
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible.errors import AnsibleError
+from ansible.module_utils.basic import remove_values
+from ansible.plugins.inventory import BaseInventoryPlugin, Constructable, Cacheable
+
+try:
+    from library.module_utils.cloudservices import CloudservicesApi
+    from library.module_utils.rest import RestConnection
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.rest import RestConnection
+
+DOCUMENTATION = r'''
+---
+name: f5_cs
+short_description: F5 Cloud Services subscriptions inventory source
+description:
+    - Reads accounts and subscriptions from F5 Cloud Services.
+    - Every subscription becomes a host named by its subscription id.
+    - Hosts are grouped by service type, account and region.
+    - Uses a YAML configuration file that ends with C(f5_cs.yml) or C(f5_cs.yaml).
+extends_documentation_fragment:
+    - constructed
+    - inventory_cache
+options:
+    plugin:
+        description: Token that ensures this is a source file for the plugin.
+        required: True
+        choices: ['f5devcentral.cloudservices.f5_cs']
+    api_host:
+        description: F5 Cloud Services API host
+        default: api.cloudservices.f5.com
+    api_port:
+        description: F5 Cloud Services API port
+        type: int
+    use_ssl:
+        description: Connect to the API over HTTPS
+        type: bool
+        default: True
+    validate_certs:
+        description: Validate the API server certificate
+        type: bool
+        default: True
+    username:
+        description: F5 Cloud Services user name
+        env:
+            - name: F5_USERNAME
+    password:
+        description:
+            - F5 Cloud Services password. It is a secret and is never displayed, not even with C(-vvv).
+            - Set it through the C(F5_PASSWORD) environment variable, or with an encrypted value from Ansible Vault,
+              rather than in clear text in the inventory file.
+        type: str
+        env:
+            - name: F5_PASSWORD
+    account_ids:
+        description:
+            - Accounts to read subscriptions from.
+            - When omitted, every account the user is a member of is read.
+        type: list
+        elements: str
+    service_types:
+        description: Subscription service types to read
+        type: list
+        elements: str
+        default: ['waf', 'dns', 'adns', 'gslb']
+        choices: ['waf', 'dns', 'adns', 'gslb']
+    statuses:
+        description: When set, only subscriptions in one of these statuses are added
+        type: list
+        elements: str
+author:
+  - Alex Shemyakin
+'''
+
+EXAMPLES = r'''
+# f5_cs.yml
+plugin: f5devcentral.cloudservices.f5_cs
+service_types:
+  - waf
+  - dns
+statuses:
+  - ACTIVE
+cache: true
+cache_plugin: jsonfile
+cache_connection: /tmp/f5_cs_inventory
+cache_timeout: 3600
+keyed_groups:
+  - key: f5_cs_status
+    prefix: f5_cs_status
+'''
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+    NAME = 'f5devcentral.cloudservices.f5_cs'
+
+    def verify_file(self, path):
+        if super(InventoryModule, self).verify_file(path):
+            return path.endswith(('f5_cs.yml', 'f5_cs.yaml'))
+        return False
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path, cache)
+        self._read_config_data(path)
+
+        cache_key = self.get_cache_key(path)
+        use_cache = self.get_option('cache') and cache
+        update_cache = self.get_option('cache') and not cache
+
+        results = None
+        if use_cache:
+            try:
+                results = self._cache[cache_key]
+            except KeyError:
+                update_cache = True
+
+        if results is None:
+            results = self.read_from_cloud()
+
+        if update_cache:
+            self._cache[cache_key] = results
+
+        self.populate(results)
+
+    def get_client(self):
+        connection = RestConnection(
+            host=self.get_option('api_host'),
+            port=self.get_option('api_port'),
+            username=self.get_option('username'),
+            password=self.get_option('password'),
+            use_ssl=self.get_option('use_ssl'),
+            validate_certs=self.get_option('validate_certs'),
+        )
+        return CloudservicesApi(connection)
+
+    def get_accounts(self, client):
+        user = client.get_current_user()
+        memberships = client.get_memberships(user['id']).get('memberships', [])
+        names = dict((x['account_id'], x.get('account_name', '')) for x in memberships)
+        account_ids = self.get_option('account_ids') or list(names.keys())
+        return [dict(account_id=x, account_name=names.get(x, '')) for x in account_ids]
+
+    def read_from_cloud(self):
+        client = self.get_client()
+        try:
+            accounts = self.get_accounts(client)
+            subscriptions = []
+            for account in accounts:
+                client.account_id = account['account_id']
+                for service_type in self.get_option('service_types'):
+                    for subscription in client.iter_subscriptions_by_type(service_type, account['account_id']):
+                        subscriptions.append(self.summarize(subscription, account))
+        except Exception as ex:
+            secrets = set(x for x in [self.get_option('password')] if x)
+            raise AnsibleError('Unable to read F5 Cloud Services inventory: {0}'.format(remove_values(str(ex), secrets)))
+        finally:
+            client.connection.logout()
+        return dict(accounts=accounts, subscriptions=subscriptions)
+
+    @staticmethod
+    def get_regions(subscription):
+        configuration = subscription.get('configuration') or {}
+        waf_regions = (((configuration.get('waf_service') or {}).get('application') or {}).get('waf_regions')) or {}
+        regions = []
+        for provider, provider_regions in waf_regions.items():
+            for region in (provider_regions or {}).keys():
+                regions.append('{0}_{1}'.format(provider, region))
+        return regions
+
+    def summarize(self, subscription, account):
+        configuration = subscription.get('configuration') or {}
+        details = configuration.get('details') or {}
+        return dict(
+            subscription_id=subscription['subscription_id'],
+            service_instance_name=subscription.get('service_instance_name', None),
+            service_type=subscription.get('service_type', None),
+            status=subscription.get('status', None),
+            service_state=subscription.get('service_state', None),
+            account_id=account['account_id'],
+            account_name=account['account_name'],
+            cname=details.get('CNAMEValue', None),
+            regions=self.get_regions(subscription),
+        )
+
+    def populate(self, results):
+        statuses = self.get_option('statuses')
+        strict = self.get_option('strict')
+
+        for account in results['accounts']:
+            group = self.inventory.add_group(self._sanitize_group_name('f5_cs_account_' + account['account_id']))
+            self.inventory.set_variable(group, 'f5_cs_account_id', account['account_id'])
+            self.inventory.set_variable(group, 'f5_cs_account_name', account['account_name'])
+
+        for subscription in results['subscriptions']:
+            if statuses and subscription['status'] not in statuses:
+                continue
+
+            host = subscription['subscription_id']
+            self.inventory.add_host(host)
+            hostvars = dict(('f5_cs_' + k, v) for k, v in subscription.items())
+            for k, v in hostvars.items():
+                self.inventory.set_variable(host, k, v)
+
+            groups = [
+                'f5_cs_' + (subscription['service_type'] or 'unknown'),
+                'f5_cs_account_' + subscription['account_id'],
+            ]
+            groups.extend('f5_cs_region_' + x for x in subscription['regions'])
+            for group in groups:
+                group = self.inventory.add_group(self._sanitize_group_name(group))
+                self.inventory.add_child(group, host)
+
+            self._set_composite_vars(self.get_option('compose'), hostvars, host, strict=strict)
+            self._add_host_to_composed_groups(self.get_option('groups'), hostvars, host, strict=strict)
+            self._add_host_to_keyed_groups(self.get_option('keyed_groups'), hostvars, host, strict=strict)
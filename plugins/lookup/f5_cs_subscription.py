@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible.errors import AnsibleError
+from ansible.plugins.lookup import LookupBase
+
+try:
+    from library.module_utils.cloudservices import CloudservicesApi
+    from library.module_utils.rest import RestConnection
+    from library.module_utils.subscriptions import SubscriptionResolver
+    from library.module_utils.subscriptions import get_field
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.rest import RestConnection
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import SubscriptionResolver
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import get_field
+
+DOCUMENTATION = r'''
+---
+name: f5_cs_subscription
+short_description: Read subscription fields, such as CNAMEValue, from F5 Cloud Services
+description:
+    - Resolves F5 Cloud Services subscription ids to the value of a dotted field of the subscription.
+    - By default returns the CNAME record of Essential App Protect applications.
+    - The first unknown ids trigger one listing of the account's subscriptions, ids still
+      missing afterwards are read one by one.
+    - Subscriptions read are kept for the lifetime of the controller process running the lookup,
+      so pass all ids to one C(query) call to resolve them in one or two API calls.
+options:
+    _terms:
+        description: Subscription ids
+        required: True
+    field:
+        description: Dotted path of the subscription field to return
+        default: configuration.details.CNAMEValue
+    default:
+        description:
+            - Value returned when the subscription or the field does not exist.
+            - When omitted, a subscription that does not exist fails the lookup
+              and a missing field returns None.
+    account_id:
+        description:
+            - Account the subscriptions belong to.
+            - When omitted, the primary account of the user is used.
+    service_type:
+        description: Service type of the subscriptions listed in one call
+        default: waf
+        choices: ['waf', 'dns', 'adns', 'gslb']
+    api_host:
+        description: F5 Cloud Services API host
+        default: api.cloudservices.f5.com
+    api_port:
+        description: F5 Cloud Services API port
+        type: int
+    use_ssl:
+        description: Connect to the API over HTTPS
+        type: bool
+        default: True
+    validate_certs:
+        description: Validate the API server certificate
+        type: bool
+        default: True
+    username:
+        description: F5 Cloud Services user name
+        env:
+            - name: F5_USERNAME
+        vars:
+            - name: ansible_user
+    password:
+        description: F5 Cloud Services password
+        env:
+            - name: F5_PASSWORD
+        vars:
+            - name: ansible_httpapi_password
+author:
+  - Alex Shemyakin
+'''
+
+EXAMPLES = r'''
+- name: CNAME of one application
+  debug:
+    msg: "{{ lookup('f5devcentral.cloudservices.f5_cs_subscription', 's-xxxxxxxxxx') }}"
+
+- name: CNAMEs of many applications, resolved in one call
+  set_fact:
+    cnames: "{{ dict(subscription_ids | zip(query('f5devcentral.cloudservices.f5_cs_subscription', *subscription_ids))) }}"
+
+- name: Service state of a DNS subscription
+  debug:
+    msg: "{{ lookup('f5devcentral.cloudservices.f5_cs_subscription', 's-yyyyyyyyyy', service_type='dns', field='service_state') }}"
+'''
+
+RETURN = r'''
+_raw:
+    description: Values of C(field), one for every subscription id
+    type: list
+'''
+
+
+_resolvers = dict()
+_MISSING = object()
+
+
+class LookupModule(LookupBase):
+    def get_resolver(self):
+        key = tuple(self.get_option(x) for x in (
+            'api_host', 'api_port', 'use_ssl', 'validate_certs', 'username', 'account_id', 'service_type'
+        ))
+        if key not in _resolvers:
+            connection = RestConnection(
+                host=self.get_option('api_host'),
+                port=self.get_option('api_port'),
+                username=self.get_option('username'),
+                password=self.get_option('password'),
+                use_ssl=self.get_option('use_ssl'),
+                validate_certs=self.get_option('validate_certs'),
+            )
+            client = CloudservicesApi(connection, account_id=self.get_option('account_id'))
+            _resolvers[key] = SubscriptionResolver(
+                client, account_id=self.get_option('account_id'), service_type=self.get_option('service_type')
+            )
+        return _resolvers[key]
+
+    def run(self, terms, variables=None, **kwargs):
+        self.set_options(var_options=variables, direct=kwargs)
+        default = kwargs.get('default', _MISSING)
+        field = self.get_option('field')
+
+        resolver = self.get_resolver()
+        try:
+            subscriptions = resolver.resolve(terms)
+        except Exception as ex:
+            raise AnsibleError('Unable to read F5 Cloud Services subscriptions: {0}'.format(ex))
+
+        ret = []
+        for term in terms:
+            subscription = subscriptions[term]
+            if subscription is None:
+                if default is _MISSING:
+                    raise AnsibleError('Subscription {0} was not found: {1}'.format(
+                        term, resolver.errors.get(term, 'not listed')
+                    ))
+                ret.append(default)
+                continue
+            ret.append(get_field(subscription, field, None if default is _MISSING else default))
+        return ret
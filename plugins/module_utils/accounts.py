@@ -0,0 +1,110 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import threading
+
+try:
+    from library.module_utils.common import DEFAULT_WORKERS
+    from library.module_utils.common import parallel_map
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import DEFAULT_WORKERS
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import parallel_map
+
+# Accounts read with one batch get
+BATCH_SIZE = 100
+
+
+def batch_get_accounts(client, account_ids, workers=DEFAULT_WORKERS):
+    """Returns the accounts of ``account_ids`` by id, read ``BATCH_SIZE``
+    accounts at a time on up to ``workers`` threads. Accounts the service
+    does not return are left out.
+    """
+    account_ids = list(account_ids)
+    batches = [account_ids[x:x + BATCH_SIZE] for x in range(0, len(account_ids), BATCH_SIZE)]
+
+    def read(batch):
+        return client.batch_get_accounts(dict(account_ids=batch)).get('accounts', None) or []
+
+    result = dict()
+    for accounts in parallel_map(read, batches, workers):
+        result.update((x['id'], x) for x in accounts)
+    return result
+
+
+class MembershipIndex(object):
+    """Lookup tables over the memberships of the current user.
+
+    Memberships are found by account id or account name with a dictionary
+    hit; when several accounts share a name the first one wins, as with a
+    scan of the listing. ``accounts`` keeps the account bodies read with
+    ``load_accounts``. ``add`` and ``remove`` keep the index in line with
+    accounts created and deleted through it, from any thread.
+    """
+
+    def __init__(self, memberships=None):
+        self.by_id = dict()
+        self.by_name = dict()
+        self.accounts = dict()
+        self.lock = threading.Lock()
+        for membership in memberships or []:
+            self.add(membership)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(list(self.by_id.values()))
+
+    def add(self, membership, account=None):
+        with self.lock:
+            account_id = membership['account_id']
+            self.by_id.setdefault(account_id, membership)
+            name = membership.get('account_name', None)
+            if name is not None:
+                self.by_name.setdefault(name, membership)
+            if account is not None:
+                self.accounts[account_id] = account
+
+    def add_account(self, account):
+        """Indexes ``account``, an account body, as a new membership."""
+        self.add(dict(account_id=account['id'], account_name=account.get('name', None)), account)
+
+    def remove(self, account_id):
+        with self.lock:
+            membership = self.by_id.pop(account_id, None)
+            self.accounts.pop(account_id, None)
+            if membership is None:
+                return
+            name = membership.get('account_name', None)
+            if self.by_name.get(name) is membership:
+                del self.by_name[name]
+                for other in self.by_id.values():
+                    if other.get('account_name', None) == name:
+                        self.by_name[name] = other
+                        break
+
+    def find(self, account_id=None, name=None):
+        if account_id:
+            return self.by_id.get(account_id, None)
+        if name:
+            return self.by_name.get(name, None)
+        return None
+
+    def load_accounts(self, client, account_ids=None, workers=DEFAULT_WORKERS):
+        """Reads the bodies of ``account_ids``, by default of every member
+        account, that are not known yet.
+        """
+        if account_ids is None:
+            account_ids = list(self.by_id)
+        missing = [x for x in account_ids if x not in self.accounts]
+        if missing:
+            accounts = batch_get_accounts(client, missing, workers)
+            with self.lock:
+                self.accounts.update(accounts)
+        return [self.accounts[x] for x in account_ids if x in self.accounts]
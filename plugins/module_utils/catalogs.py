@@ -0,0 +1,81 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+CATALOGS_URL = "/v1/svc-catalog/catalogs"
+DEFAULT_CATALOG_TTL = 86400
+
+
+class CatalogRegistry(object):
+    """The service catalogs, read once and kept for the life of a connection.
+
+    ``read`` returns the ``GET /v1/svc-catalog/catalogs`` response as the
+    connection plugins do, a dict with ``code`` and ``contents``. Only a
+    successful response is kept; anything else is returned as it is and read
+    again next time.
+
+    With ``path``, the response is also written to that file and reused by
+    later connections until it is ``ttl`` seconds old.
+    """
+
+    def __init__(self, read, path=None, ttl=DEFAULT_CATALOG_TTL, clock=time.time):
+        self.read = read
+        self.path = os.path.expanduser(path) if path else None
+        self.ttl = ttl
+        self.clock = clock
+        self.response = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        with self.lock:
+            if self.response is None:
+                self.response = self.load()
+            if self.response is None:
+                response = self.read()
+                if response.get('code') != 200:
+                    return response
+                self.response = response
+                self.save()
+            return self.response
+
+    def load(self):
+        if not self.path or not self.ttl:
+            return None
+        try:
+            with open(self.path) as f:
+                cached = json.load(f)
+            if self.clock() - cached['time'] < self.ttl:
+                return cached['response']
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def save(self):
+        if not self.path or not self.ttl:
+            return
+        directory = os.path.dirname(self.path) or '.'
+        try:
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix='.catalogs-')
+        except (IOError, OSError):
+            # The disk cache is an optimization only
+            return
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(dict(time=self.clock(), response=self.response), f)
+            os.rename(tmp, self.path)
+        except (IOError, OSError, TypeError, ValueError):
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
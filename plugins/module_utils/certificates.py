@@ -0,0 +1,97 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Keys under which a certificate listing may carry the SHA-256 fingerprint
+FINGERPRINT_KEYS = ('sha256_fingerprint', 'fingerprint')
+
+
+def normalize_fingerprint(value):
+    """``AB:CD:..`` and ``abcd..`` compare equal."""
+    if not value:
+        return None
+    return value.replace(':', '').strip().lower()
+
+
+def expiration_key(value):
+    """``2030-02-14T19:46:40Z`` and ``2030-02-14T19:46:40.000Z`` compare
+    equal; the service reports expiration dates to the second.
+    """
+    if not value:
+        return None
+    return value[:19]
+
+
+class CertificateIndex(object):
+    """Lookup tables over one certificates listing.
+
+    Certificates are found by id, by SHA-256 fingerprint, by serial number
+    and issuer, or by common name and expiration date, with a dictionary hit
+    each. ``find`` tries the strongest key first and falls back to the common
+    name and expiration date, since the service does not document the format
+    of the other keys. A certificate found by name is still skipped when it
+    carries a fingerprint of the same format that differs, such as a
+    reissued certificate with the same name.
+    """
+
+    def __init__(self, certificates=None):
+        self.certificates = list()
+        self.by_id = dict()
+        self.by_fingerprint = dict()
+        self.by_serial = dict()
+        self.by_name = dict()
+        self.fingerprints = dict()
+        for certificate in certificates or []:
+            self.add(certificate)
+
+    def __len__(self):
+        return len(self.certificates)
+
+    def __iter__(self):
+        return iter(self.certificates)
+
+    def add(self, certificate, fingerprint=None):
+        """Indexes ``certificate``; ``fingerprint`` is used when the
+        certificate does not carry one, such as for a certificate just
+        uploaded from a parsed PEM.
+        """
+        self.certificates.append(certificate)
+        self.by_id.setdefault(certificate.get('id', None), certificate)
+
+        for key in FINGERPRINT_KEYS:
+            if certificate.get(key, None):
+                fingerprint = certificate[key]
+                break
+        fingerprint = normalize_fingerprint(fingerprint)
+        if fingerprint:
+            self.by_fingerprint.setdefault(fingerprint, certificate)
+            self.fingerprints[id(certificate)] = fingerprint
+
+        serial = certificate.get('serial_number', None)
+        if serial and certificate.get('issuer', None):
+            self.by_serial.setdefault((serial.lower(), certificate['issuer']), certificate)
+
+        name = (certificate.get('common_name', None), expiration_key(certificate.get('expiration_date', None)))
+        self.by_name.setdefault(name, certificate)
+
+    def get_by_id(self, certificate_id):
+        return self.by_id.get(certificate_id, None)
+
+    def find(self, fingerprint=None, serial_number=None, issuer=None, common_name=None, expiration_date=None):
+        fingerprint = normalize_fingerprint(fingerprint)
+        if fingerprint and fingerprint in self.by_fingerprint:
+            return self.by_fingerprint[fingerprint]
+        if serial_number and issuer and (serial_number.lower(), issuer) in self.by_serial:
+            return self.by_serial[(serial_number.lower(), issuer)]
+
+        certificate = self.by_name.get((common_name, expiration_key(expiration_date)), None)
+        known = self.fingerprints.get(id(certificate), None)
+        if fingerprint and known and len(known) == len(fingerprint):
+            # Both are digests of the same kind, and they differ
+            return None
+        return certificate
@@ -7,6 +7,8 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 import re
+import copy
+import json
 from ansible.errors import AnsibleConnectionFailure
 
 DOCUMENTATION = """
@@ -18,8 +20,23 @@ description:
 version_added: "1.0"
 """
 
-
-f5_cs_eap_default_policy = {
+try:
+    from library.module_utils.accounts import MembershipIndex
+    from library.module_utils.certificates import CertificateIndex
+    from library.module_utils.common import SERVER_ONLY_KEYS
+    from library.module_utils.common import freeze
+    from library.module_utils.common import merge_patch
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.accounts import MembershipIndex
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.certificates import CertificateIndex
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import SERVER_ONLY_KEYS
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import freeze
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import merge_patch
+
+
+# Shared by every EAP payload that does not bring its own policy, so it is
+# read-only; use ``copy()``, ``replace()`` or ``thaw()`` to change it.
+f5_cs_eap_default_policy = freeze({
     "compliance_enforcement": {
         "data_guard": {
             "cc": True,
@@ -175,7 +192,7 @@ f5_cs_eap_default_policy = {
         "enabled": True,
         "enforcement_mode": "monitoring"
     }
-}
+})
 
 BASE_HEADERS = {'Content-Type': 'application/json'}
 LOGIN_URL = "/v1/svc-auth/login"
@@ -183,6 +200,7 @@ LOGOUT_URL = "/v1/svc-auth/logout"
 RELOG_URL = "/v1/svc-auth/relogin"
 SUBSCRIPTION_BY_ID_URL = "/v1/svc-subscription/subscriptions/{0}"
 SUBSCRIPTIONS_BY_TYPE = "/v1/svc-subscription/subscriptions?service_type={0}&account_id={1}"
+SUBSCRIPTIONS_PAGE_BY_TYPE = "/v1/svc-subscription/subscriptions?service_type={0}&account_id={1}&page_token={2}"
 SUBSCRIPTION_URL = "/v1/svc-subscription/subscriptions"
 SUBSCRIPTION_STATUS_URL = "/v1/svc-subscription/subscriptions/{0}/status"
 ACTIVATE_SUBSCRIPTION_URL = "/v1/svc-subscription/subscriptions/{0}/activate"
@@ -209,11 +227,107 @@ GET_INVITES = "/v1/svc-account/invites"
 UPDATE_ACCOUNT_MEMBER = "/v1/svc-account/accounts/{0}/members/{1}"
 CREATE_INVITE_INTO_ACCOUNT = "/v1/svc-account/invites"
 
+# Status codes with which a service that does not accept merge patches
+# answers a PATCH; the update is then sent again as a full PUT.
+MERGE_PATCH_UNSUPPORTED = (400, 404, 405, 415)
+
+# Subscription fields sent with every merge patch, changed or not.
+SUBSCRIPTION_PATCH_KEYS = ('account_id', 'catalog_id', 'service_type')
+
+# Read endpoints which may be served from the client cache. Subscription status
+# is left out on purpose: it is polled while waiting for deployments.
+CACHEABLE_READS = (
+    SUBSCRIPTION_BY_ID_URL,
+    SUBSCRIPTIONS_BY_TYPE,
+    GET_CURRENT_USER,
+    GET_CATALOGS,
+    GET_CERTIFICATES_URL,
+    GET_ACCOUNT,
+    GET_MEMBERSHIPS,
+    GET_ACCOUNT_MEMBERS,
+    GET_INVITES,
+)
+
+# Cached read endpoints dropped by every write method of CloudservicesApi
+CACHE_INVALIDATION_MAP = {
+    'create_subscription': (SUBSCRIPTIONS_BY_TYPE,),
+    'update_subscription': (SUBSCRIPTION_BY_ID_URL, SUBSCRIPTIONS_BY_TYPE),
+    'retire_subscription': (SUBSCRIPTION_BY_ID_URL, SUBSCRIPTIONS_BY_TYPE),
+    'activate_subscription': (SUBSCRIPTION_BY_ID_URL, SUBSCRIPTIONS_BY_TYPE),
+    'suspend_subscription': (SUBSCRIPTION_BY_ID_URL, SUBSCRIPTIONS_BY_TYPE),
+    'enable_catalog_item': (GET_ACCOUNT,),
+    'disable_catalog_item': (GET_ACCOUNT,),
+    'post_certificate': (GET_CERTIFICATES_URL,),
+    'retire_certificate': (GET_CERTIFICATES_URL,),
+    'update_account': (GET_ACCOUNT, GET_MEMBERSHIPS),
+    'create_account': (GET_MEMBERSHIPS,),
+    'delete_account': (GET_ACCOUNT, GET_MEMBERSHIPS),
+    'delete_account_member': (GET_ACCOUNT_MEMBERS, GET_MEMBERSHIPS),
+    'delete_invite': (GET_INVITES,),
+    'update_account_member': (GET_ACCOUNT_MEMBERS, GET_MEMBERSHIPS),
+    'create_invite_into_account': (GET_INVITES,),
+}
+
+
+def subscription_merge_patch(current, payload):
+    """Returns the merge patch that applies a full subscription ``payload``.
+
+    Server-only configuration keys are never removed, and ``update_comment``
+    is always sent so the service records it with the update.
+    """
+    patch = dict()
+    for key, value in payload.items():
+        if key == 'configuration':
+            delta = merge_patch(current.get('configuration') or dict(), value, keep=SERVER_ONLY_KEYS)
+            if 'update_comment' in value:
+                delta['update_comment'] = value['update_comment']
+            if delta:
+                patch[key] = delta
+        elif key in SUBSCRIPTION_PATCH_KEYS or current.get(key) != value:
+            patch[key] = value
+    return patch
+
 
 class CloudservicesApi():
-    def __init__(self, connection, account_id=None):
+    def __init__(self, connection, account_id=None, use_cache=False):
         self.connection = connection
         self.account_id = account_id
+        self.use_cache = use_cache
+        self._cache = dict()
+        self.merge_patch = None
+        self.catalog_ids = None
+        self.membership_index = None
+        self.certificate_indexes = dict()
+        self.parsed_certificates = dict()
+        self.payload_bytes = dict(full=0, sent=0)
+
+    def _get(self, url_template, *args, **kwargs):
+        account_id = kwargs.pop('account_id', self.account_id)
+        url = url_template.format(*args)
+        cacheable = self.use_cache and url_template in CACHEABLE_READS
+        if cacheable:
+            entries = self._cache.setdefault(url_template, dict())
+            if (url, account_id) in entries:
+                return copy.deepcopy(entries[(url, account_id)])
+
+        response = self.connection.get(url=url, account_id=account_id)
+        self.handle_httperror(response)
+        if cacheable:
+            entries[(url, account_id)] = copy.deepcopy(response['contents'])
+        return response['contents']
+
+    def invalidate_cache(self, method_name=None):
+        if method_name is None:
+            self._cache.clear()
+            self.membership_index = None
+            self.certificate_indexes.clear()
+            return
+        for url_template in CACHE_INVALIDATION_MAP.get(method_name, ()):
+            self._cache.pop(url_template, None)
+            if url_template == GET_MEMBERSHIPS:
+                self.membership_index = None
+            elif url_template == GET_CERTIFICATES_URL:
+                self.certificate_indexes.clear()
 
     def handle_httperror(self, response):
         err_4xx = r'^4\d{2}$'
@@ -222,90 +336,161 @@ class CloudservicesApi():
             raise AnsibleConnectionFailure(response['contents'])
         return False
 
-    def get_subscription_by_id(self, subscription_id):
+    def get_subscription_by_id(self, subscription_id, account_id=None):
         if subscription_id:
-            response = self.connection.get(url=SUBSCRIPTION_BY_ID_URL.format(subscription_id), account_id=self.account_id)
-            self.handle_httperror(response)
-            return response['contents']
+            return self._get(SUBSCRIPTION_BY_ID_URL, subscription_id, account_id=account_id or self.account_id)
         else:
             raise AnsibleConnectionFailure('Subscription Id is required.')
 
     def get_subscriptions_by_type(self, subscription_type, account_id):
         if subscription_type:
-            response = self.connection.get(url=SUBSCRIPTIONS_BY_TYPE.format(subscription_type, account_id), account_id=self.account_id)
-            self.handle_httperror(response)
-            return response['contents']
+            return self._get(SUBSCRIPTIONS_BY_TYPE, subscription_type, account_id)
         else:
             raise AnsibleConnectionFailure('Subscription Type is required.')
 
-    def create_subscription(self, payload):
+    def iter_subscriptions_by_type(self, subscription_type, account_id):
+        """Yield subscriptions one at a time.
+
+        Follows ``next_page_token`` while the service returns one, so only a
+        single page is held at any time. Without the token the whole listing
+        arrives as one page, as it always has.
+        """
+        response = self.get_subscriptions_by_type(subscription_type, account_id)
+        while True:
+            for subscription in response.get('subscriptions', None) or []:
+                yield subscription
+            page_token = response.get('next_page_token', None)
+            if not page_token:
+                return
+            response = self._get(SUBSCRIPTIONS_PAGE_BY_TYPE, subscription_type, account_id, page_token)
+
+    def create_subscription(self, payload, account_id=None):
         if payload:
-            response = self.connection.post(url=SUBSCRIPTION_URL, data=payload, account_id=self.account_id)
+            response = self.connection.post(url=SUBSCRIPTION_URL, data=payload, account_id=account_id or self.account_id)
+            self.invalidate_cache('create_subscription')
             self.handle_httperror(response)
             return response['contents']
         else:
             raise AnsibleConnectionFailure('Payload is empty.')
 
-    def update_subscription(self, payload, subscription_id):
-        if payload:
-            response = self.connection.put(url=SUBSCRIPTION_BY_ID_URL.format(subscription_id), data=payload, account_id=self.account_id)
-            self.handle_httperror(response)
-            return response['contents']
-        else:
+    def update_subscription(self, payload, subscription_id, current=None, account_id=None):
+        """Update a subscription with ``payload``, a full subscription body.
+
+        With ``current``, the subscription as last read, only the difference
+        is sent as a merge patch. A service that rejects the patch gets the
+        full ``payload`` as a PUT, and so does every later update through this
+        client. ``payload_bytes`` adds up the size of the full bodies and of
+        what was actually sent. ``account_id``, as with the other subscription
+        calls, overrides the client's ``account_id`` for this request only.
+        """
+        if not payload:
             raise AnsibleConnectionFailure('Payload is empty.')
 
-    def retire_subscription(self, payload, subscription_id):
-        response = self.connection.post(url=RETIRE_SUBSCRIPTION_URL.format(subscription_id), data=payload, account_id=self.account_id)
+        account_id = account_id or self.account_id
+        url = SUBSCRIPTION_BY_ID_URL.format(subscription_id)
+        full_size = len(json.dumps(payload))
+        self.payload_bytes['full'] += full_size
+
+        if current is not None and self.merge_patch is not False:
+            body = subscription_merge_patch(current, payload)
+            response = self.connection.patch(url=url, data=body, account_id=account_id)
+            if response['code'] not in MERGE_PATCH_UNSUPPORTED:
+                self.merge_patch = True
+                self.payload_bytes['sent'] += len(json.dumps(body))
+                self.invalidate_cache('update_subscription')
+                self.handle_httperror(response)
+                return response['contents']
+            self.merge_patch = False
+
+        response = self.connection.put(url=url, data=payload, account_id=account_id)
+        self.payload_bytes['sent'] += full_size
+        self.invalidate_cache('update_subscription')
         self.handle_httperror(response)
         return response['contents']
 
-    def activate_subscription(self, subscription_id):
-        response = self.connection.post(url=ACTIVATE_SUBSCRIPTION_URL.format(subscription_id), account_id=self.account_id)
+    def retire_subscription(self, payload, subscription_id, account_id=None):
+        response = self.connection.post(url=RETIRE_SUBSCRIPTION_URL.format(subscription_id), data=payload,
+                                        account_id=account_id or self.account_id)
+        self.invalidate_cache('retire_subscription')
         self.handle_httperror(response)
         return response['contents']
 
-    def suspend_subscription(self, subscription_id):
-        response = self.connection.post(url=SUSPEND_SUBSCRIPTION_URL.format(subscription_id), account_id=self.account_id)
+    def activate_subscription(self, subscription_id, account_id=None):
+        response = self.connection.post(url=ACTIVATE_SUBSCRIPTION_URL.format(subscription_id), account_id=account_id or self.account_id)
+        self.invalidate_cache('activate_subscription')
         self.handle_httperror(response)
         return response['contents']
 
-    def get_subscription_status(self, subscription_id):
-        response = self.connection.get(url=SUBSCRIPTION_STATUS_URL.format(subscription_id), account_id=self.account_id)
+    def suspend_subscription(self, subscription_id, account_id=None):
+        response = self.connection.post(url=SUSPEND_SUBSCRIPTION_URL.format(subscription_id), account_id=account_id or self.account_id)
+        self.invalidate_cache('suspend_subscription')
         self.handle_httperror(response)
         return response['contents']
 
-    def get_current_user(self):
-        response = self.connection.get(url=GET_CURRENT_USER, account_id=self.account_id)
+    def get_subscription_status(self, subscription_id, account_id=None):
+        response = self.connection.get(url=SUBSCRIPTION_STATUS_URL.format(subscription_id), account_id=account_id or self.account_id)
         self.handle_httperror(response)
         return response['contents']
 
+    def get_current_user(self):
+        return self._get(GET_CURRENT_USER)
+
     def get_catalogs(self):
-        response = self.connection.get(url=GET_CATALOGS, account_id=self.account_id)
-        self.handle_httperror(response)
-        return response['contents']
+        return self._get(GET_CATALOGS)
+
+    def get_catalog_ids(self):
+        """Returns the catalog id of every service type.
+
+        The catalogs are read once per client; the connection plugins keep
+        them for the life of the connection as well.
+        """
+        if self.catalog_ids is None:
+            catalogs = self.get_catalogs().get('Catalogs', None) or []
+            self.catalog_ids = dict((x['service_type'], x['catalog_id']) for x in reversed(catalogs))
+        return self.catalog_ids
+
+    def get_catalog_id(self, service_type):
+        """Returns the id of the catalog of ``service_type``."""
+        catalog_ids = self.get_catalog_ids()
+        if service_type not in catalog_ids:
+            raise AnsibleConnectionFailure('Catalog for service type {0} not found.'.format(service_type))
+        return catalog_ids[service_type]
 
     def enable_catalog_item(self, payload, account_id):
         response = self.connection.post(url=POST_CATALOGS.format(account_id), data=payload, account_id=self.account_id)
+        self.invalidate_cache('enable_catalog_item')
         self.handle_httperror(response)
         return response['contents']
 
     def disable_catalog_item(self, account_id, catalog_id):
         response = self.connection.delete(url=DELETE_CATALOGS.format(account_id, catalog_id), account_id=account_id)
+        self.invalidate_cache('disable_catalog_item')
         self.handle_httperror(response)
         return response['contents']
 
     def post_certificate(self, payload):
         response = self.connection.post(url=CERTIFICATES_URL, data=payload, account_id=self.account_id)
+        self.invalidate_cache('post_certificate')
         self.handle_httperror(response)
         return response['contents']
 
     def get_certificates(self, account_id):
-        response = self.connection.get(url=GET_CERTIFICATES_URL.format(account_id), account_id=self.account_id)
-        self.handle_httperror(response)
-        return response['contents']
+        return self._get(GET_CERTIFICATES_URL, account_id)
+
+    def get_certificate_index(self, account_id):
+        """Returns a ``CertificateIndex`` over the certificates of
+        ``account_id``, built once per client and again after a certificate
+        is uploaded or retired. Every task makes its own client, so the
+        index lasts one task, not the persistent connection.
+        """
+        if account_id not in self.certificate_indexes:
+            certificates = self.get_certificates(account_id).get('certificates', None) or []
+            self.certificate_indexes[account_id] = CertificateIndex(certificates)
+        return self.certificate_indexes[account_id]
 
     def retire_certificate(self, certificate_id):
         response = self.connection.delete(url=DELETE_CERTIFICATES_URL.format(certificate_id), account_id=self.account_id)
+        self.invalidate_cache('retire_certificate')
         self.handle_httperror(response)
         return response['contents']
 
@@ -317,57 +502,65 @@ class CloudservicesApi():
     def update_account(self, payload, account_id):
         if payload:
             response = self.connection.put(url=UPDATE_ACCOUNT.format(account_id), data=payload, account_id=self.account_id)
+            self.invalidate_cache('update_account')
             self.handle_httperror(response)
             return response['contents']
         else:
             raise AnsibleConnectionFailure('Payload is empty.')
 
     def get_memberships(self, user_id):
-        response = self.connection.get(url=GET_MEMBERSHIPS.format(user_id), account_id=self.account_id)
-        self.handle_httperror(response)
-        return response['contents']
+        return self._get(GET_MEMBERSHIPS, user_id)
 
     def get_account(self, account_id):
-        response = self.connection.get(url=GET_ACCOUNT.format(account_id), account_id=self.account_id)
-        self.handle_httperror(response)
-        return response['contents']
+        return self._get(GET_ACCOUNT, account_id)
+
+    def get_membership_index(self):
+        """Returns a ``MembershipIndex`` over the memberships of the current
+        user, built once per client and again after writes that change them.
+        """
+        if self.membership_index is None:
+            user_id = self.get_current_user().get('id', None)
+            self.membership_index = MembershipIndex(self.get_memberships(user_id).get('memberships', None) or [])
+        return self.membership_index
 
     def create_account(self, payload):
         response = self.connection.post(url=CREATE_ACCOUNT, data=payload, account_id=self.account_id)
+        self.invalidate_cache('create_account')
         self.handle_httperror(response)
         return response['contents']
 
     def delete_account(self, payload, account_id, cascade):
         response = self.connection.delete(url=DELETE_ACCOUNT.format(account_id, str(cascade).lower()), data=payload, account_id=self.account_id)
+        self.invalidate_cache('delete_account')
         self.handle_httperror(response)
         return response['contents']
 
     def delete_account_member(self, account_id, user_id):
         response = self.connection.delete(url=DELETE_ACCOUNT_MEMBER.format(account_id, user_id), account_id=account_id)
+        self.invalidate_cache('delete_account_member')
         self.handle_httperror(response)
         return response['contents']
 
     def delete_invite(self, invite_id):
         response = self.connection.delete(url=DELETE_INVITE.format(invite_id), account_id=self.account_id)
+        self.invalidate_cache('delete_invite')
         self.handle_httperror(response)
         return response['contents']
 
     def list_account_members(self, account_id):
-        response = self.connection.get(url=GET_ACCOUNT_MEMBERS.format(account_id), account_id=account_id)
-        self.handle_httperror(response)
-        return response['contents']
+        return self._get(GET_ACCOUNT_MEMBERS, account_id, account_id=account_id)
 
     def list_invites(self):
-        response = self.connection.get(url=GET_INVITES, account_id=self.account_id)
-        self.handle_httperror(response)
-        return response['contents']
+        return self._get(GET_INVITES)
 
     def update_account_member(self, payload, account_id, user_id):
         response = self.connection.put(url=UPDATE_ACCOUNT_MEMBER.format(account_id, user_id), data=payload, account_id=account_id)
+        self.invalidate_cache('update_account_member')
         self.handle_httperror(response)
         return response['contents']
 
     def create_invite_into_account(self, payload):
         response = self.connection.post(url=CREATE_INVITE_INTO_ACCOUNT, data=payload, account_id=self.account_id)
+        self.invalidate_cache('create_invite_into_account')
         self.handle_httperror(response)
         return response['contents']
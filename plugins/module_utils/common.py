@@ -4,17 +4,66 @@
 # Copyright: (c) 2020, F5 Networks Inc.
 # GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
+import hashlib
+import json
+import time
+
 from collections import defaultdict
+from multiprocessing.pool import ThreadPool
+from ansible.module_utils.six import add_metaclass
 from ansible.module_utils.six import iteritems
 
+DEFAULT_WORKERS = 8
+
+# Top-level configuration keys that the service fills in or that only
+# describe an update; they never take part in configuration equality.
+SERVER_ONLY_KEYS = frozenset([
+    'details', 'create_time', 'update_time', 'cancel_time', 'end_time', 'nameservers', 'update_comment',
+])
+
 
 class F5ModuleError(Exception):
     pass
 
 
+class ParametersMeta(type):
+    """Precomputes how ``AnsibleF5Parameters.update`` stores every key.
+
+    Walking the MRO with ``getattr`` and checking for a ``property`` for every
+    key of every instance dominated the construction of ``ApiParameters``
+    from large listings, so both are resolved once, when the class is created.
+    ``_setters`` maps the names of properties that have a setter to that
+    setter; everything else is stored in ``_values`` directly.
+
+    Subclasses get an empty ``__slots__`` unless they declare their own, so
+    instances only carry the attributes that ``AnsibleF5Parameters`` defines.
+    """
+
+    def __new__(mcs, name, bases, attrs):
+        attrs.setdefault('__slots__', ())
+        return super(ParametersMeta, mcs).__new__(mcs, name, bases, attrs)
+
+    def __init__(cls, name, bases, attrs):
+        super(ParametersMeta, cls).__init__(name, bases, attrs)
+        setters = {}
+        for attr in dir(cls):
+            value = getattr(cls, attr, None)
+            if isinstance(value, property) and value.fset is not None:
+                setters[attr] = value.fset
+        cls._setters = setters
+        cls._api_map = getattr(cls, 'api_map', None) or {}
+
+
+def _none():
+    return None
+
+
+@add_metaclass(ParametersMeta)
 class AnsibleF5Parameters(object):
+    __slots__ = ('_values', '_params', '_module', 'client')
+
     def __init__(self, *args, **kwargs):
-        self._values = defaultdict(lambda: None)
+        self._values = defaultdict(_none)
         self._values['__warnings'] = []
         self.client = kwargs.pop('client', None)
         self._module = kwargs.pop('module', None)
@@ -26,48 +75,40 @@ class AnsibleF5Parameters(object):
             self._params.update(params)
 
     def update(self, params=None):
-        if params:
-            self._params.update(params)
+        if not params:
+            return
+        self._params.update(params)
+
+        values = self._values
+        setters = self._setters
+        api_map = self._api_map
+        for k, v in iteritems(params):
+            # Adding this here because ``username`` is a connection parameter
+            # and in cases where it is also an API parameter, we run the risk
+            # of overriding the specified parameter with the connection parameter.
+            #
+            # Since this is a problem, and since "username" is never a valid
+            # parameter outside its usage in connection params (where we do not
+            # use the ApiParameter or ModuleParameters classes) it is safe to
+            # skip over it if it is provided.
+            if k == 'password':
+                continue
 
-            for k, v in iteritems(params):
-                # Adding this here because ``username`` is a connection parameter
-                # and in cases where it is also an API parameter, we run the risk
-                # of overriding the specified parameter with the connection parameter.
-                #
-                # Since this is a problem, and since "username" is never a valid
-                # parameter outside its usage in connection params (where we do not
-                # use the ApiParameter or ModuleParameters classes) it is safe to
-                # skip over it if it is provided.
-                if k == 'password':
-                    continue
-                if self.api_map is not None and k in self.api_map:
-                    map_key = self.api_map[k]
-                else:
-                    map_key = k
-
-                # Handle weird API parameters like `dns.proxy.__iter__` by
-                # using a map provided by the module developer
-                class_attr = getattr(type(self), map_key, None)
-                if isinstance(class_attr, property):
-                    # There is a mapped value for the api_map key
-                    if class_attr.fset is None:
-                        # If the mapped value does not have
-                        # an associated setter
-                        self._values[map_key] = v
-                    else:
-                        # The mapped value has a setter
-                        setattr(self, map_key, v)
-                else:
-                    # If the mapped value is not a @property
-                    self._values[map_key] = v
+            # Handle weird API parameters like `dns.proxy.__iter__` by
+            # using a map provided by the module developer
+            map_key = api_map.get(k, k)
+
+            setter = setters.get(map_key)
+            if setter is None:
+                # Not a @property, or a @property without a setter
+                values[map_key] = v
+            else:
+                setter(self, v)
 
     def api_params(self):
         result = {}
         for api_attribute in self.api_attributes:
-            if self.api_map is not None and api_attribute in self.api_map:
-                result[api_attribute] = getattr(self, self.api_map[api_attribute])
-            else:
-                result[api_attribute] = getattr(self, api_attribute)
+            result[api_attribute] = getattr(self, self._api_map.get(api_attribute, api_attribute))
         result = self._filter_params(result)
         return result
 
@@ -88,3 +129,224 @@ class AnsibleF5Parameters(object):
 
     def _filter_params(self, params):
         return dict((k, v) for k, v in iteritems(params) if v is not None)
+
+
+class LazyChanges(object):
+    """``ModuleManager.changes``, computed from ``Difference`` on first read.
+
+    ``_update_changed_options`` runs after every read and every write of a
+    resource, but ``changes`` is usually only read once, for the payload of
+    the next write or for the module results. ``defer`` only records the
+    current ``have``; the first read of ``changes`` diffs it against ``want``
+    and keeps the result until the next ``defer``.
+
+    This differs from an eager diff in two ways:
+
+    - ``want`` is read when ``changes`` is read, not when ``defer`` runs, so
+      changing ``want`` in between changes the result.
+    - Only the last two ``have`` are kept, so reading a resource in a loop
+      does not hold on to every response. The newer of the two with any
+      changes wins; a ``have`` without any, typically the response of a
+      delete, keeps the changes of the one before it. When neither has
+      changes, ``changes`` keeps what it held before those two, not the
+      changes of an older ``have``.
+    """
+
+    def __init__(self, difference, changes, updatables):
+        self.difference = difference
+        self.changes = changes
+        self.updatables = updatables
+
+    def __get__(self, manager, owner=None):
+        if manager is None:
+            return self
+        pending = manager.__dict__.pop('_pending_haves', None)
+        while pending:
+            changes = self.compute(manager.want, pending.pop())
+            if changes is not None:
+                manager.__dict__['_changes'] = changes
+                break
+        return manager.__dict__.get('_changes')
+
+    def __set__(self, manager, value):
+        manager.__dict__['_changes'] = value
+        manager.__dict__.pop('_pending_haves', None)
+
+    def defer(self, manager):
+        pending = manager.__dict__.setdefault('_pending_haves', [])
+        pending.append(manager.have)
+        del pending[:-2]
+
+    def compute(self, want, have):
+        diff = self.difference(want, have)
+        changed = dict()
+        for k in self.updatables:
+            change = diff.compare(k)
+            if change is not None:
+                changed[k] = change
+        if changed:
+            return self.changes(params=changed)
+        return None
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("'{0}' object is read-only".format(type(self).__name__))
+
+
+class FrozenDict(dict):
+    """A ``dict`` that cannot be changed in place.
+
+    It serializes, compares and reads like the ``dict`` it was built from,
+    so it can be shared between payloads instead of copied into each one.
+    ``copy()`` returns a plain ``dict`` whose values are still shared, and
+    ``replace()`` a new ``FrozenDict`` with some keys replaced; only the
+    path that changes is ever copied.
+    """
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+    __ior__ = _read_only
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def replace(self, **kwargs):
+        result = dict(self)
+        result.update((k, freeze(v)) for k, v in iteritems(kwargs))
+        return FrozenDict(result)
+
+
+class FrozenList(list):
+    """A ``list`` that cannot be changed in place, see ``FrozenDict``."""
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = reverse = sort = clear = _read_only
+
+    def __reduce__(self):
+        return type(self), (list(self),)
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def copy(self):
+        return list(self)
+
+
+def freeze(value):
+    """Returns ``value`` with every dict and list in it made read-only."""
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in iteritems(value))
+    if isinstance(value, list):
+        return FrozenList(freeze(x) for x in value)
+    return value
+
+
+def thaw(value):
+    """Returns ``value`` with every ``FrozenDict`` and ``FrozenList`` in it
+    replaced by a plain copy; anything else is returned as it is.
+    """
+    if isinstance(value, dict):
+        return dict((k, thaw(v)) for k, v in iteritems(value))
+    if isinstance(value, list):
+        return [thaw(x) for x in value]
+    return value
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return dict((str(k), _canonical(v)) for k, v in iteritems(value))
+    if isinstance(value, (list, tuple)):
+        return [_canonical(x) for x in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def config_hash(config, ignore=SERVER_ONLY_KEYS):
+    """Returns a structural hash of a subscription ``configuration``.
+
+    Keys are sorted and integral floats compare equal to ints, so two
+    configurations have the same hash exactly when they are equal as JSON.
+    Top-level ``ignore`` keys are left out.
+    """
+    if isinstance(config, dict) and ignore:
+        config = dict((k, v) for k, v in iteritems(config) if k not in ignore)
+    data = json.dumps(_canonical(config), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def merge_patch(have, want, keep=()):
+    """Returns the RFC 7386 merge patch that turns ``have`` into ``want``.
+
+    Only changed values are kept; nested dicts are diffed key by key, and
+    other values, lists included, are replaced whole. Top-level keys of
+    ``have`` that ``want`` lacks are removed with ``None``, except ``keep``.
+    """
+    if not isinstance(have, dict) or not isinstance(want, dict):
+        return want
+    patch = dict()
+    for key, value in iteritems(want):
+        if key not in have:
+            patch[key] = value
+        elif isinstance(value, dict) and isinstance(have[key], dict):
+            delta = merge_patch(have[key], value)
+            if delta:
+                patch[key] = delta
+        elif value != have[key]:
+            patch[key] = value
+    for key in have:
+        if key not in want and key not in keep:
+            patch[key] = None
+    return patch
+
+
+def parallel_map(func, items, workers=DEFAULT_WORKERS):
+    """Apply ``func`` to ``items`` on at most ``workers`` threads.
+
+    Results come back in the order of ``items``; the first exception raised
+    by ``func`` is re-raised. One item or one worker runs inline.
+    """
+    items = list(items)
+    workers = min(workers or 1, len(items))
+    if workers <= 1:
+        return [func(x) for x in items]
+
+    pool = ThreadPool(workers)
+    try:
+        return pool.map(func, items)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def backoff(timeout, first=1, maximum=15, clock=time.time):
+    """Returns an iterator over how long to sleep before each next poll,
+    which ends ``timeout`` seconds after the call.
+
+    The first sleep is ``first`` seconds and every next one twice as long,
+    up to ``maximum``; the last one is cut short at the deadline.
+    """
+    deadline = clock() + timeout
+
+    def delays(interval):
+        while True:
+            remaining = deadline - clock()
+            if remaining <= 0:
+                return
+            yield min(interval, remaining)
+            interval = min(interval * 2, maximum)
+
+    return delays(first)
@@ -0,0 +1,156 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import re
+
+from ansible.errors import AnsibleConnectionFailure
+from ansible.module_utils._text import to_text
+from ansible.module_utils.six.moves.urllib.error import HTTPError
+from ansible.module_utils.urls import open_url
+
+try:
+    from library.module_utils.catalogs import CATALOGS_URL
+    from library.module_utils.catalogs import DEFAULT_CATALOG_TTL
+    from library.module_utils.catalogs import CatalogRegistry
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.catalogs import CATALOGS_URL
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.catalogs import DEFAULT_CATALOG_TTL
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.catalogs import CatalogRegistry
+
+BASE_HEADERS = {'Content-Type': 'application/json'}
+MERGE_PATCH_HEADERS = {'Content-Type': 'application/merge-patch+json'}
+LOGIN_URL = "/v1/svc-auth/login"
+LOGOUT_URL = "/v1/svc-auth/logout"
+CURRENT_USER_URL = "/v1/svc-account/user"
+DEFAULT_HOST = "api.cloudservices.f5.com"
+
+
+class RestConnection(object):
+    """Direct HTTP(S) connection to F5 Cloud Services.
+
+    Offers the same ``get``/``post``/``put``/``patch``/``delete`` calls as the
+    ``f5`` httpapi plugin, so ``CloudservicesApi`` can be used by plugins that
+    run on the controller without a persistent connection, such as inventory
+    and lookup plugins.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, username=None, password=None, port=None, use_ssl=True,
+                 validate_certs=True, timeout=60, catalog_cache_path=None, catalog_cache_ttl=DEFAULT_CATALOG_TTL):
+        scheme = 'https' if use_ssl else 'http'
+        if port:
+            self.base_url = '{0}://{1}:{2}'.format(scheme, host, port)
+        else:
+            self.base_url = '{0}://{1}'.format(scheme, host)
+        self.username = username
+        self.password = password
+        self.validate_certs = validate_certs
+        self.timeout = timeout
+        self.access_token = None
+        self.refresh_token = None
+        self._auth = None
+        self.current_user = None
+        self.catalogs = CatalogRegistry(
+            lambda: self._request('GET', CATALOGS_URL), path=catalog_cache_path, ttl=catalog_cache_ttl,
+        )
+
+    def login(self):
+        if not self.username or not self.password:
+            raise AnsibleConnectionFailure('Username and password are required for login.')
+
+        payload = {
+            'username': self.username,
+            'password': self.password,
+        }
+        response = self.send_request(LOGIN_URL, method='POST', data=payload, headers=BASE_HEADERS)
+        try:
+            self.refresh_token = response['contents']['refresh_token']
+            self.access_token = response['contents']['access_token']
+            self._auth = {'Authorization': 'Bearer {0}'.format(self.access_token)}
+        except (KeyError, TypeError):
+            raise AnsibleConnectionFailure('Server returned invalid response during connection authentication.')
+
+    def logout(self):
+        if not self.access_token:
+            return
+        payload = {
+            'access_token': self.access_token
+        }
+        self.send_request(LOGOUT_URL, method='POST', data=payload, headers=BASE_HEADERS)
+        self.access_token = None
+        self._auth = None
+
+    def send_request(self, url, method=None, **kwargs):
+        body = kwargs.pop('data', None)
+        data = json.dumps(body) if body else None
+        headers = dict(kwargs.pop('headers', None) or BASE_HEADERS)
+        if self._auth:
+            headers.update(self._auth)
+
+        try:
+            response = open_url(
+                self.base_url + url,
+                data=data,
+                headers=headers,
+                method=method,
+                timeout=self.timeout,
+                validate_certs=self.validate_certs,
+            )
+            return dict(code=response.getcode(), contents=self._response_to_json(response.read()))
+        except HTTPError as e:
+            if re.search(r'^5\d{2}$', str(e.code)):
+                raise AnsibleConnectionFailure('Could not connect to {0}: {1}'.format(self.base_url, e.reason))
+            return dict(code=e.code, contents=self._response_to_json(e.read()))
+
+    def _response_to_json(self, response_data):
+        response_text = to_text(response_data)
+        try:
+            return json.loads(response_text) if response_text else {}
+        except ValueError:
+            raise AnsibleConnectionFailure('Invalid JSON response: {0}'.format(response_text))
+
+    def _request(self, method, url, data=None, account_id=None, **kwargs):
+        headers = dict(MERGE_PATCH_HEADERS if method == 'PATCH' else BASE_HEADERS)
+        if account_id:
+            headers['X-F5aaS-Preferred-Account-Id'] = account_id
+        if self._auth is None and self.username:
+            self.login()
+        return self.send_request(url, method=method, data=data, headers=headers, **kwargs)
+
+    def delete(self, url, data=None, account_id=None, **kwargs):
+        return self._request('DELETE', url, data=data, account_id=account_id, **kwargs)
+
+    def get_catalogs(self):
+        """The service catalogs, read once per connection."""
+        return self.catalogs.get()
+
+    def get_current_user(self):
+        """The user logged in with, read once per connection."""
+        if self.current_user is None:
+            response = self._request('GET', CURRENT_USER_URL)
+            if response['code'] != 200:
+                return response
+            self.current_user = response
+        return self.current_user
+
+    def get(self, url, account_id=None, **kwargs):
+        if url == CATALOGS_URL and not kwargs:
+            return self.get_catalogs()
+        if url == CURRENT_USER_URL and not kwargs:
+            return self.get_current_user()
+        return self._request('GET', url, account_id=account_id, **kwargs)
+
+    def patch(self, url, data=None, account_id=None, **kwargs):
+        return self._request('PATCH', url, data=data, account_id=account_id, **kwargs)
+
+    def post(self, url, data=None, account_id=None, **kwargs):
+        return self._request('POST', url, data=data, account_id=account_id, **kwargs)
+
+    def put(self, url, data=None, account_id=None, **kwargs):
+        return self._request('PUT', url, data=data, account_id=account_id, **kwargs)
@@ -0,0 +1,184 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible.errors import AnsibleConnectionFailure
+
+try:
+    from library.module_utils.common import DEFAULT_WORKERS
+    from library.module_utils.common import parallel_map
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import DEFAULT_WORKERS
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import parallel_map
+
+_MISSING = object()
+
+
+class SubscriptionIndex(object):
+    """Lookup tables over one subscriptions listing.
+
+    The listing is walked once; lookups by subscription id or service instance
+    name are dictionary hits afterwards. When several subscriptions share a
+    service instance name the first one in the listing wins, as before, and a
+    warning naming all of them is recorded. Only the lookup tables are kept,
+    not the listing itself; iterating yields each subscription id once.
+    """
+
+    def __init__(self, subscriptions=None):
+        self.by_id = dict()
+        self.by_name = dict()
+        self.duplicates = dict()
+        self.warnings = list()
+        for subscription in subscriptions or []:
+            self.add(subscription)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(list(self.by_id.values()))
+
+    def add(self, subscription):
+        subscription_id = subscription.get('subscription_id', None)
+        if subscription_id is not None:
+            self.by_id.setdefault(subscription_id, subscription)
+
+        name = subscription.get('service_instance_name', None)
+        if name is None:
+            return
+        if name in self.by_name:
+            self.duplicates.setdefault(name, [self.by_name[name].get('subscription_id', None)])
+            self.duplicates[name].append(subscription_id)
+        else:
+            self.by_name[name] = subscription
+
+    def get_by_id(self, subscription_id):
+        return self.by_id.get(subscription_id, None)
+
+    def get_by_name(self, service_instance_name, warnings=None):
+        """``warnings``, when given, gets the duplicate name warning instead
+        of ``self.warnings``, so threads sharing the index keep their own.
+        """
+        subscription = self.by_name.get(service_instance_name, None)
+        if subscription is not None and service_instance_name in self.duplicates:
+            (self.warnings if warnings is None else warnings).append(
+                'Found {0} subscriptions named {1} ({2}), using {3}'.format(
+                    len(self.duplicates[service_instance_name]),
+                    service_instance_name,
+                    ', '.join(str(x) for x in self.duplicates[service_instance_name]),
+                    subscription.get('subscription_id', None),
+                )
+            )
+        return subscription
+
+    def find(self, subscription_id=None, service_instance_name=None, warnings=None):
+        if subscription_id:
+            return self.get_by_id(subscription_id)
+        if service_instance_name:
+            return self.get_by_name(service_instance_name, warnings)
+        return None
+
+
+def announce_warnings(module, index):
+    """Passes the warnings recorded by ``index`` on to ``module`` once."""
+    for warning in index.warnings:
+        module.warn(warning)
+    del index.warnings[:]
+
+
+def get_field(item, path, default=None):
+    """Return the value at dotted key ``path`` in ``item``, or ``default``."""
+    value = item
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return default
+        value = value[key]
+    return value
+
+
+def project_fields(item, fields):
+    """Reduce ``item`` to the dotted key paths listed in ``fields``.
+
+    ``['subscription_id', 'configuration.details.CNAMEValue']`` keeps those two
+    values and the dictionaries leading to them. Paths missing from ``item``
+    are skipped; a path whose parent was already kept whole adds nothing.
+    """
+    if not fields:
+        return item
+
+    result = dict()
+    created = set([id(result)])
+    for path in sorted(set(fields), key=lambda x: x.count('.')):
+        value = get_field(item, path, _MISSING)
+        if value is _MISSING:
+            continue
+        keys = path.split('.')
+        target = result
+        for key in keys[:-1]:
+            if key not in target:
+                target[key] = dict()
+                created.add(id(target[key]))
+            target = target[key]
+            if id(target) not in created:
+                break
+        else:
+            target[keys[-1]] = value
+    return result
+
+
+class SubscriptionResolver(object):
+    """Resolves many subscription ids with as few API calls as possible.
+
+    The first ids that are not known yet trigger one listing of the account's
+    subscriptions of ``service_type``; ids still missing afterwards, such as
+    subscriptions of another type, are read by id on up to ``workers``
+    threads. Everything read is kept, so later calls for the same ids cost
+    nothing. Ids the API refuses resolve to None, with the reason kept in
+    ``errors``.
+    """
+
+    def __init__(self, client, account_id=None, service_type='waf', workers=DEFAULT_WORKERS):
+        self.client = client
+        self.account_id = account_id
+        self.service_type = service_type
+        self.workers = workers
+        self.index = SubscriptionIndex()
+        self.listed = False
+        self.errors = dict()
+
+    def get_account_id(self):
+        if not self.account_id:
+            self.account_id = self.client.get_current_user()['primary_account_id']
+        return self.account_id
+
+    def list_subscriptions(self):
+        account_id = self.get_account_id()
+        for subscription in self.client.iter_subscriptions_by_type(self.service_type, account_id):
+            if self.index.get_by_id(subscription.get('subscription_id', None)) is None:
+                self.index.add(subscription)
+        self.listed = True
+
+    def get_subscription(self, subscription_id):
+        try:
+            return self.client.get_subscription_by_id(subscription_id, account_id=self.get_account_id())
+        except AnsibleConnectionFailure as ex:
+            self.errors[subscription_id] = str(ex)
+            return None
+
+    def resolve(self, subscription_ids):
+        missing = [x for x in subscription_ids if self.index.get_by_id(x) is None]
+        if missing and not self.listed:
+            self.list_subscriptions()
+            missing = [x for x in missing if self.index.get_by_id(x) is None]
+
+        missing = sorted(set(x for x in missing if x not in self.errors))
+        for subscription in parallel_map(self.get_subscription, missing, self.workers):
+            if subscription is not None:
+                self.index.add(subscription)
+
+        return dict((x, self.index.get_by_id(x)) for x in subscription_ids)
@@ -6,8 +6,11 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
+from ansible.errors import AnsibleConnectionFailure
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.connection import Connection
+from ansible.module_utils.connection import ConnectionError
+from ansible.module_utils.six import iteritems
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
                     'status': ['preview'],
@@ -38,6 +41,48 @@ options:
             - dnslb
             - dns
             - secondary_dns
+    catalog_ids:
+        description:
+            - Catalog ids to subscribe to, with C(state=present), or to unsubscribe from, with C(state=absent).
+            - The account is read once, and only the catalogs whose subscription differs are changed, C(workers) at a time.
+            - With C(state=fetch), only these catalog items are returned.
+            - Can be combined with C(services).
+        type: list
+        elements: str
+        version_added: 1.3
+    services:
+        description: Catalog services managed like C(catalog_ids).
+        type: list
+        elements: str
+        choices:
+            - eap
+            - beacon
+            - dnslb
+            - dns
+            - secondary_dns
+        version_added: 1.3
+    account_ids:
+        description:
+            - Accounts in which C(catalog_ids) and C(services) are managed, instead of a single account.
+            - The accounts are read with batch gets, and the changes in all of them share one pool of C(workers).
+            - Requests sent over the C(httpapi) connection are still served one at a time.
+            - The result of every account is returned in C(accounts); a failure in one account does not stop the others.
+        type: list
+        elements: str
+        version_added: 1.3
+    parent_account_id:
+        description:
+            - Manages C(catalog_ids) and C(services) in every child account of this account, like C(account_ids).
+            - Child accounts are looked up among the accounts of which the user is a member.
+        type: str
+        version_added: 1.3
+    workers:
+        description:
+            - Maximum number of catalog items subscribed to or unsubscribed from by workers at a time.
+            - Requests sent over the C(httpapi) connection are still served one at a time.
+        type: int
+        default: 8
+        version_added: 1.3
 
 author:
   - Alex Shemyakin
@@ -70,16 +115,47 @@ delete_time:
     description: delete time
 service:
     description: catalog service name
+enabled:
+    description: catalog ids subscribed to, with C(catalog_ids) or C(services)
+    type: list
+disabled:
+    description: catalog ids unsubscribed from, with C(catalog_ids) or C(services)
+    type: list
+errors:
+    description: error of every catalog item that could not be changed, by catalog id
+    type: dict
+accounts:
+    description:
+        - result of every account, with C(account_ids) or C(parent_account_id)
+        - every account has C(account_id), C(name), C(enabled), C(disabled) and C(catalog_items), and C(failed),
+          C(msg) and C(errors) when it failed
+    type: list
 '''
 
 try:
+    from library.module_utils.accounts import batch_get_accounts
     from library.module_utils.cloudservices import CloudservicesApi
     from library.module_utils.common import F5ModuleError
     from library.module_utils.common import AnsibleF5Parameters
+    from library.module_utils.common import LazyChanges
+    from library.module_utils.common import parallel_map
 except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.accounts import batch_get_accounts
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import F5ModuleError
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import AnsibleF5Parameters
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import LazyChanges
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import parallel_map
+
+SERVICE_TYPES = {
+    'secondary_dns': 'adns',
+    'dns': 'dns',
+    'dnslb': 'gslb',
+    'eap': 'waf',
+    'beacon': 'beacon',
+}
+
+SERVICES = dict((v, k) for k, v in iteritems(SERVICE_TYPES))
 
 
 class Parameters(AnsibleF5Parameters):
@@ -109,6 +185,10 @@ class Parameters(AnsibleF5Parameters):
         'update_time',
         'delete_time',
         'service',
+        'enabled',
+        'disabled',
+        'errors',
+        'accounts',
     ]
 
 
@@ -153,6 +233,10 @@ class ApiParameters(Parameters):
     def delete_time(self):
         return self._values['delete_time']
 
+    @property
+    def service(self):
+        return SERVICES.get(self._values['service_type'], None)
+
 
 class ModuleParameters(Parameters):
     @property
@@ -165,33 +249,35 @@ class ModuleParameters(Parameters):
 
     @property
     def catalog_id(self):
-        if self._values['catalog_id']:
-            return self._values['catalog_id']
-        if self._values['service']:
-            mapping = {
-                'secondary_dns': 'c-aaxBJkfg8u',
-                'dns': 'c-aau0eSVXtL',
-                'dnslb': 'c-aaQnOrPjGu',
-                'eap': 'c-aa9N0jgHI4',
-                'beacon': 'c-aacHacMCM8',
-            }
-            return mapping.get(self._values['service'], None)
-        return None
+        return self._values['catalog_id']
+
+    @property
+    def catalog_ids(self):
+        if self._values['catalog_ids'] is None:
+            return None
+        result = []
+        for catalog_id in self._values['catalog_ids']:
+            if catalog_id not in result:
+                result.append(catalog_id)
+        return result
+
+    @property
+    def account_ids(self):
+        if self._values['account_ids'] is None:
+            return None
+        result = []
+        for account_id in self._values['account_ids']:
+            if account_id not in result:
+                result.append(account_id)
+        return result
+
+    @property
+    def fleet(self):
+        return self.account_ids is not None or bool(self._values['parent_account_id'])
 
     @property
     def service(self):
-        if self._values['service']:
-            return self._values['service']
-        if self._values['catalog_id']:
-            mapping = {
-                'c-aaxBJkfg8u': 'secondary_dns',
-                'c-aau0eSVXtL': 'dns',
-                'c-aaQnOrPjGu': 'dnslb',
-                'c-aa9N0jgHI4': 'eap',
-                'c-aacHacMCM8': 'beacon',
-            }
-            return mapping.get(self._values['catalog_id'], None)
-        return None
+        return self._values['service']
 
 
 class Changes(Parameters):
@@ -299,36 +385,34 @@ class Difference(object):
 
 
 class ModuleManager(object):
+    changes = LazyChanges(Difference, UsableChanges, Parameters.updatables)
+
     def __init__(self, *args, **kwargs):
         self.module = kwargs.pop('module', None)
         self.client = kwargs.pop('client')
         self.want = ModuleParameters(params=self.module.params, client=self.client)
         self.have = ApiParameters(client=self.client)
         self.changes = UsableChanges()
+        self.errors = dict()
         if self.want.account_id:
             self.client.account_id = self.want.account_id
 
     def _update_changed_options(self):
-        diff = Difference(self.want, self.have)
-        updatables = Parameters.updatables
-        changed = dict()
-        for k in updatables:
-            change = diff.compare(k)
-            if change is None:
-                continue
-            else:
-                changed[k] = change
-        if changed:
-            self.changes = UsableChanges(params=changed)
-            return True
-        return False
+        type(self).changes.defer(self)
 
     def exec_module(self):
         changed = False
         result = dict()
         state = self.want.state
 
-        if state == 'present':
+        self.resolve_catalogs()
+        if self.want.fleet:
+            if self.want.catalog_ids is None:
+                raise F5ModuleError('account_ids and parent_account_id require catalog_ids or services')
+            changed = self.manage_accounts()
+        elif self.want.catalog_ids is not None:
+            changed = self.manage_items()
+        elif state == 'present':
             changed = self.subscribe()
         elif state == 'fetch':
             if self.want.account_id is None and self.want.service is None:
@@ -341,6 +425,12 @@ class ModuleManager(object):
         reportable = ReportableChanges(params=self.changes.to_return())
         changes = reportable.to_return()
         result.update(**changes)
+        if self.errors and self.want.fleet:
+            result.update(dict(failed=True, msg='{0} of {1} accounts failed: {2}'.format(
+                len(self.errors), len(result['accounts']), ', '.join(self.errors))))
+        elif self.errors:
+            result.update(dict(failed=True, msg='{0} of {1} catalog items failed: {2}'.format(
+                len(self.errors), len(self.want.catalog_ids), ', '.join(sorted(self.errors)))))
         result.update(dict(changed=changed))
         self._announce_deprecations(result)
         return result
@@ -353,6 +443,19 @@ class ModuleManager(object):
                 version=warning['version']
             )
 
+    def resolve_catalogs(self):
+        """Turns ``service`` and ``services`` into catalog ids. The service
+        catalogs are read once, and only when either is set.
+        """
+        params = dict()
+        if self.want.service and not self.want.catalog_id:
+            params['catalog_id'] = self.client.get_catalog_id(SERVICE_TYPES[self.want.service])
+        if self.want.services is not None:
+            catalog_ids = list(self.want.catalog_ids or [])
+            catalog_ids.extend(self.client.get_catalog_id(SERVICE_TYPES[x]) for x in self.want.services)
+            params['catalog_ids'] = catalog_ids
+        self.want.update(params)
+
     def get_account_id(self):
         if self.want.account_id:
             return self.want.account_id
@@ -360,8 +463,7 @@ class ModuleManager(object):
         return current_user['primary_account_id']
 
     def get_catalog_services(self):
-        response = self.client.get_account(account_id=self.get_account_id())
-        return response.get('catalog_items', [])
+        return self.get_catalog_services_of(self.get_account_id())
 
     def subscribe(self):
         result = False
@@ -392,6 +494,106 @@ class ModuleManager(object):
         self._update_changed_options()
         return result
 
+    def manage_items(self):
+        """Subscribes to, or unsubscribes from, every catalog of ``catalog_ids``
+        with a single read of the account; only catalogs whose subscription
+        differs are changed, ``workers`` at a time.
+        """
+        account_id = self.get_account_id()
+        account = self.client.get_account(account_id=account_id)
+        result = self.reconcile([dict(account, id=account_id)])[0]
+        self.errors = result.pop('errors')
+        if self.errors:
+            result['errors'] = self.errors
+        self.changes = UsableChanges(params=result)
+        return bool(result['enabled'] or result['disabled'])
+
+    def manage_accounts(self):
+        """``manage_items`` for every account of ``account_ids``, or every
+        child account of ``parent_account_id``. The accounts are read with
+        batch gets, and the changes of all of them share one pool of
+        ``workers``.
+        """
+        account_ids = self.want.account_ids
+        if account_ids is None:
+            account_ids = self.get_child_account_ids(self.want.parent_account_id)
+        accounts = batch_get_accounts(self.client, account_ids, self.want.workers)
+
+        found = [accounts[x] for x in account_ids if x in accounts]
+        results = dict((x['account_id'], x) for x in self.reconcile(found))
+        reports = []
+        for account_id in account_ids:
+            result = results.get(account_id)
+            if result is None:
+                result = dict(account_id=account_id, enabled=[], disabled=[], errors=dict(),
+                              msg='account {0} not found'.format(account_id))
+            if result.get('msg') or result['errors']:
+                result['failed'] = True
+                self.errors[account_id] = result.get('msg') or ', '.join(sorted(result['errors']))
+            if not result['errors']:
+                del result['errors']
+            reports.append(result)
+        self.changes = UsableChanges(params=dict(accounts=reports))
+        return any(x['enabled'] or x['disabled'] for x in reports)
+
+    def get_child_account_ids(self, parent_account_id):
+        user_id = self.client.get_current_user().get('id', None)
+        memberships = self.client.get_memberships(user_id).get('memberships', [])
+        account_ids = [x['account_id'] for x in memberships if x['account_id'] != parent_account_id]
+        accounts = batch_get_accounts(self.client, account_ids, self.want.workers)
+        return [x for x in account_ids if accounts.get(x, dict()).get('parent_account_id') == parent_account_id]
+
+    def get_catalog_services_of(self, account_id):
+        response = self.client.get_account(account_id=account_id)
+        return response.get('catalog_items', [])
+
+    def reconcile(self, accounts):
+        """Brings the catalog items of every account of ``accounts``, as
+        read from the service, in line with ``catalog_ids`` and returns what
+        was done in each of them.
+        """
+        catalog_ids = self.want.catalog_ids
+        results = []
+        pending = []
+        for account in accounts:
+            services = account.get('catalog_items', None) or []
+            result = dict(account_id=account['id'], enabled=[], disabled=[], errors=dict(), catalog_items=list(services))
+            if self.want.state == 'fetch':
+                result['catalog_items'] = [x for x in services if x['catalog_id'] in catalog_ids]
+            if account.get('name'):
+                result['name'] = account['name']
+            results.append(result)
+            subscribed = set(x['catalog_id'] for x in services if x['status'] == 'SUBSCRIBED')
+            if self.want.state == 'absent':
+                pending.extend((result, x) for x in catalog_ids if x in subscribed)
+            elif self.want.state == 'present':
+                pending.extend((result, x) for x in catalog_ids if x not in subscribed)
+        action = 'disabled' if self.want.state == 'absent' else 'enabled'
+
+        def apply(item):
+            account_id, catalog_id = item[0]['account_id'], item[1]
+            try:
+                if action == 'enabled':
+                    payload = {
+                        'account_id': account_id,
+                        'catalog_id': catalog_id,
+                    }
+                    return self.client.enable_catalog_item(payload, account_id)
+                return self.client.disable_catalog_item(account_id, catalog_id)
+            except (F5ModuleError, AnsibleConnectionFailure, ConnectionError) as ex:
+                return ex
+
+        for (result, catalog_id), response in zip(pending, parallel_map(apply, pending, self.want.workers)):
+            if isinstance(response, Exception):
+                result['errors'][catalog_id] = str(response)
+                continue
+            result[action].append(catalog_id)
+            items = [x for x in result['catalog_items'] if x['catalog_id'] != catalog_id]
+            if action == 'enabled':
+                items.append(response)
+            result['catalog_items'] = items
+        return results
+
     def read_all_catalogs_from_cloud(self):
         services = self.get_catalog_services()
         self.have = ApiParameters(params=dict(catalog_items=services))
@@ -420,10 +622,22 @@ class ArgumentSpec(object):
                 default='present',
                 choices=['present', 'dns', 'beacon', 'absent', 'fetch']
             ),
+            catalog_ids=dict(type='list', elements='str'),
+            services=dict(
+                type='list',
+                elements='str',
+                choices=['secondary_dns', 'dns', 'beacon', 'dnslb', 'eap']
+            ),
+            account_ids=dict(type='list', elements='str'),
+            parent_account_id=dict(),
+            workers=dict(type='int', default=8),
         )
 
         self.argument_spec = {}
         self.argument_spec.update(argument_spec)
+        self.mutually_exclusive = [
+            ['account_id', 'account_ids', 'parent_account_id'],
+        ]
 
 
 def main():
@@ -432,6 +646,7 @@ def main():
     module = AnsibleModule(
         argument_spec=spec.argument_spec,
         supports_check_mode=spec.supports_check_mode,
+        mutually_exclusive=spec.mutually_exclusive,
     )
 
     connection = Connection(module._socket_path)
@@ -114,10 +114,12 @@ try:
     from library.module_utils.cloudservices import CloudservicesApi
     from library.module_utils.common import F5ModuleError
     from library.module_utils.common import AnsibleF5Parameters
+    from library.module_utils.common import LazyChanges
 except ImportError:
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import F5ModuleError
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import AnsibleF5Parameters
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import LazyChanges
 
 
 class Parameters(AnsibleF5Parameters):
@@ -269,6 +271,8 @@ class Difference(object):
 
 
 class ModuleManager(object):
+    changes = LazyChanges(Difference, UsableChanges, Parameters.updatables)
+
     def __init__(self, *args, **kwargs):
         self.module = kwargs.pop('module', None)
         self.client = kwargs.pop('client', None)
@@ -277,19 +281,7 @@ class ModuleManager(object):
         self.changes = UsableChanges()
 
     def _update_changed_options(self):
-        diff = Difference(self.want, self.have)
-        updatables = Parameters.updatables
-        changed = dict()
-        for k in updatables:
-            change = diff.compare(k)
-            if change is None:
-                continue
-            else:
-                changed[k] = change
-        if changed:
-            self.changes = UsableChanges(params=changed)
-            return True
-        return False
+        type(self).changes.defer(self)
 
     def exec_module(self):
         result = dict()
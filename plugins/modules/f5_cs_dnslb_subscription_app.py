@@ -6,7 +6,6 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 import time
-import copy
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.connection import Connection
@@ -61,6 +60,19 @@ options:
     activate:
         description: activate subscription on create
         default: True
+    fields:
+        description:
+            - Dotted key paths kept for every load balancer returned in C(apps) when fetching all subscriptions,
+              for example C(configuration.gslb_service.virtual_servers).
+            - When omitted, whole subscriptions are returned.
+        type: list
+        elements: str
+    configuration_hash:
+        description:
+            - The C(configuration_hash) returned by a previous run with the same I(configuration) and
+              I(service_instance_name).
+            - When it matches and I(subscription_id) is set, the subscription is assumed to be up to date and
+              is not read from the cloud. Changes made outside of Ansible are not detected in that case.
 author:
   - Alex Shemyakin
 '''
@@ -93,16 +105,31 @@ apps:
     description: list of available DNSLB apps
 status:
     description: subscription status
+configuration_hash:
+    description: Hash of the applied configuration and service_instance_name, to pass back on the next run
+    sample: 9f2c4e0d5b8a1f3e7c6d2b4a0e9f8c7d6b5a4e3f2d1c0b9a8f7e6d5c4b3a2f1e
 '''
 
 try:
     from library.module_utils.cloudservices import CloudservicesApi
     from library.module_utils.common import F5ModuleError
     from library.module_utils.common import AnsibleF5Parameters
+    from library.module_utils.common import LazyChanges
+    from library.module_utils.common import SERVER_ONLY_KEYS
+    from library.module_utils.common import config_hash
+    from library.module_utils.subscriptions import SubscriptionIndex
+    from library.module_utils.subscriptions import announce_warnings
+    from library.module_utils.subscriptions import project_fields
 except ImportError:
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import F5ModuleError
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import AnsibleF5Parameters
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import LazyChanges
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import SERVER_ONLY_KEYS
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import config_hash
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import SubscriptionIndex
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import announce_warnings
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import project_fields
 
 
 class Parameters(AnsibleF5Parameters):
@@ -134,6 +161,10 @@ class ApiParameters(Parameters):
 
 
 class ModuleParameters(Parameters):
+    @property
+    def fields(self):
+        return self._values['fields']
+
     @property
     def configuration(self):
         return self._values['configuration']
@@ -259,6 +290,8 @@ class Difference(object):
 
 
 class ModuleManager(object):
+    changes = LazyChanges(Difference, UsableChanges, Parameters.updatables)
+
     def __init__(self, *args, **kwargs):
         self.module = kwargs.pop('module', None)
         self.client = kwargs.pop('client', None)
@@ -269,19 +302,7 @@ class ModuleManager(object):
             self.client.account_id = self.want.account_id
 
     def _update_changed_options(self):
-        diff = Difference(self.want, self.have)
-        updatables = Parameters.updatables
-        changed = dict()
-        for k in updatables:
-            change = diff.compare(k)
-            if change is None:
-                continue
-            else:
-                changed[k] = change
-        if changed:
-            self.changes = UsableChanges(params=changed)
-            return True
-        return False
+        type(self).changes.defer(self)
 
     def exec_module(self):
         changed = False
@@ -308,6 +329,8 @@ class ModuleManager(object):
         reportable = ReportableChanges(params=self.changes.to_return())
         changes = reportable.to_return()
         result.update(**changes)
+        if state == 'present' and self.want.configuration:
+            result.update(dict(configuration_hash=self.want_configuration_hash()))
         result.update(dict(changed=changed))
         self._announce_deprecations(result)
         return result
@@ -328,21 +351,31 @@ class ModuleManager(object):
         self.remove_from_cloud(payload, subscription_id=self.have.subscription_id)
         return True
 
+    def want_configuration_hash(self):
+        return config_hash(dict(self.want.configuration, service_instance_name=self.want.service_instance_name))
+
+    def is_applied(self):
+        if not self.want.subscription_id or not self.want.configuration or not self.want.configuration_hash:
+            return False
+        return self.want_configuration_hash() == self.want.configuration_hash
+
     def present(self):
+        if self.is_applied():
+            self.changes = UsableChanges(params=dict(
+                subscription_id=self.want.subscription_id,
+                service_instance_name=self.want.service_instance_name,
+            ))
+            return False
         if self.exists():
             return self.update_current()
         else:
             return self.create()
 
     def exists(self):
-        subscriptions = self.get_subscriptions()
-        subscription = None
-        if self.want.subscription_id:
-            subscription = ([s for s in subscriptions if s['subscription_id'] == self.want.subscription_id] or [None])[
-                0]
-        else:
-            subscription = \
-                ([s for s in subscriptions if s['service_instance_name'] == self.want.service_instance_name] or [None])[0]
+        index = self.get_subscription_index()
+        subscription = index.find(subscription_id=self.want.subscription_id,
+                                  service_instance_name=self.want.service_instance_name)
+        announce_warnings(self.module, index)
         if subscription is not None:
             self.have = ApiParameters(params=subscription)
             self._update_changed_options()
@@ -350,7 +383,7 @@ class ModuleManager(object):
         return False
 
     def get_catalog_id(self):
-        return 'c-aaQnOrPjGu'
+        return self.client.get_catalog_id('gslb')
 
     def get_account_id(self):
         if self.want.account_id:
@@ -436,9 +469,16 @@ class ModuleManager(object):
             changed = want != have
         return changed
 
+    def configuration_changed(self, want, have, keys_check=False):
+        if config_hash(want) == config_hash(have):
+            return False
+        if keys_check is True and have:
+            have = dict((k, v) for k, v in have.items() if k not in SERVER_ONLY_KEYS)
+        return self.deep_changes_check(want, have, keys_check)
+
     def update_current(self):
         changed = False
-        catalog_id = self.get_catalog_id()
+        catalog_id = self.have.catalog_id or self.get_catalog_id()
         payload = {
             'account_id': self.have.account_id,
             'catalog_id': catalog_id,
@@ -449,23 +489,15 @@ class ModuleManager(object):
             payload['configuration'] = self.want.configuration
             payload['service_instance_name'] = self.want.service_instance_name
 
-            h_config = copy.deepcopy(self.have.configuration)
-            if h_config.get('details', None):
-                del h_config['details']
-            if h_config.get('nameservers', None):
-                del h_config['nameservers']
-
-            changed = self.deep_changes_check(self.want.configuration, h_config, True)
+            changed = self.configuration_changed(self.want.configuration, self.have.configuration, True)
             changed = changed or self.want.service_instance_name != self.have.service_instance_name
         else:
-            payload['configuration'] = copy.deepcopy(self.changes.configuration)
-            if payload['configuration'].get('details', None):
-                del payload['configuration']['details']
-            if payload['configuration'].get('nameservers', None):
-                del payload['configuration']['nameservers']
+            payload['configuration'] = dict(
+                (k, v) for k, v in self.changes.configuration.items() if k not in ('details', 'nameservers')
+            )
             payload['service_instance_name'] = self.want.service_instance_name or self.have.service_instance_name
             if self.want.configuration:
-                changed = self.deep_changes_check(self.want.configuration, self.have.configuration, False)
+                changed = self.configuration_changed(self.want.configuration, self.have.configuration, False)
                 changed = changed or payload['service_instance_name'] != self.have.service_instance_name
 
         if changed is True:
@@ -475,11 +507,13 @@ class ModuleManager(object):
 
     def get_subscriptions(self):
         account_id = self.get_account_id()
-        response = self.client.get_subscriptions_by_type(subscription_type='gslb', account_id=account_id)
-        return response.get('subscriptions', [])
+        return self.client.iter_subscriptions_by_type(subscription_type='gslb', account_id=account_id)
+
+    def get_subscription_index(self):
+        return SubscriptionIndex(self.get_subscriptions())
 
     def read_subscriptions_from_cloud(self):
-        subscriptions = self.get_subscriptions()
+        subscriptions = [project_fields(s, self.want.fields) for s in self.get_subscriptions()]
         self.have = ApiParameters(params=dict(apps=subscriptions))
         self._update_changed_options()
 
@@ -489,7 +523,11 @@ class ModuleManager(object):
         self._update_changed_options()
 
     def update_on_cloud(self, payload, subscription_id):
-        self.have = ApiParameters(params=self.client.update_subscription(payload, subscription_id))
+        current = dict(
+            service_instance_name=self.have.service_instance_name,
+            configuration=self.have.configuration,
+        )
+        self.have = ApiParameters(params=self.client.update_subscription(payload, subscription_id, current=current))
         self._update_changed_options()
 
     def create_on_cloud(self, payload):
@@ -510,6 +548,8 @@ class ArgumentSpec(object):
             account_id=dict(),
             service_instance_name=dict(),
             configuration=dict(type=dict),
+            configuration_hash=dict(no_log=False),
+            fields=dict(type='list', elements='str'),
             state=dict(
                 default='present',
                 choices=['present', 'absent', 'fetch', 'active', 'suspended']
@@ -12,6 +12,7 @@ from ansible.module_utils.connection import Connection
 from functools import reduce
 import OpenSSL.crypto
 import datetime
+import hashlib
 
 ANSIBLE_METADATA = {'metadata_version': '1.01',
                     'status': ['preview'],
@@ -115,11 +116,30 @@ try:
     from library.module_utils.cloudservices import CloudservicesApi
     from library.module_utils.common import F5ModuleError
     from library.module_utils.common import AnsibleF5Parameters
+    from library.module_utils.common import LazyChanges
 
 except ImportError:
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import F5ModuleError
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import AnsibleF5Parameters
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import LazyChanges
+
+
+def parse_certificate(pem):
+    """Returns the fingerprint, serial number, issuer, common name and
+    expiration date of a PEM certificate, dates as the service reports them.
+    """
+    cert = OpenSSL.crypto.load_certificate(OpenSSL.crypto.FILETYPE_PEM, pem.encode('utf-8'))
+    expiration_date = datetime.datetime.strptime(cert.get_notAfter().decode('utf-8'), '%Y%m%d%H%M%SZ')
+    issuer = ','.join('{0}={1}'.format(k.decode('utf-8'), v.decode('utf-8'))
+                      for k, v in cert.get_issuer().get_components())
+    return dict(
+        fingerprint=cert.digest('sha256').decode('utf-8'),
+        serial_number='{0:x}'.format(cert.get_serial_number()),
+        issuer=issuer,
+        common_name=cert.get_subject().commonName,
+        expiration_date=expiration_date.strftime('%Y-%m-%dT%H:%M:%SZ'),
+    )
 
 
 class Parameters(AnsibleF5Parameters):
@@ -265,6 +285,8 @@ class Difference(object):
 
 
 class ModuleManager(object):
+    changes = LazyChanges(Difference, UsableChanges, Parameters.updatables)
+
     def __init__(self, *args, **kwargs):
         self.module = kwargs.pop('module', None)
         self.client = kwargs.pop('client', None)
@@ -273,19 +295,7 @@ class ModuleManager(object):
         self.changes = UsableChanges()
 
     def _update_changed_options(self):
-        diff = Difference(self.want, self.have)
-        updatables = Parameters.updatables
-        changed = dict()
-        for k in updatables:
-            change = diff.compare(k)
-            if change is None:
-                continue
-            else:
-                changed[k] = change
-        if changed:
-            self.changes = UsableChanges(params=changed)
-            return True
-        return False
+        type(self).changes.defer(self)
 
     def exec_module(self):
         result = dict()
@@ -326,8 +336,7 @@ class ModuleManager(object):
             changed = False
         elif self.want.state == "absent":
             if self.want.certificate_id:
-                certificates = self.get_certificates()
-                certificate = ([x for x in certificates if x['id'] == self.want.certificate_id] or [None])[0]
+                certificate = self.get_certificate_index().get_by_id(self.want.certificate_id)
                 if certificate:
                     self.remove_certificate(self.want.certificate_id)
                     changed = True
@@ -399,23 +408,22 @@ class ModuleManager(object):
         self.deep_set(subscription, 'configuration.update_comment', 'Remove SSL Certificate')
         self.client.update_subscription(subscription, subscription_id)
 
+    def get_certificate_index(self):
+        return self.client.get_certificate_index(self.get_account_id())
+
     def get_certificates(self):
-        account_id = self.get_account_id()
-        response = self.client.get_certificates(account_id)
-        return response.get('certificates', [])
+        return list(self.get_certificate_index())
 
     def get_subscriptions(self):
         account_id = self.get_account_id()
-        response = self.client.get_subscriptions_by_type(subscription_type='waf', account_id=account_id)
-        return response.get('subscriptions', [])
+        return self.client.iter_subscriptions_by_type(subscription_type='waf', account_id=account_id)
 
     def get_certificate_id_by_subscription_id(self, subscription_id):
         subscription = self.client.get_subscription_by_id(subscription_id)
         return self.deep_get(subscription, 'configuration.waf_service.application.https.tls.certificate_id', None)
 
     def find_certificate_usage_on_cloud(self, certificate_id):
-        certificates = self.get_certificates()
-        certificate = ([x for x in certificates if x['id'] == certificate_id] or [dict()])[0]
+        certificate = self.get_certificate_index().get_by_id(certificate_id) or dict()
         subscriptions = self.get_subscriptions()
         assigned_subscriptions = list()
         for subscription in subscriptions:
@@ -471,20 +479,28 @@ class ModuleManager(object):
             self.client.update_subscription(subscription, params['subscription_id'])
         return changed
 
+    def read_certificate(self):
+        """Returns the parsed ``certificate`` option, or ``None`` when it is
+        not a PEM certificate. Parsed certificates are kept on the client by
+        the SHA-256 of their PEM, so an identical PEM is parsed once per
+        task.
+        """
+        pem = self.want.certificate or ''
+        key = hashlib.sha256(pem.encode('utf-8')).hexdigest()
+        parsed = self.client.parsed_certificates
+        if key not in parsed:
+            try:
+                parsed[key] = parse_certificate(pem)
+            except Exception:
+                parsed[key] = None
+        return parsed[key]
+
     def find_existing_certificate(self):
         try:
-            cert = OpenSSL.crypto.load_certificate(
-                OpenSSL.crypto.FILETYPE_PEM,
-                self.want.certificate.encode('utf-8'))
-            date = cert.get_notAfter()
-            name = cert.get_subject()
-            provided_exp_date = datetime.datetime.strptime(date.decode('utf-8'), '%Y%m%d%H%M%SZ')
-            provided_common_name = name.commonName
-
-            certificates = self.get_certificates()
-            certificate = \
-                ([x for x in certificates if datetime.datetime.strptime(x['expiration_date'],
-                  '%Y-%m-%dT%H:%M:%SZ') == provided_exp_date and x['common_name'] == provided_common_name][:1] or [dict()])[0]
+            provided = self.read_certificate()
+            if provided is None:
+                return None
+            certificate = self.get_certificate_index().find(**provided) or dict()
             return certificate.get('id', None)
         except Exception:
             return None
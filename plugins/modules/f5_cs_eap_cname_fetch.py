@@ -22,6 +22,30 @@ version_added: 1.0
 options:
     subscription_id:
         description: ID of existing subscription
+    subscription_ids:
+        description:
+            - IDs of existing subscriptions, returned as C(cnames).
+            - Served from one listing of the account's subscriptions, with by-id reads for ids
+              the listing does not contain.
+        type: list
+        elements: str
+        version_added: 1.3
+    all_subscriptions:
+        description: Return C(cnames) of all Essential App Protect subscriptions of the account
+        type: bool
+        version_added: 1.3
+    account_id:
+        description:
+            - ID of the account to list subscriptions from.
+            - When omitted, the primary account of the user is used.
+        version_added: 1.3
+    workers:
+        description:
+            - Maximum number of by-id reads handled by workers at a time.
+            - Requests sent over the C(httpapi) connection are still served one at a time.
+        type: int
+        default: 8
+        version_added: 1.3
 author:
     - Alex Shemyakin
 '''
@@ -37,6 +61,10 @@ subscription_id:
 CNAMEValue:
     description: CNAME record
     sample: waf-xxxxxxxxx.waf.prd.f5aas.com
+cnames:
+    description: CNAME records by subscription ID, returned for C(subscription_ids) or C(all_subscriptions)
+    type: dict
+    sample: {"s-xxxxxxxxxx": "waf-xxxxxxxxx.waf.prd.f5aas.com"}
 '''
 
 
@@ -44,10 +72,16 @@ try:
     from library.module_utils.cloudservices import CloudservicesApi
     from library.module_utils.common import F5ModuleError
     from library.module_utils.common import AnsibleF5Parameters
+    from library.module_utils.common import LazyChanges
+    from library.module_utils.subscriptions import SubscriptionResolver
+    from library.module_utils.subscriptions import get_field
 except ImportError:
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import F5ModuleError
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import AnsibleF5Parameters
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import LazyChanges
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import SubscriptionResolver
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import get_field
 
 
 class Parameters(AnsibleF5Parameters):
@@ -56,7 +90,7 @@ class Parameters(AnsibleF5Parameters):
     ]
 
     returnables = [
-        'subscription_id', 'CNAMEValue'
+        'subscription_id', 'CNAMEValue', 'cnames'
     ]
 
 
@@ -73,6 +107,22 @@ class ModuleParameters(Parameters):
             return None
         return self._values['subscription_id']
 
+    @property
+    def subscription_ids(self):
+        return self._values['subscription_ids']
+
+    @property
+    def all_subscriptions(self):
+        return self._values['all_subscriptions']
+
+    @property
+    def account_id(self):
+        return self._values['account_id']
+
+    @property
+    def workers(self):
+        return self._values['workers']
+
 
 class Changes(Parameters):
     def to_return(self):
@@ -125,6 +175,8 @@ class Difference(object):
 
 
 class ModuleManager(object):
+    changes = LazyChanges(Difference, UsableChanges, Parameters.updatables)
+
     def __init__(self, *args, **kwargs):
         self.module = kwargs.pop('module', None)
         self.client = kwargs.pop('client', None)
@@ -133,25 +185,16 @@ class ModuleManager(object):
         self.changes = UsableChanges()
 
     def _update_changed_options(self):
-        diff = Difference(self.want, self.have)
-        updatables = Parameters.updatables
-        changed = dict()
-        for k in updatables:
-            change = diff.compare(k)
-            if change is None:
-                continue
-            else:
-                changed[k] = change
-        if changed:
-            self.changes = UsableChanges(params=changed)
-            return True
-        return False
+        type(self).changes.defer(self)
 
     def exec_module(self):
         changed = False
         result = dict()
 
-        self.read_from_cloud()
+        if self.want.subscription_ids is not None or self.want.all_subscriptions:
+            self.read_batch_from_cloud()
+        else:
+            self.read_from_cloud()
 
         reportable = ReportableChanges(params=self.changes.to_return())
         changes = reportable.to_return()
@@ -173,16 +216,44 @@ class ModuleManager(object):
         self.have = ApiParameters(params=subscription)
         self._update_changed_options()
 
+    def read_batch_from_cloud(self):
+        resolver = SubscriptionResolver(
+            self.client, account_id=self.want.account_id, service_type='waf', workers=self.want.workers
+        )
+        if self.want.all_subscriptions:
+            resolver.list_subscriptions()
+            subscriptions = dict((x['subscription_id'], x) for x in resolver.index)
+        else:
+            subscriptions = resolver.resolve(self.want.subscription_ids)
+
+        missing = [k for k, v in subscriptions.items() if v is None]
+        if missing:
+            raise F5ModuleError('subscriptions not found: {0}'.format(
+                ', '.join('{0} ({1})'.format(x, resolver.errors.get(x, 'not listed')) for x in sorted(missing))
+            ))
+
+        cnames = dict(
+            (k, get_field(v, 'configuration.details.CNAMEValue')) for k, v in subscriptions.items()
+        )
+        self.changes = UsableChanges(params=dict(cnames=cnames))
+
 
 class ArgumentSpec(object):
     def __init__(self):
         self.supports_check_mode = False
         argument_spec = dict(
             subscription_id=dict(),
+            subscription_ids=dict(type='list', elements='str'),
+            all_subscriptions=dict(type='bool'),
+            account_id=dict(),
+            workers=dict(type='int', default=8),
         )
 
         self.argument_spec = {}
         self.argument_spec.update(argument_spec)
+        self.mutually_exclusive = [
+            ['subscription_id', 'subscription_ids', 'all_subscriptions'],
+        ]
 
 
 def main():
@@ -191,6 +262,7 @@ def main():
     module = AnsibleModule(
         argument_spec=spec.argument_spec,
         supports_check_mode=spec.supports_check_mode,
+        mutually_exclusive=spec.mutually_exclusive,
     )
 
     connection = Connection(module._socket_path)
@@ -89,10 +89,12 @@ try:
     from library.module_utils.cloudservices import CloudservicesApi
     from library.module_utils.common import F5ModuleError
     from library.module_utils.common import AnsibleF5Parameters
+    from library.module_utils.common import LazyChanges
 except ImportError:
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import F5ModuleError
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import AnsibleF5Parameters
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import LazyChanges
 
 
 def deep_get(dictionary, keys, default=None):
@@ -115,6 +117,22 @@ def deep_set(dictionary, keys, value):
             counter += 1
 
 
+def copy_path(dictionary, keys):
+    """Returns a shallow copy of ``dictionary`` and of every dict along ``keys``.
+
+    ``deep_set`` on the copy then leaves the original untouched.
+    """
+    result = dict(dictionary or {})
+    current = result
+    for key in keys.split("."):
+        val = current.get(key, None)
+        if not isinstance(val, dict):
+            break
+        current[key] = dict(val)
+        current = current[key]
+    return result
+
+
 class Parameters(AnsibleF5Parameters):
     updatables = [
         'subscription_id', 'ip_enforcement', 'configuration'
@@ -210,7 +228,7 @@ class Difference(object):
 
     @property
     def configuration(self):
-        config = self.have.configuration
+        config = copy_path(self.have.configuration, 'waf_service.policy.high_risk_attack_mitigation.ip_enforcement')
         w_ips = self.want.ip_enforcement
         h_ips = self.have.ip_enforcement
         ip_list = list()
@@ -239,6 +257,8 @@ class Difference(object):
 
 
 class ModuleManager(object):
+    changes = LazyChanges(Difference, UsableChanges, Parameters.updatables)
+
     def __init__(self, *args, **kwargs):
         self.module = kwargs.pop('module', None)
         self.client = kwargs.pop('client', None)
@@ -247,19 +267,7 @@ class ModuleManager(object):
         self.changes = UsableChanges()
 
     def _update_changed_options(self):
-        diff = Difference(self.want, self.have)
-        updatables = Parameters.updatables
-        changed = dict()
-        for k in updatables:
-            change = diff.compare(k)
-            if change is None:
-                continue
-            else:
-                changed[k] = change
-        if changed:
-            self.changes = UsableChanges(params=changed)
-            return True
-        return False
+        type(self).changes.defer(self)
 
     def exec_module(self):
         result = dict()
@@ -305,7 +313,11 @@ class ModuleManager(object):
         self._update_changed_options()
 
     def update_on_cloud(self, payload, subscription_id):
-        self.have = ApiParameters(params=self.client.update_subscription(payload, subscription_id))
+        current = dict(
+            service_instance_name=self.have.service_instance_name,
+            configuration=self.have.configuration,
+        )
+        self.have = ApiParameters(params=self.client.update_subscription(payload, subscription_id, current=current))
         self._update_changed_options()
 
 
@@ -8,10 +8,12 @@ from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
 import time
-import copy
 
+from ansible.errors import AnsibleConnectionFailure
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.connection import Connection
+from ansible.module_utils.connection import ConnectionError
+from ansible.module_utils.six import iteritems
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
                     'status': ['preview'],
@@ -66,6 +68,90 @@ options:
         description: wait until the deployment will be completed
     waf_regions:
          description: list of the regions, used for dynamic region variables
+    fields:
+        description:
+            - List of dotted key paths, such as C(configuration.details.CNAMEValue), kept for every subscription
+              returned in C(apps) when fetching all subscriptions.
+            - When omitted, whole subscriptions are returned.
+        type: list
+        elements: str
+    configuration_hash:
+        description:
+            - The C(configuration_hash) returned by a previous run with the same I(configuration) and
+              I(service_instance_name).
+            - When it matches and I(subscription_id) is set, the subscription is assumed to be up to date and
+              is not read from the cloud. Changes made outside of Ansible are not detected in that case.
+    fqdns:
+        description:
+            - FQDNs to create auto discovered applications for, each named after its FQDN.
+            - Discovery of all of them is awaited together and one entry per FQDN is returned in C(apps).
+            - Applications that already exist are left as they are, unless their discovery has not completed yet.
+        type: list
+        elements: str
+        version_added: 1.3
+    apps:
+        description:
+            - Applications to manage in one task. The subscriptions are listed once, and each application is
+              then created, updated, retired or activated by a worker of its own, up to I(workers) at a time.
+            - Over the C(httpapi) connection C(ansible-connection) serves requests one at a time, so the API
+              calls of the applications are not sent in parallel. What overlaps is the waiting, such as for
+              activation or auto discovery, and the single subscription listing saves the most calls.
+            - Options not set for an application are taken from the task, so I(state), I(patch), I(activate)
+              and the like can be set once for all of them.
+            - One result per application is returned in C(apps), in the same order. Applications that fail
+              are reported there with C(failed) and C(msg) and fail the task once all others are done.
+        type: list
+        elements: dict
+        version_added: 1.3
+        suboptions:
+            service_instance_name:
+                description: FQDN record name or application name
+                required: True
+            subscription_id:
+                description: ID of the existing subscription
+            fqdn:
+                description: FQDN record name
+            state:
+                description: The I(state) of the application
+                choices:
+                    - absent
+                    - active
+                    - fetch
+                    - present
+                    - suspended
+            configuration:
+                description: EAP configuration of the application
+                type: dict
+            configuration_hash:
+                description: The C(configuration_hash) returned for the application by a previous run
+            waf_regions:
+                description: Regions of the application, as for I(waf_regions)
+                type: dict
+            patch:
+                description: When C(True), will merge I(configuration) with the existing cloud configuration
+                type: bool
+            activate:
+                description: When C(True), will activate the subscription on create
+                type: bool
+            update_comment:
+                description: Brief description of changes
+    discovery_timeout:
+        description:
+            - Seconds to wait for auto discovery when neither I(configuration) nor I(waf_regions) is set.
+            - The first check follows the create after 2 seconds, later checks back off up to 15 seconds.
+            - When discovery has not completed in time, the application is created but neither configured nor
+              activated, and C(discovery_pending) and C(retry_after) are returned. Running the task again
+              resumes the discovery.
+        type: int
+        default: 75
+        version_added: 1.3
+    workers:
+        description:
+            - Maximum number of applications, or of auto discovered FQDNs, handled by workers at a time.
+            - Requests sent over the C(httpapi) connection are still served one at a time.
+        type: int
+        default: 8
+        version_added: 1.3
 author:
   - Alex Shemyakin
 '''
@@ -96,7 +182,20 @@ configuration:
             description: Additional properties, such as CNAME or recommended zone list
             sample: EAP Details
 apps:
-    description: list of available EAP apps
+    description: list of available EAP apps, or one entry per application of I(apps) or FQDN of I(fqdns)
+discovery:
+    description: The auto discovery results read last, which are partial while C(discovery_pending) is set
+    type: dict
+discovery_pending:
+    description: Whether auto discovery did not complete within I(discovery_timeout)
+    type: bool
+retry_after:
+    description: Seconds to wait before running the task again to resume a pending discovery
+    type: int
+    sample: 15
+configuration_hash:
+    description: Hash of the applied configuration and service_instance_name, to pass back on the next run
+    sample: 9f2c4e0d5b8a1f3e7c6d2b4a0e9f8c7d6b5a4e3f2d1c0b9a8f7e6d5c4b3a2f1e
 '''
 
 try:
@@ -104,12 +203,37 @@ try:
     from library.module_utils.cloudservices import f5_cs_eap_default_policy
     from library.module_utils.common import F5ModuleError
     from library.module_utils.common import AnsibleF5Parameters
+    from library.module_utils.common import LazyChanges
+    from library.module_utils.common import SERVER_ONLY_KEYS
+    from library.module_utils.common import backoff
+    from library.module_utils.common import config_hash
+    from library.module_utils.common import parallel_map
+    from library.module_utils.common import thaw
+    from library.module_utils.subscriptions import SubscriptionIndex
+    from library.module_utils.subscriptions import announce_warnings
+    from library.module_utils.subscriptions import get_field
+    from library.module_utils.subscriptions import project_fields
 except ImportError:
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import \
         f5_cs_eap_default_policy
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import F5ModuleError
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import AnsibleF5Parameters
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import LazyChanges
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import SERVER_ONLY_KEYS
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import backoff
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import config_hash
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import parallel_map
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import thaw
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import SubscriptionIndex
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import announce_warnings
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import get_field
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import project_fields
+
+# Auto discovery usually completes within seconds of the create, so it is
+# checked early and then less and less often.
+DISCOVERY_FIRST_INTERVAL = 2
+DISCOVERY_MAX_INTERVAL = 15
 
 
 class Parameters(AnsibleF5Parameters):
@@ -141,6 +265,10 @@ class ApiParameters(Parameters):
 
 
 class ModuleParameters(Parameters):
+    @property
+    def fields(self):
+        return self._values['fields']
+
     @property
     def configuration(self):
         result = self._values.get('configuration', None)
@@ -222,6 +350,28 @@ class ModuleParameters(Parameters):
             return None
         return self._values['service_instance_name'][:64]
 
+    @property
+    def fqdns(self):
+        if self._values['fqdns'] is None:
+            return None
+        result = []
+        for fqdn in self._values['fqdns']:
+            if fqdn not in result:
+                result.append(fqdn)
+        return result
+
+    @property
+    def apps(self):
+        return self._values['apps']
+
+    @property
+    def discovery_timeout(self):
+        return self._values['discovery_timeout']
+
+    @property
+    def workers(self):
+        return self._values['workers']
+
 
 class Changes(Parameters):
     def to_return(self):
@@ -242,7 +392,11 @@ class UsableChanges(Changes):
 
 
 class ReportableChanges(Changes):
-    pass
+    @property
+    def configuration(self):
+        # The default policy is read-only and the module results are rebuilt
+        # in place when no_log values are removed from them.
+        return thaw(self._values['configuration'])
 
 
 class Difference(object):
@@ -323,36 +477,35 @@ class Difference(object):
 
 
 class ModuleManager(object):
+    changes = LazyChanges(Difference, UsableChanges, Parameters.updatables)
+
     def __init__(self, *args, **kwargs):
         self.module = kwargs.pop('module', None)
         self.client = kwargs.pop('client', None)
-        self.want = ModuleParameters(params=self.module.params, client=self.client)
+        self.index = kwargs.pop('index', None)
+        # Managers of the items of a bulk task run on worker threads; they get
+        # a list of their own, which the parent announces once they are done
+        self.warnings = kwargs.pop('warnings', None)
+        params = kwargs.pop('params', None) or self.module.params
+        self.want = ModuleParameters(params=params, client=self.client)
         self.have = ApiParameters(client=self.client)
         self.changes = UsableChanges()
-        if self.want.account_id:
-            self.client.account_id = self.want.account_id
+        self.discovery = dict()
+        self.failed = []
 
     def _update_changed_options(self):
-        diff = Difference(self.want, self.have)
-        updatables = Parameters.updatables
-        changed = dict()
-        for k in updatables:
-            change = diff.compare(k)
-            if change is None:
-                continue
-            else:
-                changed[k] = change
-        if changed:
-            self.changes = UsableChanges(params=changed)
-            return True
-        return False
+        type(self).changes.defer(self)
 
     def exec_module(self):
         changed = False
         result = dict()
         state = self.want.state
 
-        if state == 'present':
+        if self.want.apps:
+            changed = self.manage_apps()
+        elif state == 'present' and self.want.fqdns:
+            changed = self.discover_apps()
+        elif state == 'present':
             changed = self.present()
         elif state == 'fetch':
             if self.want.subscription_id or self.want.service_instance_name:
@@ -372,6 +525,12 @@ class ModuleManager(object):
         reportable = ReportableChanges(params=self.changes.to_return())
         changes = reportable.to_return()
         result.update(**changes)
+        result.update(self.discovery)
+        if self.failed:
+            result.update(dict(failed=True, msg='{0} of {1} applications failed: {2}'.format(
+                len(self.failed), len(self.want.apps), ', '.join(self.failed))))
+        if state == 'present' and self.want.configuration:
+            result.update(dict(configuration_hash=self.want_configuration_hash()))
         result.update(dict(changed=changed))
         self._announce_deprecations(result)
         return result
@@ -384,6 +543,12 @@ class ModuleManager(object):
                 version=warning['version']
             )
 
+    def warn(self, warning):
+        if self.warnings is None:
+            self.module.warn(warning)
+        else:
+            self.warnings.append(warning)
+
     def retire(self):
         payload = {
             'subscription_id': self.have.subscription_id,
@@ -392,21 +557,35 @@ class ModuleManager(object):
         self.remove_from_cloud(payload, subscription_id=self.have.subscription_id)
         return True
 
+    def want_configuration_hash(self):
+        return config_hash(dict(self.want.configuration, service_instance_name=self.want.service_instance_name))
+
+    def is_applied(self):
+        if not self.want.subscription_id or not self.want.configuration or not self.want.configuration_hash:
+            return False
+        return self.want_configuration_hash() == self.want.configuration_hash
+
     def present(self):
+        if self.is_applied():
+            self.changes = UsableChanges(params=dict(
+                subscription_id=self.want.subscription_id,
+                service_instance_name=self.want.service_instance_name,
+            ))
+            return False
         if self.exists():
+            if not self.want.configuration and self.discovery_pending(self.have.configuration):
+                return self.finish_discovery(self.have.account_id, self.get_catalog_id())
             return self.update_current()
         else:
             return self.create()
 
     def exists(self):
-        subscriptions = self.get_subscriptions()
-        subscription = None
-        if self.want.subscription_id:
-            subscription = ([s for s in subscriptions if s['subscription_id'] == self.want.subscription_id] or [None])[
-                0]
-        else:
-            subscription = \
-                ([s for s in subscriptions if s['service_instance_name'] == self.want.service_instance_name] or [None])[0]
+        index = self.get_subscription_index()
+        subscription = index.find(subscription_id=self.want.subscription_id,
+                                  service_instance_name=self.want.service_instance_name,
+                                  warnings=self.warnings)
+        if self.warnings is None:
+            announce_warnings(self.module, index)
         if subscription is not None:
             self.have = ApiParameters(params=subscription)
             self._update_changed_options()
@@ -414,7 +593,7 @@ class ModuleManager(object):
         return False
 
     def get_catalog_id(self):
-        return "c-aa9N0jgHI4"
+        return self.client.get_catalog_id('waf')
 
     def get_account_id(self):
         if self.want.account_id:
@@ -422,17 +601,17 @@ class ModuleManager(object):
         current_user = self.client.get_current_user()
         return current_user['primary_account_id']
 
-    def auto_discover(self, account_id, catalog_id):
-        payload = {
+    def discovery_payload(self, account_id, catalog_id, service_instance_name, fqdn):
+        return {
             'account_id': account_id,
             'catalog_id': catalog_id,
-            'service_instance_name': self.want.service_instance_name,
+            'service_instance_name': service_instance_name,
             'service_type': 'waf',
             'configuration': {
                 'waf_service': {
                     'application': {
                         'description': '',
-                        'fqdn': self.want.fqdn,
+                        'fqdn': fqdn,
                         'http': {
                             'enabled': True,
                             'port': 80,
@@ -445,26 +624,45 @@ class ModuleManager(object):
             },
         }
 
-        self.create_on_cloud(payload)
-
-        discovery = None
-        for retry in range(0, 5):
-            subscription = self.client.get_subscription_by_id(self.have.subscription_id)
-            if subscription['configuration'].get('details'):
-                if subscription['configuration']['details']['discovery'] \
-                        and subscription['configuration']['details']['discovery']['ipGeolocations']:
-                    discovery = subscription['configuration']['details']['discovery']
-                    break
-            time.sleep(15)
+    def discovery_pending(self, configuration):
+        return not get_field(configuration or {}, 'waf_service.application.waf_regions')
+
+    def wait_for_discovery(self, subscription_ids):
+        """Reads ``subscription_ids`` until auto discovery completed for all
+        of them or ``discovery_timeout`` passed.
+
+        Every round reads each subscription still pending, on up to
+        ``workers`` threads. Returns the last discovery results read for every subscription and
+        the ids of those that are still pending.
+        """
+        discoveries = dict()
+        pending = list(subscription_ids)
+        delays = backoff(self.want.discovery_timeout, DISCOVERY_FIRST_INTERVAL, DISCOVERY_MAX_INTERVAL)
+        while pending:
+            subscriptions = parallel_map(self.read_subscription, pending, self.want.workers)
+            for subscription_id, subscription in zip(list(pending), subscriptions):
+                discovery = get_field(subscription, 'configuration.details.discovery')
+                discoveries[subscription_id] = discovery
+                if discovery and discovery.get('ipGeolocations'):
+                    pending.remove(subscription_id)
+            delay = next(delays, None)
+            if not pending or delay is None:
+                break
+            time.sleep(delay)
+        return discoveries, pending
 
-        if discovery is None:
-            raise F5ModuleError('Auto discovery failed')
+    def discovery_status(self, discovery, pending):
+        result = dict(discovery=discovery, discovery_pending=pending)
+        if pending:
+            result['retry_after'] = DISCOVERY_MAX_INTERVAL
+        return result
 
+    def discovered_configuration(self, fqdn, discovery):
         return {
             'waf_service': {
                 'application': {
                     'description': '',
-                    'fqdn': self.want.fqdn,
+                    'fqdn': fqdn,
                     'http': {
                         'enabled': True,
                         'port': 80,
@@ -498,29 +696,148 @@ class ModuleManager(object):
             }
         }
 
-    def create(self):
+    def finish_discovery(self, account_id, catalog_id):
+        subscription_id = self.have.subscription_id
+        discoveries, pending = self.wait_for_discovery([subscription_id])
+        self.discovery = self.discovery_status(discoveries.get(subscription_id), bool(pending))
+        if pending:
+            self.warn(
+                'Auto discovery of {0} did not complete within {1} seconds, run the task again to resume it'.format(
+                    self.want.fqdn, self.want.discovery_timeout)
+            )
+            return False
+
+        payload = {
+            'account_id': account_id,
+            'catalog_id': catalog_id,
+            'service_instance_name': self.want.service_instance_name,
+            'service_type': 'waf',
+            'configuration': self.discovered_configuration(self.want.fqdn, discoveries[subscription_id]),
+        }
+        self.update_on_cloud(payload, subscription_id=subscription_id)
+
+        if self.want.activate:
+            self.activate(subscription_id)
+        return True
+
+    def discover_apps(self):
         account_id = self.get_account_id()
         catalog_id = self.get_catalog_id()
+        index = self.get_subscription_index()
+        fqdns = self.want.fqdns
+
+        subscriptions = dict((fqdn, index.find(service_instance_name=fqdn[:64])) for fqdn in fqdns)
+        announce_warnings(self.module, index)
+
+        def create(fqdn):
+            payload = self.discovery_payload(account_id, catalog_id, fqdn[:64], fqdn)
+            return self.client.create_subscription(payload, account_id=account_id)
+
+        missing = [fqdn for fqdn in fqdns if subscriptions[fqdn] is None]
+        subscriptions.update(zip(missing, parallel_map(create, missing, self.want.workers)))
 
-        if self.want.configuration:
+        waiting = [fqdn for fqdn in fqdns if self.discovery_pending(subscriptions[fqdn]['configuration'])]
+        discoveries, pending = self.wait_for_discovery([subscriptions[fqdn]['subscription_id'] for fqdn in waiting])
+
+        def configure(fqdn):
+            subscription = subscriptions[fqdn]
             payload = {
                 'account_id': account_id,
                 'catalog_id': catalog_id,
-                'service_instance_name': self.want.service_instance_name,
+                'service_instance_name': subscription['service_instance_name'],
                 'service_type': 'waf',
-                'configuration': self.want.configuration,
+                'configuration': self.discovered_configuration(fqdn, discoveries[subscription['subscription_id']]),
             }
+            current = dict(
+                service_instance_name=subscription['service_instance_name'],
+                configuration=subscription['configuration'],
+            )
+            result = self.client.update_subscription(payload, subscription['subscription_id'], current=current,
+                                                     account_id=account_id)
+            if self.want.activate:
+                self.activate(subscription['subscription_id'])
+            return result
+
+        discovered = [fqdn for fqdn in waiting if subscriptions[fqdn]['subscription_id'] not in pending]
+        subscriptions.update(zip(discovered, parallel_map(configure, discovered, self.want.workers)))
+
+        apps = []
+        for fqdn in fqdns:
+            subscription = subscriptions[fqdn]
+            app = dict(
+                fqdn=fqdn,
+                subscription_id=subscription['subscription_id'],
+                service_instance_name=subscription['service_instance_name'],
+                configuration=subscription['configuration'],
+            )
+            if fqdn in waiting:
+                subscription_id = subscription['subscription_id']
+                app.update(self.discovery_status(discoveries.get(subscription_id), subscription_id in pending))
+            apps.append(app)
+        self.changes = UsableChanges(params=dict(apps=apps))
+
+        self.discovery = dict(discovery_pending=bool(pending))
+        if pending:
+            self.discovery['retry_after'] = DISCOVERY_MAX_INTERVAL
+            self.module.warn(
+                'Auto discovery of {0} applications did not complete within {1} seconds, '
+                'run the task again to resume it'.format(len(pending), self.want.discovery_timeout)
+            )
+        return bool(missing or discovered)
+
+    def manage_apps(self):
+        """Manages every application of ``apps`` with a ``ModuleManager`` of
+        its own, which shares the client, the account and the subscription
+        listing with this one. Each keeps its warnings apart, and they are
+        announced here in the order of ``apps``.
+        """
+        self.want.update(dict(account_id=self.get_account_id()))
+        index = self.get_subscription_index()
+        announce_warnings(self.module, index)
+
+        params = dict((k, v) for k, v in iteritems(self.module.params) if k not in ('apps', 'fqdns'))
+        params['account_id'] = self.want.account_id
+
+        def manage(app):
+            app_params = dict(params, subscription_id=None, configuration_hash=None)
+            app_params.update((k, v) for k, v in iteritems(app) if v is not None)
+            warnings = list()
+            manager = ModuleManager(module=self.module, client=self.client, params=app_params, index=index,
+                                    warnings=warnings)
+            try:
+                return manager.exec_module(), warnings
+            except (F5ModuleError, AnsibleConnectionFailure, ConnectionError) as ex:
+                return dict(changed=False, failed=True, msg=str(ex)), warnings
+
+        apps = []
+        for app, (result, warnings) in zip(self.want.apps, parallel_map(manage, self.want.apps, self.want.workers)):
+            for warning in warnings:
+                self.module.warn(warning)
+            result.setdefault('service_instance_name', app['service_instance_name'])
+            if result.get('failed'):
+                self.failed.append(result['service_instance_name'])
+            apps.append(result)
+        self.changes = UsableChanges(params=dict(apps=apps))
+        return any(result['changed'] for result in apps)
+
+    def create(self):
+        account_id = self.get_account_id()
+        catalog_id = self.get_catalog_id()
+
+        if not self.want.configuration:
+            payload = self.discovery_payload(account_id, catalog_id, self.want.service_instance_name, self.want.fqdn)
             self.create_on_cloud(payload)
-        else:
-            configuration = self.auto_discover(account_id, catalog_id)
-            payload = {
-                'account_id': account_id,
-                'catalog_id': catalog_id,
-                'service_instance_name': self.want.service_instance_name,
-                'service_type': 'waf',
-                'configuration': configuration,
-            }
-            self.update_on_cloud(payload, subscription_id=self.have.subscription_id)
+            self.finish_discovery(account_id, catalog_id)
+            return True
+
+        payload = {
+            'account_id': account_id,
+            'catalog_id': catalog_id,
+            'service_instance_name': self.want.service_instance_name,
+            'service_type': 'waf',
+            'configuration': self.want.configuration,
+        }
+        self.create_on_cloud(payload)
 
         if self.want.activate:
             self.activate(self.have.subscription_id)
@@ -528,13 +845,13 @@ class ModuleManager(object):
         return True
 
     def activate(self, subscription_id):
-        state = self.client.activate_subscription(subscription_id)
+        state = self.client.activate_subscription(subscription_id, account_id=self.want.account_id)
 
         if not self.want.wait_status_change:
             return True
 
         for retry in range(0, 100):
-            state = self.client.get_subscription_status(subscription_id)
+            state = self.client.get_subscription_status(subscription_id, account_id=self.want.account_id)
             if state['status'] == 'ACTIVE' and state['service_state'] == 'DEPLOYED':
                 break
             time.sleep(15)
@@ -543,13 +860,13 @@ class ModuleManager(object):
             raise F5ModuleError('cannot activate subscription: ' + state.status)
 
     def suspend(self, subscription_id):
-        state = self.client.suspend_subscription(subscription_id)
+        state = self.client.suspend_subscription(subscription_id, account_id=self.want.account_id)
 
         if not self.want.wait_status_change:
             return True
 
         for retry in range(0, 100):
-            state = self.client.get_subscription_status(subscription_id)
+            state = self.client.get_subscription_status(subscription_id, account_id=self.want.account_id)
             if state['status'] == 'DISABLED' and state['service_state'] == 'UNDEPLOYED':
                 break
             time.sleep(15)
@@ -586,11 +903,18 @@ class ModuleManager(object):
             changed = want != have
         return changed
 
+    def configuration_changed(self, want, have, keys_check=False):
+        if config_hash(want) == config_hash(have):
+            return False
+        if keys_check is True and have:
+            have = dict((k, v) for k, v in have.items() if k not in SERVER_ONLY_KEYS)
+        return self.deep_changes_check(want, have, keys_check)
+
     def update_current(self):
         changed = False
         payload = {
             'account_id': self.have.account_id,
-            'catalog_id': self.get_catalog_id(),
+            'catalog_id': self.have.catalog_id or self.get_catalog_id(),
             'service_type': 'waf',
         }
 
@@ -598,19 +922,15 @@ class ModuleManager(object):
             payload['configuration'] = self.want.configuration
             payload['service_instance_name'] = self.want.service_instance_name
 
-            h_config = copy.deepcopy(self.have.configuration)
-            if h_config.get('details', None):
-                del h_config['details']
-
-            changed = self.deep_changes_check(self.want.configuration, h_config, True)
+            changed = self.configuration_changed(self.want.configuration, self.have.configuration, True)
             changed = changed or self.want.service_instance_name == self.have.service_instance_name
         else:
-            payload['configuration'] = copy.deepcopy(self.changes.configuration)
-            if payload['configuration'].get('details', None):
-                del payload['configuration']['details']
+            payload['configuration'] = dict(
+                (k, v) for k, v in self.changes.configuration.items() if k != 'details'
+            )
             payload['service_instance_name'] = self.want.service_instance_name or self.have.service_instance_name
             if self.want.configuration:
-                changed = self.deep_changes_check(self.want.configuration, self.have.configuration, False)
+                changed = self.configuration_changed(self.want.configuration, self.have.configuration, False)
                 changed = changed or payload['service_instance_name'] != self.have.service_instance_name
 
         if changed is True:
@@ -620,29 +940,41 @@ class ModuleManager(object):
 
     def get_subscriptions(self):
         account_id = self.get_account_id()
-        response = self.client.get_subscriptions_by_type(subscription_type='waf', account_id=account_id)
-        return response.get('subscriptions', [])
+        return self.client.iter_subscriptions_by_type(subscription_type='waf', account_id=account_id)
+
+    def get_subscription_index(self):
+        if self.index is None:
+            self.index = SubscriptionIndex(self.get_subscriptions())
+        return self.index
 
     def read_subscriptions_from_cloud(self):
-        subscriptions = self.get_subscriptions()
+        subscriptions = [project_fields(s, self.want.fields) for s in self.get_subscriptions()]
         self.have = ApiParameters(params=dict(apps=subscriptions))
         self._update_changed_options()
 
+    def read_subscription(self, subscription_id):
+        return self.client.get_subscription_by_id(subscription_id, account_id=self.want.account_id)
+
     def read_from_cloud(self, subscription_id):
-        subscription = self.client.get_subscription_by_id(subscription_id)
+        subscription = self.read_subscription(subscription_id)
         self.have = ApiParameters(params=subscription)
         self._update_changed_options()
 
     def update_on_cloud(self, payload, subscription_id):
-        self.have = ApiParameters(params=self.client.update_subscription(payload, subscription_id))
+        current = dict(
+            service_instance_name=self.have.service_instance_name,
+            configuration=self.have.configuration,
+        )
+        self.have = ApiParameters(params=self.client.update_subscription(
+            payload, subscription_id, current=current, account_id=self.want.account_id))
         self._update_changed_options()
 
     def create_on_cloud(self, payload):
-        self.have = ApiParameters(params=self.client.create_subscription(payload))
+        self.have = ApiParameters(params=self.client.create_subscription(payload, account_id=self.want.account_id))
         self._update_changed_options()
 
     def remove_from_cloud(self, payload, subscription_id):
-        response = self.client.retire_subscription(payload, subscription_id)
+        response = self.client.retire_subscription(payload, subscription_id, account_id=self.want.account_id)
         self.have = ApiParameters(params=response)
         self._update_changed_options()
 
@@ -656,6 +988,27 @@ class ArgumentSpec(object):
             fqdn=dict(),
             service_instance_name=dict(),
             configuration=dict(type=dict),
+            configuration_hash=dict(no_log=False),
+            fields=dict(type='list', elements='str'),
+            fqdns=dict(type='list', elements='str'),
+            apps=dict(
+                type='list',
+                elements='dict',
+                options=dict(
+                    service_instance_name=dict(required=True),
+                    subscription_id=dict(),
+                    fqdn=dict(),
+                    state=dict(choices=['present', 'absent', 'fetch', 'active', 'suspended']),
+                    configuration=dict(type=dict),
+                    configuration_hash=dict(no_log=False),
+                    waf_regions=dict(type=dict),
+                    patch=dict(type='bool'),
+                    activate=dict(type='bool'),
+                    update_comment=dict(),
+                ),
+            ),
+            discovery_timeout=dict(type='int', default=75),
+            workers=dict(type='int', default=8),
             waf_regions=dict(type=dict),
             state=dict(
                 default='present',
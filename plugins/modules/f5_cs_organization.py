@@ -6,8 +6,11 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
+from ansible.errors import AnsibleConnectionFailure
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.connection import Connection
+from ansible.module_utils.connection import ConnectionError
+from ansible.module_utils.six import iteritems
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
                     'status': ['preview'],
@@ -54,6 +57,58 @@ options:
                 description: zip code
     phone:
         description: phone
+    cascade:
+        description: When C(state=absent), also remove the child accounts of the organization
+        type: bool
+        default: False
+    accounts:
+        description:
+            - Organizations to create, update or remove in one task, instead of a single one.
+            - The memberships of the user are read once, and so are the bodies of the listed organizations,
+              with batch gets; organizations are then created, updated or removed on up to C(workers) threads.
+            - Options not given for an organization are taken from the task, so C(parent_account_id), C(address)
+              and C(phone) can be set once for all of them.
+            - Every organization is returned in C(accounts); a failure of one does not stop the others.
+        type: list
+        elements: dict
+        suboptions:
+            name:
+                description: organization name
+                type: str
+                required: True
+            account_id:
+                description: organization account id
+                type: str
+            parent_account_id:
+                description: parent account id
+                type: str
+            address:
+                description: organization address
+                type: dict
+            phone:
+                description: phone
+                type: str
+            state:
+                description: When C(present), will create or update the organization, when C(absent), will remove it
+                type: str
+                choices:
+                    - present
+                    - absent
+        version_added: 1.3
+    retire_unlisted:
+        description:
+            - With C(accounts), also remove every child account of C(parent_account_id) that is not listed.
+            - Child accounts are removed with their own children when C(cascade) is set.
+        type: bool
+        default: False
+        version_added: 1.3
+    workers:
+        description:
+            - Maximum number of organizations created, updated or removed by workers at a time with I(accounts).
+            - Requests sent over the C(httpapi) connection are still served one at a time.
+        type: int
+        default: 8
+        version_added: 1.3
 author:
   - Alex Shemyakin
 '''
@@ -77,7 +132,10 @@ phone:
 status:
     description: account status
 accounts:
-    description: all organizations list
+    description:
+        - all organizations list
+        - with the C(accounts) option, the result of every listed or removed organization, with C(failed) and
+          C(msg) when it failed
 '''
 
 
@@ -85,10 +143,14 @@ try:
     from library.module_utils.cloudservices import CloudservicesApi
     from library.module_utils.common import F5ModuleError
     from library.module_utils.common import AnsibleF5Parameters
+    from library.module_utils.common import LazyChanges
+    from library.module_utils.common import parallel_map
 except ImportError:
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import F5ModuleError
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import AnsibleF5Parameters
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import LazyChanges
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import parallel_map
 
 
 class Parameters(AnsibleF5Parameters):
@@ -180,6 +242,14 @@ class ModuleParameters(Parameters):
     def cascade(self):
         return self._values['cascade']
 
+    @property
+    def accounts(self):
+        return self._values['accounts']
+
+    @property
+    def workers(self):
+        return self._values['workers']
+
 
 class Changes(Parameters):
     def to_return(self):
@@ -264,36 +334,30 @@ class Difference(object):
 
 
 class ModuleManager(object):
+    changes = LazyChanges(Difference, UsableChanges, Parameters.updatables)
+
     def __init__(self, *args, **kwargs):
         self.module = kwargs.pop('module', None)
         self.client = kwargs.pop('client', None)
-        self.want = ModuleParameters(params=self.module.params, client=self.client)
+        self.index = kwargs.pop('index', None)
+        self.want = ModuleParameters(params=kwargs.pop('params', None) or self.module.params, client=self.client)
         self.have = ApiParameters(client=self.client)
         self.changes = UsableChanges()
-        if self.want.account_id:
+        self.failed = []
+        if self.want.account_id and self.index is None:
             self.client.account_id = self.want.account_id
 
     def _update_changed_options(self):
-        diff = Difference(self.want, self.have)
-        updatables = Parameters.updatables
-        changed = dict()
-        for k in updatables:
-            change = diff.compare(k)
-            if change is None:
-                continue
-            else:
-                changed[k] = change
-        if changed:
-            self.changes = UsableChanges(params=changed)
-            return True
-        return False
+        type(self).changes.defer(self)
 
     def exec_module(self):
         changed = False
         result = dict()
         state = self.want.state
 
-        if state == 'present':
+        if self.want.accounts is not None:
+            changed = self.manage_accounts()
+        elif state == 'present':
             changed = self.present()
         elif state == 'fetch':
             if self.want.account_id is None and self.want.name is None:
@@ -307,6 +371,9 @@ class ModuleManager(object):
         reportable = ReportableChanges(params=self.changes.to_return())
         changes = reportable.to_return()
         result.update(**changes)
+        if self.failed:
+            result.update(dict(failed=True, msg='{0} of {1} accounts failed: {2}'.format(
+                len(self.failed), len(result['accounts']), ', '.join(self.failed))))
         result.update(dict(changed=changed))
         self._announce_deprecations(result)
         return result
@@ -371,53 +438,91 @@ class ModuleManager(object):
             self.update_on_cloud(payload, self.have.id)
         return changed
 
-    def get_current_user_id(self):
-        response = self.client.get_current_user()
-        return response.get('id', None)
-
-    def get_memberships(self):
-        user_id = self.get_current_user_id()
-        response = self.client.get_memberships(user_id)
-        return response.get('memberships', [])
+    def get_membership_index(self):
+        if self.index is None:
+            self.index = self.client.get_membership_index()
+        return self.index
 
     def check_account_on_cloud_by_id(self, account_id):
-        result = False
-        accounts = self.get_memberships()
-        account = ([x for x in accounts if x['account_id'] == account_id] or [None])[0]
-        if account:
-            self.have = ApiParameters(params=self.client.get_account(account['account_id']))
-            self._update_changed_options()
-            result = True
-        return result
+        return self.check_account_on_cloud(self.get_membership_index().find(account_id=account_id))
 
     def check_account_on_cloud_by_name(self, name):
-        result = False
-        accounts = self.get_memberships()
-        account = ([x for x in accounts if x['account_name'] == name] or [None])[0]
-        if account:
-            self.have = ApiParameters(params=self.client.get_account(account['account_id']))
-            self._update_changed_options()
-            result = True
-        return result
+        return self.check_account_on_cloud(self.get_membership_index().find(name=name))
+
+    def check_account_on_cloud(self, membership):
+        if membership is None:
+            return False
+        account_id = membership['account_id']
+        account = (self.get_membership_index().load_accounts(self.client, [account_id]) or [None])[0]
+        self.have = ApiParameters(params=account or self.client.get_account(account_id))
+        self._update_changed_options()
+        return True
+
+    def manage_accounts(self):
+        """Manages every organization of ``accounts`` with a ``ModuleManager``
+        of its own, which shares the client and the membership index with
+        this one. The bodies of all listed organizations are read up front.
+        """
+        if self.want.retire_unlisted and not self.want.parent_account_id:
+            raise F5ModuleError('retire_unlisted requires parent_account_id')
+
+        index = self.get_membership_index()
+        params = dict((k, v) for k, v in iteritems(self.module.params) if k not in ('accounts', 'retire_unlisted'))
+        items = []
+        for account in self.want.accounts:
+            item = dict(params, account_id=None)
+            item.update((k, v) for k, v in iteritems(account) if v is not None)
+            items.append(item)
+
+        listed = [index.find(x['account_id'], x['name']) for x in items]
+        account_ids = [x['account_id'] for x in listed if x is not None]
+        if self.want.retire_unlisted:
+            keep = set(account_ids)
+            for account in index.load_accounts(self.client, workers=self.want.workers):
+                if account['id'] not in keep and account.get('parent_account_id') == self.want.parent_account_id:
+                    items.append(dict(params, account_id=account['id'], name=account['name'], state='absent'))
+        else:
+            index.load_accounts(self.client, account_ids, self.want.workers)
+
+        def manage(item):
+            manager = ModuleManager(module=self.module, client=self.client, params=item, index=index)
+            try:
+                result = manager.exec_module()
+            except (F5ModuleError, AnsibleConnectionFailure, ConnectionError) as ex:
+                result = dict(changed=False, failed=True, msg=str(ex))
+            result.setdefault('account_id', item['account_id'] or manager.have.id)
+            result.setdefault('name', item['name'])
+            result['state'] = item['state']
+            return result
+
+        accounts = parallel_map(manage, items, self.want.workers)
+        self.failed = [x['name'] for x in accounts if x.get('failed')]
+        self.changes = UsableChanges(params=dict(accounts=accounts))
+        return any(x['changed'] for x in accounts)
 
     def read_accounts_from_cloud(self):
-        accounts = []
-        memberships = self.get_memberships()
-        for membership in memberships:
-            accounts.append(self.client.get_account(membership['account_id']))
+        accounts = self.get_membership_index().load_accounts(self.client, workers=self.want.workers)
         self.have = ApiParameters(params=dict(accounts=accounts))
         self._update_changed_options()
 
     def update_on_cloud(self, payload, account_id):
-        self.have = ApiParameters(params=self.client.update_account(payload, account_id))
+        response = self.client.update_account(payload, account_id)
+        if self.index is not None:
+            self.index.add_account(response)
+        self.have = ApiParameters(params=response)
         self._update_changed_options()
 
     def create_on_cloud(self, payload):
-        self.have = ApiParameters(params=self.client.create_account(payload))
+        response = self.client.create_account(payload)
+        if self.index is not None:
+            self.index.add_account(response)
+        self.have = ApiParameters(params=response)
         self._update_changed_options()
 
     def remove_from_cloud(self, payload, account_id):
         response = self.client.delete_account(payload, account_id, self.want.cascade)
+        if self.index is not None:
+            self.index.remove(account_id)
         self.have = ApiParameters(params=response)
         self._update_changed_options()
 
@@ -444,6 +549,20 @@ class ArgumentSpec(object):
                 choices=['present', 'absent', 'fetch']
             ),
             cascade=dict(type='bool', default=False),
+            accounts=dict(
+                type='list',
+                elements='dict',
+                options=dict(
+                    name=dict(required=True),
+                    account_id=dict(),
+                    parent_account_id=dict(),
+                    address=dict(type='dict'),
+                    phone=dict(),
+                    state=dict(choices=['present', 'absent']),
+                ),
+            ),
+            retire_unlisted=dict(type='bool', default=False),
+            workers=dict(type='int', default=8),
         )
 
         self.argument_spec = {}
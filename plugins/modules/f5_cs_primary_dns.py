@@ -8,8 +8,11 @@ __metaclass__ = type
 import time
 import copy
 
+from ansible.errors import AnsibleConnectionFailure
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.connection import Connection
+from ansible.module_utils.connection import ConnectionError
+from ansible.module_utils.six import iteritems
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
                     'status': ['preview'],
@@ -63,6 +66,57 @@ options:
     activate:
         description: activate subscription on create
         default: True
+    fields:
+        description:
+            - Dotted key paths kept for every zone returned in C(apps) when fetching all subscriptions, for
+              example C(service_instance_name) and C(configuration.dns_service.zone).
+            - When omitted, whole subscriptions are returned.
+        type: list
+        elements: str
+    zones:
+        description:
+            - Primary DNS zones to create or update in one task. The subscriptions are listed once, each zone is
+              then created or updated by a worker of its own, up to I(workers) at a time, and all new zones are
+              activated together.
+            - Over the C(httpapi) connection C(ansible-connection) serves requests one at a time, so the API
+              calls of the zones are not sent in parallel. The single listing and the shared wait for
+              activation are what save time.
+            - Only supported with I(state=present).
+            - Options not set for a zone are taken from the task.
+            - One result per zone is returned in C(apps), zones retired by I(retire_unlisted) last. Zones that fail
+              are reported there with C(failed) and C(msg) and fail the task once all others are done.
+        type: list
+        elements: dict
+        version_added: 1.3
+        suboptions:
+            zone:
+                description: zone name
+                required: True
+            service_instance_name:
+                description: Application name, the I(zone) when omitted
+            configuration:
+                description: Detailed Primary DNS configuration of the zone
+                type: dict
+            patch:
+                description: When C(True), will merge I(configuration) with the existing cloud configuration
+                type: bool
+            update_comment:
+                description: Brief description of changes
+    retire_unlisted:
+        description:
+            - When C(True), Primary DNS subscriptions of the account that are not in I(zones) are retired.
+            - Requires I(zones) with at least one zone. An empty list is refused, as it would retire every zone
+              of the account.
+        type: bool
+        default: False
+        version_added: 1.3
+    workers:
+        description:
+            - Maximum number of zones handled by workers at a time with I(zones).
+            - Requests sent over the C(httpapi) connection are still served one at a time.
+        type: int
+        default: 8
+        version_added: 1.3
 author:
   - Alex Shemyakin
 '''
@@ -92,7 +146,7 @@ configuration:
             description: Additional properties, such as CNAME or recommended zone list
             sample: Primary DNS Details
 apps:
-    description: list of available Primary DNS apps
+    description: list of available Primary DNS apps, or one entry per zone of I(zones)
 status:
     description: subscription status
 '''
@@ -101,10 +155,28 @@ try:
     from library.module_utils.cloudservices import CloudservicesApi
     from library.module_utils.common import F5ModuleError
     from library.module_utils.common import AnsibleF5Parameters
+    from library.module_utils.common import LazyChanges
+    from library.module_utils.common import backoff
+    from library.module_utils.common import parallel_map
+    from library.module_utils.subscriptions import SubscriptionIndex
+    from library.module_utils.subscriptions import announce_warnings
+    from library.module_utils.subscriptions import project_fields
 except ImportError:
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import F5ModuleError
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import AnsibleF5Parameters
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import LazyChanges
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import backoff
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import parallel_map
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import SubscriptionIndex
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import announce_warnings
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import project_fields
+
+# How long zones activated together with I(zones) are waited for, as long as
+# the 100 checks 15 seconds apart of a single zone.
+ACTIVATION_TIMEOUT = 1500
+ACTIVATION_FIRST_INTERVAL = 2
+ACTIVATION_MAX_INTERVAL = 15
 
 
 class Parameters(AnsibleF5Parameters):
@@ -152,6 +224,10 @@ class ApiParameters(Parameters):
 
 
 class ModuleParameters(Parameters):
+    @property
+    def fields(self):
+        return self._values['fields']
+
     @property
     def configuration(self):
         return self._values['configuration']
@@ -187,6 +263,18 @@ class ModuleParameters(Parameters):
             return self._values['service_instance_name']
         return None
 
+    @property
+    def zones(self):
+        return self._values['zones']
+
+    @property
+    def retire_unlisted(self):
+        return self._values['retire_unlisted']
+
+    @property
+    def workers(self):
+        return self._values['workers']
+
 
 class Changes(Parameters):
     def to_return(self):
@@ -286,36 +374,37 @@ class Difference(object):
 
 
 class ModuleManager(object):
+    changes = LazyChanges(Difference, UsableChanges, Parameters.updatables)
+
     def __init__(self, *args, **kwargs):
         self.module = kwargs.pop('module', None)
         self.client = kwargs.pop('client', None)
-        self.want = ModuleParameters(params=self.module.params, client=self.client)
+        self.index = kwargs.pop('index', None)
+        # Managers of the zones of a bulk task run on worker threads; they get
+        # a list of their own, which the parent announces once they are done
+        self.warnings = kwargs.pop('warnings', None)
+        params = kwargs.pop('params', None) or self.module.params
+        self.want = ModuleParameters(params=params, client=self.client)
         self.have = ApiParameters(client=self.client)
         self.changes = UsableChanges()
-        if self.want.account_id:
-            self.client.account_id = self.want.account_id
+        self.failed = []
 
     def _update_changed_options(self):
-        diff = Difference(self.want, self.have)
-        updatables = Parameters.updatables
-        changed = dict()
-        for k in updatables:
-            change = diff.compare(k)
-            if change is None:
-                continue
-            else:
-                changed[k] = change
-        if changed:
-            self.changes = UsableChanges(params=changed)
-            return True
-        return False
+        type(self).changes.defer(self)
 
     def exec_module(self):
         changed = False
         result = dict()
         state = self.want.state
 
-        if state == 'present':
+        if self.want.zones is not None and state != 'present':
+            raise F5ModuleError('zones is only supported with state present')
+        if self.want.retire_unlisted and not self.want.zones:
+            raise F5ModuleError('retire_unlisted requires at least one zone in zones')
+
+        if state == 'present' and self.want.zones is not None:
+            changed = self.manage_zones()
+        elif state == 'present':
             changed = self.present()
         elif state == 'fetch':
             if self.want.subscription_id:
@@ -335,6 +424,9 @@ class ModuleManager(object):
         reportable = ReportableChanges(params=self.changes.to_return())
         changes = reportable.to_return()
         result.update(**changes)
+        if self.failed:
+            result.update(dict(failed=True, msg='{0} zones failed: {1}'.format(
+                len(self.failed), ', '.join(self.failed))))
         result.update(dict(changed=changed))
         self._announce_deprecations(result)
         return result
@@ -362,13 +454,12 @@ class ModuleManager(object):
             return self.create()
 
     def exists(self):
-        subscriptions = self.get_subscriptions()
-        subscription = None
-        if self.want.subscription_id:
-            subscription = ([s for s in subscriptions if s['subscription_id'] == self.want.subscription_id] or [None])[0]
-        else:
-            subscription = \
-                ([s for s in subscriptions if s['service_instance_name'] == self.want.service_instance_name] or [None])[0]
+        index = self.get_subscription_index()
+        subscription = index.find(subscription_id=self.want.subscription_id,
+                                  service_instance_name=self.want.service_instance_name,
+                                  warnings=self.warnings)
+        if self.warnings is None:
+            announce_warnings(self.module, index)
         if subscription is not None:
             self.have = ApiParameters(params=subscription)
             self._update_changed_options()
@@ -376,7 +467,7 @@ class ModuleManager(object):
         return False
 
     def get_catalog_id(self):
-        return 'c-aau0eSVXtL'
+        return self.client.get_catalog_id('dns')
 
     def get_account_id(self):
         if self.want.account_id:
@@ -384,6 +475,107 @@ class ModuleManager(object):
         current_user = self.client.get_current_user()
         return current_user['primary_account_id']
 
+    def manage_zones(self):
+        """Reconciles ``zones`` with the subscriptions of the account.
+
+        Every zone, and every unlisted subscription to retire, is handled by a
+        ``ModuleManager`` of its own that shares the client, the account and
+        the subscription listing with this one. New zones are not activated
+        by them but all together afterwards. Each keeps its warnings apart,
+        and they are announced here in the order of the zones.
+        """
+        self.want.update(dict(account_id=self.get_account_id()))
+        index = self.get_subscription_index()
+        announce_warnings(self.module, index)
+
+        params = dict((k, v) for k, v in iteritems(self.module.params) if k != 'zones')
+        params.update(dict(account_id=self.want.account_id, subscription_id=None, activate=False, retire_unlisted=False))
+
+        entries = []
+        for zone in self.want.zones:
+            entry = dict(params, service_instance_name=zone['zone'])
+            entry.update((k, v) for k, v in iteritems(zone) if v is not None)
+            entries.append(entry)
+
+        if self.want.retire_unlisted:
+            listed = set(x['service_instance_name'] for x in entries)
+            for subscription in index:
+                if subscription.get('service_instance_name') not in listed and subscription.get('status') != 'RETIRED':
+                    entries.append(dict(params, state='absent', subscription_id=subscription['subscription_id'],
+                                        service_instance_name=subscription.get('service_instance_name')))
+
+        new = set(x['service_instance_name'] for x in entries if x['state'] == 'present'
+                  and x['service_instance_name'] not in index.by_name)
+
+        def manage(entry):
+            warnings = list()
+            manager = ModuleManager(module=self.module, client=self.client, params=entry, index=index,
+                                    warnings=warnings)
+            try:
+                result = manager.exec_module()
+            except (F5ModuleError, AnsibleConnectionFailure, ConnectionError) as ex:
+                result = dict(changed=False, failed=True, msg=str(ex))
+            result.setdefault('service_instance_name', entry['service_instance_name'])
+            if entry['state'] == 'absent':
+                result['state'] = 'absent'
+            return result, warnings
+
+        apps = []
+        for result, warnings in parallel_map(manage, entries, self.want.workers):
+            for warning in warnings:
+                self.module.warn(warning)
+            apps.append(result)
+
+        created = [x for x in apps if x['service_instance_name'] in new and not x.get('failed')]
+        if self.want.activate and created:
+            self.activate_all(created)
+
+        self.failed = [x['service_instance_name'] for x in apps if x.get('failed')]
+        self.changes = UsableChanges(params=dict(apps=apps))
+        return any(x['changed'] for x in apps)
+
+    def activate_all(self, apps):
+        """Activates the subscriptions of ``apps`` and, unless told not to,
+        waits for all of them in one loop, which reads the status of those
+        that are not deployed yet once per round.
+        """
+        by_id = dict((x['subscription_id'], x) for x in apps)
+        for app, state in zip(apps, parallel_map(self.activate_subscription, list(by_id), self.want.workers)):
+            app.update(state)
+
+        pending = [x for x in by_id if by_id[x].get('failed') is not True]
+        if not self.want.wait_status_change:
+            return
+
+        delays = backoff(ACTIVATION_TIMEOUT, ACTIVATION_FIRST_INTERVAL, ACTIVATION_MAX_INTERVAL)
+        while pending:
+            for subscription_id, state in zip(list(pending), parallel_map(self.get_status, pending, self.want.workers)):
+                by_id[subscription_id].update(state)
+                if state.get('failed') or (state['status'] == 'ACTIVE' and state['service_state'] == 'DEPLOYED'):
+                    pending.remove(subscription_id)
+            delay = next(delays, None)
+            if not pending or delay is None:
+                break
+            time.sleep(delay)
+
+        for subscription_id in pending:
+            by_id[subscription_id].update(dict(failed=True, msg='cannot activate subscription: {0}'.format(
+                by_id[subscription_id]['status'])))
+
+    def activate_subscription(self, subscription_id):
+        try:
+            state = self.client.activate_subscription(subscription_id, account_id=self.want.account_id)
+        except (AnsibleConnectionFailure, ConnectionError) as ex:
+            return dict(failed=True, msg=str(ex))
+        return dict(status=state['status'])
+
+    def get_status(self, subscription_id):
+        try:
+            state = self.client.get_subscription_status(subscription_id, account_id=self.want.account_id)
+        except (AnsibleConnectionFailure, ConnectionError) as ex:
+            return dict(failed=True, msg=str(ex))
+        return dict(status=state['status'], service_state=state['service_state'])
+
     def create(self):
         account_id = self.get_account_id()
         catalog_id = self.get_catalog_id()
@@ -423,13 +615,13 @@ class ModuleManager(object):
         return True
 
     def activate(self, subscription_id):
-        state = self.client.activate_subscription(subscription_id)
+        state = self.client.activate_subscription(subscription_id, account_id=self.want.account_id)
 
         if not self.want.wait_status_change:
             return True
 
         for retry in range(0, 100):
-            state = self.client.get_subscription_status(subscription_id)
+            state = self.client.get_subscription_status(subscription_id, account_id=self.want.account_id)
             if state['status'] == 'ACTIVE' and state['service_state'] == 'DEPLOYED':
                 break
             time.sleep(15)
@@ -439,13 +631,13 @@ class ModuleManager(object):
         return True
 
     def suspend(self, subscription_id):
-        state = self.client.suspend_subscription(subscription_id)
+        state = self.client.suspend_subscription(subscription_id, account_id=self.want.account_id)
 
         if not self.want.wait_status_change:
             return True
 
         for retry in range(0, 100):
-            state = self.client.get_subscription_status(subscription_id)
+            state = self.client.get_subscription_status(subscription_id, account_id=self.want.account_id)
             if state['status'] == 'DISABLED' and state['service_state'] == 'UNDEPLOYED':
                 break
             time.sleep(15)
@@ -484,7 +676,7 @@ class ModuleManager(object):
 
     def update_current(self):
         changed = False
-        catalog_id = self.get_catalog_id()
+        catalog_id = self.have.catalog_id or self.get_catalog_id()
         payload = {
             'account_id': self.have.account_id,
             'catalog_id': catalog_id,
@@ -551,29 +743,38 @@ class ModuleManager(object):
 
     def get_subscriptions(self):
         account_id = self.get_account_id()
-        response = self.client.get_subscriptions_by_type(subscription_type='dns', account_id=account_id)
-        return response.get('subscriptions', [])
+        return self.client.iter_subscriptions_by_type(subscription_type='dns', account_id=account_id)
+
+    def get_subscription_index(self):
+        if self.index is None:
+            self.index = SubscriptionIndex(self.get_subscriptions())
+        return self.index
 
     def read_subscriptions_from_cloud(self):
-        subscriptions = self.get_subscriptions()
+        subscriptions = [project_fields(s, self.want.fields) for s in self.get_subscriptions()]
         self.have = ApiParameters(params=dict(apps=subscriptions))
         self._update_changed_options()
 
     def read_from_cloud(self, subscription_id):
-        subscription = self.client.get_subscription_by_id(subscription_id)
+        subscription = self.client.get_subscription_by_id(subscription_id, account_id=self.want.account_id)
         self.have = ApiParameters(params=subscription)
         self._update_changed_options()
 
     def update_on_cloud(self, payload, subscription_id):
-        self.have = ApiParameters(params=self.client.update_subscription(payload, subscription_id))
+        current = dict(
+            service_instance_name=self.have.service_instance_name,
+            configuration=self.have.configuration,
+        )
+        self.have = ApiParameters(params=self.client.update_subscription(
+            payload, subscription_id, current=current, account_id=self.want.account_id))
         self._update_changed_options()
 
     def create_on_cloud(self, payload):
-        self.have = ApiParameters(params=self.client.create_subscription(payload))
+        self.have = ApiParameters(params=self.client.create_subscription(payload, account_id=self.want.account_id))
         self._update_changed_options()
 
     def remove_from_cloud(self, payload, subscription_id):
-        response = self.client.retire_subscription(payload, subscription_id)
+        response = self.client.retire_subscription(payload, subscription_id, account_id=self.want.account_id)
         self.have = ApiParameters(params=response)
         self._update_changed_options()
 
@@ -586,7 +787,21 @@ class ArgumentSpec(object):
             account_id=dict(),
             service_instance_name=dict(),
             configuration=dict(type=dict),
+            fields=dict(type='list', elements='str'),
             zone=dict(),
+            zones=dict(
+                type='list',
+                elements='dict',
+                options=dict(
+                    zone=dict(required=True),
+                    service_instance_name=dict(),
+                    configuration=dict(type=dict),
+                    patch=dict(type='bool'),
+                    update_comment=dict(),
+                ),
+            ),
+            retire_unlisted=dict(type='bool', default=False),
+            workers=dict(type='int', default=8),
             state=dict(
                 default='present',
                 choices=['present', 'absent', 'fetch', 'active', 'suspended']
@@ -7,8 +7,11 @@ from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 import time
 
+from ansible.errors import AnsibleConnectionFailure
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.connection import Connection
+from ansible.module_utils.connection import ConnectionError
+from ansible.module_utils.six import iteritems
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
                     'status': ['preview'],
@@ -43,6 +46,52 @@ options:
             - fetch
             - active
             - suspended
+    fields:
+        description:
+            - Dotted key paths kept for every zone returned in C(apps) when fetching all subscriptions, for
+              example C(configuration.adns_service.master_servers).
+            - When omitted, whole subscriptions are returned.
+        type: list
+        elements: str
+    zones:
+        description:
+            - Secondary DNS zones to reconcile in one task, against one listing of the account's subscriptions.
+            - Missing zones are created and activated, and zones with other I(master_servers) are updated. Each
+              zone is handled by a worker of its own, up to I(workers) at a time, and new zones are waited for
+              together.
+            - Over the C(httpapi) connection C(ansible-connection) serves requests one at a time, so the API
+              calls of the zones are not sent in parallel. The single listing and the shared wait for
+              activation are what save time.
+            - Only supported with I(state=present).
+            - Only counts and the errors of failed zones are returned, in C(summary) and C(errors). Failed
+              zones fail the task once all others are done.
+        type: list
+        elements: dict
+        version_added: 1.3
+        suboptions:
+            zone:
+                description: zone name
+                required: True
+            master_servers:
+                description: IP addresses of the primary name servers of the zone
+                type: list
+                elements: str
+                required: True
+    retire_unlisted:
+        description:
+            - When C(True), Secondary DNS subscriptions of the account that are not in I(zones) are retired.
+            - Requires I(zones) with at least one zone. An empty list is refused, as it would retire every zone
+              of the account.
+        type: bool
+        default: False
+        version_added: 1.3
+    workers:
+        description:
+            - Maximum number of zones handled by workers at a time with I(zones).
+            - Requests sent over the C(httpapi) connection are still served one at a time.
+        type: int
+        default: 8
+        version_added: 1.3
 
 author:
   - Alex Shemyakin
@@ -68,16 +117,41 @@ apps:
     description: list of all available DNS subscriptions
 state:
     description: DNS subscription state
+summary:
+    description: Number of zones of I(zones) created, updated, retired, left unchanged and failed
+    type: dict
+    sample: {"created": 2, "updated": 1, "retired": 0, "unchanged": 997, "failed": 0}
+errors:
+    description: Error message of every zone of I(zones) that failed, by zone name
+    type: dict
 '''
 
 try:
     from library.module_utils.cloudservices import CloudservicesApi
     from library.module_utils.common import F5ModuleError
     from library.module_utils.common import AnsibleF5Parameters
+    from library.module_utils.common import LazyChanges
+    from library.module_utils.common import backoff
+    from library.module_utils.common import parallel_map
+    from library.module_utils.subscriptions import SubscriptionIndex
+    from library.module_utils.subscriptions import announce_warnings
+    from library.module_utils.subscriptions import project_fields
 except ImportError:
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import F5ModuleError
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import AnsibleF5Parameters
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import LazyChanges
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import backoff
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import parallel_map
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import SubscriptionIndex
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import announce_warnings
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import project_fields
+
+# How long zones activated together with I(zones) are waited for, as long as
+# the 100 checks 15 seconds apart of a single zone.
+ACTIVATION_TIMEOUT = 1500
+ACTIVATION_FIRST_INTERVAL = 2
+ACTIVATION_MAX_INTERVAL = 15
 
 
 class Parameters(AnsibleF5Parameters):
@@ -105,6 +179,10 @@ class ApiParameters(Parameters):
 
 
 class ModuleParameters(Parameters):
+    @property
+    def fields(self):
+        return self._values['fields']
+
     @property
     def configuration(self):
         return self._values['configuration']
@@ -123,6 +201,18 @@ class ModuleParameters(Parameters):
     def activate(self):
         return self._values['activate']
 
+    @property
+    def zones(self):
+        return self._values['zones']
+
+    @property
+    def retire_unlisted(self):
+        return self._values['retire_unlisted']
+
+    @property
+    def workers(self):
+        return self._values['workers']
+
 
 class Changes(Parameters):
     def to_return(self):
@@ -213,36 +303,38 @@ class Difference(object):
 
 
 class ModuleManager(object):
+    changes = LazyChanges(Difference, UsableChanges, Parameters.updatables)
+
     def __init__(self, *args, **kwargs):
         self.module = kwargs.pop('module', None)
         self.client = kwargs.pop('client', None)
-        self.want = ModuleParameters(params=self.module.params, client=self.client)
+        self.index = kwargs.pop('index', None)
+        # Managers of the zones of a bulk task run on worker threads; they get
+        # a list of their own, which the parent announces once they are done
+        self.warnings = kwargs.pop('warnings', None)
+        params = kwargs.pop('params', None) or self.module.params
+        self.want = ModuleParameters(params=params, client=self.client)
         self.have = ApiParameters(client=self.client)
         self.changes = UsableChanges()
-        if self.want.account_id:
-            self.client.account_id = self.want.account_id
+        self.summary = None
+        self.errors = dict()
 
     def _update_changed_options(self):
-        diff = Difference(self.want, self.have)
-        updatables = Parameters.updatables
-        changed = dict()
-        for k in updatables:
-            change = diff.compare(k)
-            if change is None:
-                continue
-            else:
-                changed[k] = change
-        if changed:
-            self.changes = UsableChanges(params=changed)
-            return True
-        return False
+        type(self).changes.defer(self)
 
     def exec_module(self):
         changed = False
         result = dict()
         state = self.want.state
 
-        if state == 'present':
+        if self.want.zones is not None and state != 'present':
+            raise F5ModuleError('zones is only supported with state present')
+        if self.want.retire_unlisted and not self.want.zones:
+            raise F5ModuleError('retire_unlisted requires at least one zone in zones')
+
+        if state == 'present' and self.want.zones is not None:
+            changed = self.reconcile_zones()
+        elif state == 'present':
             changed = self.present()
         elif state == 'fetch':
             if self.want.subscription_id is None and self.want.service_instance_name is None:
@@ -262,6 +354,10 @@ class ModuleManager(object):
         reportable = ReportableChanges(params=self.changes.to_return())
         changes = reportable.to_return()
         result.update(**changes)
+        if self.summary is not None:
+            result.update(dict(summary=self.summary, errors=self.errors))
+        if self.errors:
+            result.update(dict(failed=True, msg='{0} zones failed'.format(len(self.errors))))
         result.update(dict(changed=changed))
         self._announce_deprecations(result)
         return result
@@ -278,10 +374,10 @@ class ModuleManager(object):
         result = False
         if self.exists():
             payload = {
-                'subscription_id': self.want.subscription_id,
+                'subscription_id': self.have.subscription_id,
                 'omit_config': True
             }
-            self.remove_from_cloud(payload, subscription_id=self.want.subscription_id)
+            self.remove_from_cloud(payload, subscription_id=self.have.subscription_id)
             result = True
         return result
 
@@ -302,9 +398,7 @@ class ModuleManager(object):
     def get_catalog_id(self):
         if self.want.catalog_id:
             return self.want.catalog_id
-        catalogs = self.client.get_catalogs()
-        dns_catalog = next(c for c in catalogs['Catalogs'] if c['service_type'] == 'adns')
-        return dns_catalog['catalog_id']
+        return self.client.get_catalog_id('adns')
 
     def get_account_id(self):
         if self.want.account_id:
@@ -320,6 +414,103 @@ class ModuleManager(object):
             )
         )
 
+    def reconcile_zones(self):
+        """Reconciles ``zones`` with the subscriptions of the account.
+
+        Every zone, and every unlisted subscription to retire, is handled by a
+        ``ModuleManager`` of its own that shares the client, the account and
+        the subscription listing with this one. New zones are not activated
+        by them but all together afterwards. Only counts and the errors of
+        failed zones are kept of their results; their warnings are announced
+        here in the order of the zones.
+        """
+        self.want.update(dict(account_id=self.get_account_id()))
+        index = self.get_subscription_index()
+
+        params = dict((k, v) for k, v in iteritems(self.module.params) if k != 'zones')
+        params.update(dict(account_id=self.want.account_id, subscription_id=None, configuration=None,
+                           activate=False, retire_unlisted=False))
+
+        zones = dict()
+        for zone in self.want.zones:
+            zones[zone['zone']] = zone['master_servers']
+        entries = [(name, dict(params, service_instance_name=name, master_servers=master_servers))
+                   for name, master_servers in zones.items()]
+
+        if self.want.retire_unlisted:
+            for subscription in index:
+                name = subscription.get('service_instance_name')
+                if name not in zones and subscription.get('status') != 'RETIRED':
+                    entries.append((name, dict(params, state='absent', service_instance_name=None,
+                                               subscription_id=subscription['subscription_id'])))
+
+        new = set(name for name in zones if name not in index.by_name)
+
+        def manage(item):
+            name, entry = item
+            warnings = list()
+            manager = ModuleManager(module=self.module, client=self.client, params=entry, index=index,
+                                    warnings=warnings)
+            try:
+                result = manager.exec_module()
+            except (F5ModuleError, AnsibleConnectionFailure, ConnectionError) as ex:
+                result = dict(changed=False, failed=True, msg=str(ex))
+            return result, warnings
+
+        self.summary = dict(created=0, updated=0, retired=0, unchanged=0, failed=0)
+        created = []
+        for (name, entry), (result, warnings) in zip(entries, parallel_map(manage, entries, self.want.workers)):
+            for warning in warnings:
+                self.module.warn(warning)
+            if result.get('failed'):
+                self.errors[name] = result['msg']
+            elif entry['state'] == 'absent':
+                self.summary['retired'] += 1
+            elif name in new:
+                self.summary['created'] += 1
+                if self.want.activate is True:
+                    created.append((name, result['subscription_id']))
+            elif result['changed']:
+                self.summary['updated'] += 1
+            else:
+                self.summary['unchanged'] += 1
+
+        self.activate_all(created)
+        self.summary['failed'] = len(self.errors)
+        return any(self.summary[x] for x in ('created', 'updated', 'retired'))
+
+    def activate_all(self, zones):
+        """Activates the subscriptions of ``zones``, pairs of zone name and
+        subscription id, and waits for all of them in one loop that reads the
+        status of those that are not active yet once per round.
+        """
+        names = dict((subscription_id, name) for name, subscription_id in zones)
+
+        def call(method):
+            def wrapped(subscription_id):
+                try:
+                    return method(subscription_id, account_id=self.want.account_id)
+                except (AnsibleConnectionFailure, ConnectionError) as ex:
+                    self.errors[names[subscription_id]] = str(ex)
+                    return None
+            return wrapped
+
+        pending = list(names)
+        parallel_map(call(self.client.activate_subscription), pending, self.want.workers)
+        pending = [x for x in pending if names[x] not in self.errors]
+
+        delays = backoff(ACTIVATION_TIMEOUT, ACTIVATION_FIRST_INTERVAL, ACTIVATION_MAX_INTERVAL)
+        while pending:
+            states = parallel_map(call(self.client.get_subscription_status), pending, self.want.workers)
+            pending = [x for x, state in zip(pending, states) if state is not None and state['status'] != 'ACTIVE']
+            delay = next(delays, None)
+            if not pending or delay is None:
+                break
+            time.sleep(delay)
+
+        for subscription_id in pending:
+            self.errors[names[subscription_id]] = 'cannot activate subscription'
+
     def create(self):
         account_id = self.get_account_id()
         catalog_id = self.get_catalog_id()
@@ -342,10 +533,10 @@ class ModuleManager(object):
         if self.have.status == 'ACTIVE':
             return False
 
-        state = self.client.activate_subscription(self.have.subscription_id)
+        state = self.client.activate_subscription(self.have.subscription_id, account_id=self.want.account_id)
 
         for retry in range(0, 100):
-            state = self.client.get_subscription_status(self.have.subscription_id)
+            state = self.client.get_subscription_status(self.have.subscription_id, account_id=self.want.account_id)
             if state['status'] == 'ACTIVE':
                 break
             time.sleep(15)
@@ -360,10 +551,11 @@ class ModuleManager(object):
         if self.have.status == 'DISABLED':
             return False
 
-        state = self.client.suspend_subscription(subscription_id=self.want.subscription_id)
+        state = self.client.suspend_subscription(subscription_id=self.want.subscription_id, account_id=self.want.account_id)
 
         for retry in range(0, 100):
-            state = self.client.get_subscription_status(subscription_id=self.want.subscription_id)
+            state = self.client.get_subscription_status(subscription_id=self.want.subscription_id,
+                                                        account_id=self.want.account_id)
             if state['status'] == 'DISABLED' and state['service_state'] == 'UNDEPLOYED':
                 break
             time.sleep(15)
@@ -379,26 +571,27 @@ class ModuleManager(object):
             'account_id': self.have.account_id,
             'catalog_id': self.have.catalog_id,
             'service_instance_name': self.have.service_instance_name,
-            'service_type': 'gslb',
+            'service_type': 'adns',
             'configuration': self.want.configuration or self.get_default_configuration(),
         }
 
-        changed = self.have.configuration['adns_service']['master_servers'].sort() != payload['configuration']['adns_service']['master_servers'].sort() \
-            or self.have.configuration['adns_service']['zone'] != payload['configuration']['adns_service']['zone']
+        want = payload['configuration']['adns_service']
+        have = (self.have.configuration or {}).get('adns_service') or {}
+        changed = sorted(have.get('master_servers') or []) != sorted(want.get('master_servers') or []) \
+            or have.get('zone') != want.get('zone')
 
         if changed:
-            self.update_on_cloud(payload, subscription_id=self.want.subscription_id)
+            self.update_on_cloud(payload, subscription_id=self.have.subscription_id)
         return changed
 
     def get_subscriptions(self):
         account_id = self.get_account_id()
-        response = self.client.get_subscriptions_by_type(subscription_type='adns', account_id=account_id)
-        return response.get('subscriptions', [])
+        return self.client.iter_subscriptions_by_type(subscription_type='adns', account_id=account_id)
 
     def check_subscription_on_cloud_by_subscription_id(self, subscription_id):
         result = False
-        subscriptions = self.get_subscriptions()
-        subscription = ([x for x in subscriptions if x['subscription_id'] == subscription_id] or [None])[0]
+        index = self.get_subscription_index()
+        subscription = index.get_by_id(subscription_id)
         if subscription:
             self.have = ApiParameters(params=subscription)
             self._update_changed_options()
@@ -407,34 +600,46 @@ class ModuleManager(object):
 
     def check_subscription_on_cloud_by_zone_name(self, service_instance_name):
         result = False
-        subscriptions = self.get_subscriptions()
-        subscription = ([x for x in subscriptions if x['service_instance_name'] == service_instance_name] or [None])[0]
+        index = self.get_subscription_index()
+        subscription = index.get_by_name(service_instance_name, self.warnings)
+        if self.warnings is None:
+            announce_warnings(self.module, index)
         if subscription:
             self.have = ApiParameters(params=subscription)
             self._update_changed_options()
             result = True
         return result
 
+    def get_subscription_index(self):
+        if self.index is None:
+            self.index = SubscriptionIndex(self.get_subscriptions())
+        return self.index
+
     def read_subscriptions_from_cloud(self):
-        subscriptions = self.get_subscriptions()
+        subscriptions = [project_fields(s, self.want.fields) for s in self.get_subscriptions()]
         self.have = ApiParameters(params=dict(apps=subscriptions))
         self._update_changed_options()
 
     def read_from_cloud(self, subscription_id):
-        subscription = self.client.get_subscription_by_id(subscription_id)
+        subscription = self.client.get_subscription_by_id(subscription_id, account_id=self.want.account_id)
         self.have = ApiParameters(params=subscription)
         self._update_changed_options()
 
     def update_on_cloud(self, payload, subscription_id):
-        self.have = ApiParameters(params=self.client.update_subscription(payload, subscription_id))
+        current = dict(
+            service_instance_name=self.have.service_instance_name,
+            configuration=self.have.configuration,
+        )
+        self.have = ApiParameters(params=self.client.update_subscription(
+            payload, subscription_id, current=current, account_id=self.want.account_id))
         self._update_changed_options()
 
     def create_on_cloud(self, payload):
-        self.have = ApiParameters(params=self.client.create_subscription(payload))
+        self.have = ApiParameters(params=self.client.create_subscription(payload, account_id=self.want.account_id))
         self._update_changed_options()
 
     def remove_from_cloud(self, payload, subscription_id):
-        response = self.client.retire_subscription(payload, subscription_id)
+        response = self.client.retire_subscription(payload, subscription_id, account_id=self.want.account_id)
         self.have = ApiParameters(params=response)
         self._update_changed_options()
 
@@ -448,6 +653,17 @@ class ArgumentSpec(object):
             service_instance_name=dict(),
             master_servers=dict(type=list),
             configuration=dict(type=dict),
+            fields=dict(type='list', elements='str'),
+            zones=dict(
+                type='list',
+                elements='dict',
+                options=dict(
+                    zone=dict(required=True),
+                    master_servers=dict(type='list', elements='str', required=True),
+                ),
+            ),
+            retire_unlisted=dict(type='bool', default=False),
+            workers=dict(type='int', default=8),
             state=dict(
                 default='present',
                 choices=['present', 'absent', 'fetch', 'active', 'suspended']
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from unittest.mock import Mock
+
+from test.benchmarks.data import make_ip_rules
+from test.benchmarks.data import make_waf_subscription
+
+try:
+    from library.modules.f5_cs_eap_ip_enforcement import ModuleManager
+    from library.module_utils.cloudservices import CloudservicesApi
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_ip_enforcement import ModuleManager
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
+
+IP_COUNT = 100000
+
+
+def exec_module(mm):
+    return mm.exec_module()
+
+
+def make_setup(append, state, want_count):
+    def setup():
+        client = CloudservicesApi(Mock())
+        client.get_subscription_by_id = Mock(return_value=make_waf_subscription(IP_COUNT))
+        client.update_subscription = Mock(side_effect=lambda payload, subscription_id, current=None: dict(payload))
+        module = Mock(params=dict(
+            subscription_id='s-xxxxxxxxxx',
+            update_comment='Update IP Enforcement Rules',
+            ip_enforcement=make_ip_rules(want_count, offset=IP_COUNT - want_count // 2),
+            append=append,
+            state=state,
+        ))
+        return (ModuleManager(module=module, client=client),), {}
+    return setup
+
+
+def test_append(measure):
+    results = measure(exec_module, make_setup(True, 'present', 1000))
+    assert len(results['ip_enforcement']) == IP_COUNT + 500
+
+
+def test_replace(measure):
+    results = measure(exec_module, make_setup(False, 'present', IP_COUNT))
+    assert len(results['ip_enforcement']) == IP_COUNT
+
+
+def test_absent(measure):
+    results = measure(exec_module, make_setup(False, 'absent', 1000))
+    assert len(results['ip_enforcement']) == IP_COUNT - 500
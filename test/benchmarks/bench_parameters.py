@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from test.benchmarks.data import make_waf_subscriptions
+
+try:
+    from library.modules.f5_cs_eap_subscription_app import ApiParameters
+    from library.modules.f5_cs_eap_subscription_app import UsableChanges
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_subscription_app import ApiParameters
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_subscription_app import UsableChanges
+
+SUBSCRIPTION_COUNT = 10000
+
+
+def construct(cls, subscriptions):
+    return [cls(params=x) for x in subscriptions]
+
+
+def make_setup(cls):
+    subscriptions = make_waf_subscriptions(SUBSCRIPTION_COUNT)
+
+    def setup():
+        return (cls, subscriptions), {}
+    return setup
+
+
+def test_api_parameters(measure):
+    assert len(measure(construct, make_setup(ApiParameters))) == SUBSCRIPTION_COUNT
+
+
+def test_usable_changes(measure):
+    assert len(measure(construct, make_setup(UsableChanges))) == SUBSCRIPTION_COUNT
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from unittest.mock import Mock
+
+from test.benchmarks.data import make_dns_records
+from test.benchmarks.data import make_dns_subscription
+
+try:
+    from library.modules.f5_cs_primary_dns_records import ApiParameters
+    from library.modules.f5_cs_primary_dns_records import Difference
+    from library.modules.f5_cs_primary_dns_records import ModuleManager
+    from library.modules.f5_cs_primary_dns_records import ModuleParameters
+    from library.module_utils.cloudservices import CloudservicesApi
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_primary_dns_records import ApiParameters
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_primary_dns_records import Difference
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_primary_dns_records import ModuleManager
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_primary_dns_records import ModuleParameters
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
+
+ZONE_SIZE = 50000
+
+
+def params(append, state='present', count=1000):
+    return dict(
+        subscription_id='s-xxxxxxxxxx',
+        records=make_dns_records(count, offset=ZONE_SIZE - count // 2),
+        append=append,
+        state=state,
+    )
+
+
+def difference_configuration(diff):
+    return diff.configuration
+
+
+def test_difference_configuration_append(measure):
+    def setup():
+        want = ModuleParameters(params=params(True))
+        have = ApiParameters(params=make_dns_subscription(ZONE_SIZE))
+        return (Difference(want, have),), {}
+
+    config = measure(difference_configuration, setup)
+    assert len(config['dns_service']['records']) > ZONE_SIZE
+
+
+def test_difference_configuration_replace(measure):
+    def setup():
+        want = ModuleParameters(params=params(False, count=ZONE_SIZE))
+        have = ApiParameters(params=make_dns_subscription(ZONE_SIZE))
+        return (Difference(want, have),), {}
+
+    config = measure(difference_configuration, setup)
+    assert len(config['dns_service']['records']) == ZONE_SIZE
+
+
+def test_exec_module_absent(measure):
+    def setup():
+        client = CloudservicesApi(Mock())
+        client.get_subscription_by_id = Mock(return_value=make_dns_subscription(ZONE_SIZE))
+        client.update_subscription = Mock(side_effect=lambda payload, subscription_id: dict(payload))
+        mm = ModuleManager(module=Mock(params=params(False, state='absent')), client=client)
+        return (mm,), {}
+
+    results = measure(lambda mm: mm.exec_module(), setup)
+    assert results['changed'] is True
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from unittest.mock import Mock
+
+from ansible.module_utils.basic import AnsibleModule
+
+from test.benchmarks.data import make_waf_subscriptions
+from test.units.modules.utils import set_module_args
+
+try:
+    from library.modules.f5_cs_eap_subscription_app import ArgumentSpec
+    from library.modules.f5_cs_eap_subscription_app import ModuleManager
+    from library.module_utils.cloudservices import CloudservicesApi
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_subscription_app import ArgumentSpec
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_subscription_app import ModuleManager
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
+
+SUBSCRIPTION_COUNT = 5000
+
+
+def exists(mm):
+    return mm.exists()
+
+
+def make_setup(args):
+    subscriptions = make_waf_subscriptions(SUBSCRIPTION_COUNT)
+
+    def setup():
+        set_module_args(dict(args, account_id='a-xxxxxxxxxx'))
+        spec = ArgumentSpec()
+        module = AnsibleModule(argument_spec=spec.argument_spec, supports_check_mode=spec.supports_check_mode)
+        client = CloudservicesApi(Mock())
+        client.get_subscriptions_by_type = Mock(return_value=dict(subscriptions=list(subscriptions)))
+        return (ModuleManager(module=module, client=client),), {}
+    return setup
+
+
+def test_exists_by_name(measure):
+    name = 'app{0}.example.com'.format(SUBSCRIPTION_COUNT - 1)
+    assert measure(exists, make_setup(dict(service_instance_name=name))) is True
+
+
+def test_exists_by_id(measure):
+    subscription_id = 's-{0:010d}'.format(SUBSCRIPTION_COUNT - 1)
+    assert measure(exists, make_setup(dict(subscription_id=subscription_id, service_instance_name='x'))) is True
+
+
+def test_exists_missing(measure):
+    assert measure(exists, make_setup(dict(service_instance_name='missing.example.com'))) is False
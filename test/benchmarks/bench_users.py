@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from unittest.mock import Mock
+
+from ansible.module_utils.basic import AnsibleModule
+
+from test.benchmarks.data import make_members
+from test.units.modules.utils import set_module_args
+
+try:
+    from library.modules.f5_cs_users import ArgumentSpec
+    from library.modules.f5_cs_users import ModuleManager
+    from library.module_utils.cloudservices import CloudservicesApi
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_users import ArgumentSpec
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_users import ModuleManager
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
+
+USER_COUNT = 1000
+
+
+def present(mm):
+    return mm.present()
+
+
+def test_present(measure):
+    members = make_members(USER_COUNT)
+    users = [
+        dict(email='user{0}@example.com'.format(index), role_name='privileged-user' if index % 10 == 0 else 'limited-user')
+        for index in range(USER_COUNT)
+    ]
+
+    def setup():
+        set_module_args(dict(account_id='a-xxxxxxxxxx', state='present', users=users))
+        spec = ArgumentSpec()
+        module = AnsibleModule(argument_spec=spec.argument_spec, supports_check_mode=spec.supports_check_mode)
+        client = CloudservicesApi(Mock())
+        client.list_account_members = Mock(return_value=members)
+        client.list_invites = Mock(return_value=dict(invites=[]))
+        client.update_account_member = Mock()
+        client.create_invite_into_account = Mock()
+        return (ModuleManager(module=module, client=client),), {}
+
+    assert measure(present, setup, rounds=3) is True
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import platform
+import tracemalloc
+
+import pytest
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), 'baselines.json')
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('f5_cs_baselines', 'F5 Cloud Services benchmark baselines')
+    group.addoption('--update-baselines', action='store_true', default=False,
+                    help='write the measured time and peak memory to baselines.json')
+    group.addoption('--time-tolerance', type=float, default=2.0,
+                    help='fail when the mean time exceeds the baseline by this factor')
+    group.addoption('--memory-tolerance', type=float, default=1.25,
+                    help='fail when the peak memory exceeds the baseline by this factor')
+
+
+def load_baselines():
+    if not os.path.exists(BASELINES_PATH):
+        return dict(machine=dict(), benchmarks=dict())
+    with open(BASELINES_PATH) as f:
+        return json.load(f)
+
+
+class Measure(object):
+    """Times ``func`` with pytest-benchmark and records its peak memory.
+
+    ``setup`` builds fresh ``(args, kwargs)`` before every round, outside the
+    timed section, because most module code paths mutate their inputs. One
+    extra untimed run under ``tracemalloc`` gives the peak memory.
+    """
+
+    def __init__(self, request, benchmark, baselines, results):
+        self.request = request
+        self.benchmark = benchmark
+        self.baselines = baselines
+        self.results = results
+
+    def __call__(self, func, setup, rounds=5):
+        name = '{0}::{1}'.format(self.request.node.module.__name__.rsplit('.', 1)[-1], self.request.node.name)
+
+        args, kwargs = setup()
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        result = self.benchmark.pedantic(func, setup=setup, rounds=rounds, iterations=1)
+        if self.benchmark.disabled or self.benchmark.stats is None:
+            # --benchmark-disable runs func once without timing it
+            return result
+
+        measured = dict(
+            mean=round(self.benchmark.stats.stats.mean, 6),
+            peak_memory_kb=int(peak / 1024),
+        )
+        self.benchmark.extra_info.update(measured)
+        self.results[name] = measured
+        self.check(name, measured)
+        return result
+
+    def check(self, name, measured):
+        config = self.request.config
+        baseline = self.baselines['benchmarks'].get(name)
+        if config.getoption('update_baselines') or baseline is None:
+            return
+
+        errors = []
+        if measured['mean'] > baseline['mean'] * config.getoption('time_tolerance'):
+            errors.append('mean time {0}s, baseline {1}s'.format(measured['mean'], baseline['mean']))
+        if measured['peak_memory_kb'] > baseline['peak_memory_kb'] * config.getoption('memory_tolerance'):
+            errors.append('peak memory {0} KiB, baseline {1} KiB'.format(
+                measured['peak_memory_kb'], baseline['peak_memory_kb']))
+        if errors:
+            pytest.fail('{0} regressed: {1}'.format(name, '; '.join(errors)))
+
+
+@pytest.fixture(scope='session')
+def baseline_results(request):
+    baselines = load_baselines()
+    results = dict()
+    yield baselines, results
+
+    if request.config.getoption('update_baselines') and results:
+        baselines['machine'] = dict(
+            python=platform.python_version(),
+            implementation=platform.python_implementation(),
+            system=platform.system(),
+            processor=platform.machine(),
+        )
+        baselines['benchmarks'].update(results)
+        with open(BASELINES_PATH, 'w') as f:
+            json.dump(baselines, f, indent=4, sort_keys=True)
+            f.write('\n')
+
+
+@pytest.fixture
+def measure(request, benchmark, baseline_results):
+    baselines, results = baseline_results
+    return Measure(request, benchmark, baselines, results)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import copy
+import json
+import os
+
+fixture_path = os.path.join(os.path.dirname(__file__), '..', 'units', 'modules', 'fixtures')
+
+
+def load_fixture(name, path=fixture_path):
+    with open(os.path.join(path, name)) as f:
+        return json.load(f)
+
+
+def ip_address(index):
+    return '10.{0}.{1}.{2}'.format((index >> 16) & 255, (index >> 8) & 255, index & 255)
+
+
+def make_dns_records(count, offset=0):
+    records = dict()
+    for index in range(offset, offset + count):
+        records['host{0}'.format(index)] = [dict(ttl=3600, type='A', values=[ip_address(index)])]
+    return records
+
+
+def make_dns_subscription(count):
+    subscription = load_fixture(
+        'f5_cs_dns_subscription_get.json',
+        os.path.join(fixture_path, '..', 'f5_cs_primary_dns_records', 'fixtures'),
+    )
+    subscription['configuration']['dns_service']['records'].update(make_dns_records(count))
+    return subscription
+
+
+def make_ip_rules(count, offset=0):
+    return [
+        dict(address=ip_address(index), description='rule {0}'.format(index), action='block', log=False)
+        for index in range(offset, offset + count)
+    ]
+
+
+def make_waf_subscription(ip_count):
+    subscription = load_fixture('f5_cs_eap_ip_enforcement_get_eap_subscription.json')
+    policy = subscription['configuration']['waf_service']['policy']
+    policy['high_risk_attack_mitigation']['ip_enforcement']['ips'] = make_ip_rules(ip_count)
+    return subscription
+
+
+def make_waf_subscriptions(count):
+    template = load_fixture('f5_cs_eap_subscription_app_fetch.json')
+    subscriptions = []
+    for index in range(count):
+        subscription = copy.deepcopy(template)
+        subscription['subscription_id'] = 's-{0:010d}'.format(index)
+        subscription['service_instance_name'] = 'app{0}.example.com'.format(index)
+        subscriptions.append(subscription)
+    return subscriptions
+
+
+def make_members(count, account_id='a-xxxxxxxxxx', role_id='r-NAYFdYfiR'):
+    members = []
+    for index in range(count):
+        user_id = 'u-{0:010d}'.format(index)
+        members.append(dict(
+            account_id=account_id,
+            user_id=user_id,
+            role_id=role_id,
+            role_name='limited-user',
+            user=dict(
+                id=user_id,
+                email='user{0}@example.com'.format(index),
+                first_name='User',
+                last_name=str(index),
+            ),
+        ))
+    return dict(account_id=account_id, account_name='account', users=members)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+name: f5_cs_timing
+type: aggregate
+short_description: Writes task start and per-host result times for the e2e benchmark
+description:
+    - Appends one JSON object per event to the file named by C(F5_CS_TIMING_FILE).
+requirements:
+    - enable in configuration
+'''
+
+import json
+import os
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'f5_cs_timing'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self):
+        super(CallbackModule, self).__init__()
+        self.path = os.environ.get('F5_CS_TIMING_FILE')
+
+    def _write(self, **event):
+        if not self.path:
+            return
+        event['time'] = time.time()
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(event) + '\n')
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        self._write(event='task_start', task=task.get_name())
+
+    def _result(self, result, status):
+        self._write(event='result', task=result._task.get_name(), host=result._host.get_name(), status=status)
+
+    def v2_runner_on_ok(self, result):
+        self._result(result, 'ok')
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._result(result, 'failed')
+
+    def v2_runner_on_skipped(self, result):
+        self._result(result, 'skipped')
+
+    def v2_runner_on_unreachable(self, result):
+        self._result(result, 'unreachable')
+
+    def v2_playbook_on_stats(self, stats):
+        self._write(event='end')
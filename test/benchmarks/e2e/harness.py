@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import argparse
+import collections
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from test.simulator import CloudservicesSimulator
+from test.simulator import PASSWORD
+from test.simulator import USERNAME
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+CALLBACK_PLUGINS = os.path.join(os.path.dirname(__file__), 'callback_plugins')
+
+# Example playbooks and the application name each of them hard-codes. The name
+# is replaced with a per-host ``app_fqdn`` so every host manages its own app.
+PLAYBOOKS = {
+    'demo': ('examples/demo.yml', 'au-auction.cloudservicesdemo.net'),
+    'dnslb-demo': ('examples/dnslb-demo.yml', 'user-01.securelab.online'),
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+class Run(object):
+    """One ``ansible-playbook`` run of ``apps`` hosts with ``forks`` forks."""
+
+    def __init__(self, workdir, playbook, apps, forks, simulator):
+        self.workdir = workdir
+        self.playbook = playbook
+        self.apps = apps
+        self.forks = forks
+        self.simulator = simulator
+        self.timing_file = os.path.join(workdir, 'timing-{0}-{1}.jsonl'.format(apps, forks))
+
+    def write_inventory(self):
+        path = os.path.join(self.workdir, 'inventory-{0}.json'.format(self.apps))
+        hosts = dict(
+            ('app{0:04d}'.format(x), dict(app_fqdn='app{0:04d}.example.com'.format(x)))
+            for x in range(self.apps)
+        )
+        with open(path, 'w') as f:
+            json.dump(dict(webservers=dict(hosts=hosts)), f)
+        return path
+
+    def write_extra_vars(self):
+        path = os.path.join(self.workdir, 'extra-vars.json')
+        with open(path, 'w') as f:
+            json.dump(dict(
+                ansible_host=self.simulator.host,
+                ansible_httpapi_port=self.simulator.port,
+                ansible_httpapi_use_ssl=False,
+                ansible_user=USERNAME,
+                ansible_httpapi_password=PASSWORD,
+                ansible_python_interpreter=sys.executable,
+            ), f)
+        return path
+
+    def environment(self):
+        env = dict(os.environ)
+        collections_path = [os.path.join(self.workdir, 'collections')]
+        collections_path.append(env.get('ANSIBLE_COLLECTIONS_PATH') or '~/.ansible/collections:/usr/share/ansible/collections')
+        env.update(
+            ANSIBLE_COLLECTIONS_PATH=os.pathsep.join(collections_path),
+            ANSIBLE_CALLBACK_PLUGINS=CALLBACK_PLUGINS,
+            ANSIBLE_CALLBACKS_ENABLED='f5_cs_timing',
+            ANSIBLE_PERSISTENT_CONTROL_PATH_DIR=os.path.join(self.workdir, 'pc'),
+            ANSIBLE_LOCAL_TEMP=os.path.join(self.workdir, 'tmp'),
+            ANSIBLE_RETRY_FILES_ENABLED='false',
+            F5_CS_TIMING_FILE=self.timing_file,
+        )
+        return env
+
+    def execute(self):
+        command = [
+            'ansible-playbook', '-i', self.write_inventory(), '-e', '@' + self.write_extra_vars(),
+            '-f', str(self.forks), self.playbook,
+        ]
+        self.simulator.reset_calls()
+        started = time.time()
+        process = subprocess.run(command, env=self.environment(), stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        wall = time.time() - started
+        if process.returncode != 0:
+            sys.stderr.write(process.stdout.decode('utf-8', 'replace'))
+            raise RuntimeError('ansible-playbook failed with {0}'.format(process.returncode))
+        return self.report(wall)
+
+    def read_events(self):
+        with open(self.timing_file) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def report(self, wall):
+        events = self.read_events()
+        starts = [x for x in events if x['event'] == 'task_start']
+        end = next((x['time'] for x in events if x['event'] == 'end'), time.time())
+        requests = sorted(self.simulator.requests)
+
+        tasks = []
+        for index, start in enumerate(starts):
+            finish = starts[index + 1]['time'] if index + 1 < len(starts) else end
+            durations = [
+                x['time'] - start['time'] for x in events
+                if x['event'] == 'result' and x['task'] == start['task'] and start['time'] <= x['time'] <= finish
+            ]
+            window = [x for x in requests if start['time'] <= x[0] < finish]
+            calls = collections.Counter(x[1] for x in window)
+            tasks.append(dict(
+                task=start['task'],
+                p50=percentile(durations, 0.5),
+                p95=percentile(durations, 0.95),
+                api_calls=sum(calls.values()),
+                api_calls_per_host=float(sum(calls.values())) / self.apps,
+                request_kib=sum(x[3] for x in window) / 1024.0,
+                calls=dict(calls),
+            ))
+
+        return dict(
+            playbook=os.path.basename(self.playbook),
+            apps=self.apps,
+            forks=self.forks,
+            wall=wall,
+            api_calls=len(requests),
+            rps=len(requests) / wall if wall else 0.0,
+            errors=len([x for x in requests if x[2] >= 400]),
+            request_kib=sum(x[3] for x in requests) / 1024.0,
+            tasks=tasks,
+        )
+
+
+def prepare(workdir, name):
+    source, app_name = PLAYBOOKS[name]
+    with open(os.path.join(ROOT, source)) as f:
+        text = f.read()
+    path = os.path.join(workdir, os.path.basename(source))
+    with open(path, 'w') as f:
+        f.write(text.replace(app_name, '{{ app_fqdn }}'))
+
+    collection = os.path.join(workdir, 'collections', 'ansible_collections', 'f5devcentral')
+    os.makedirs(collection)
+    os.symlink(ROOT, os.path.join(collection, 'cloudservices'))
+    for directory in ('pc', 'tmp'):
+        os.makedirs(os.path.join(workdir, directory))
+    return path
+
+
+def print_report(result, out=sys.stdout):
+    out.write('\n{playbook}: {apps} apps, {forks} forks: {wall:.2f}s wall, {api_calls} API calls, '
+              '{rps:.1f} req/s, {errors} errors, {request_kib:.1f} KiB sent\n'.format(**result))
+    out.write('  {0:<40} {1:>9} {2:>9} {3:>10} {4:>10} {5:>10}\n'.format(
+        'task', 'p50 s', 'p95 s', 'API calls', 'per host', 'KiB sent'))
+    for task in result['tasks']:
+        out.write('  {0:<40} {1:>9.3f} {2:>9.3f} {3:>10} {4:>10.1f} {5:>10.1f}\n'.format(
+            task['task'][:40], task['p50'], task['p95'], task['api_calls'], task['api_calls_per_host'],
+            task['request_kib']))
+
+
+def int_list(value):
+    return [int(x) for x in value.split(',') if x]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='End-to-end playbook throughput against the local API simulator')
+    parser.add_argument('--playbook', choices=sorted(PLAYBOOKS), action='append',
+                        help='example playbook to run, may be repeated; default all')
+    parser.add_argument('--apps', type=int_list, default=[1, 10], help='comma separated app counts')
+    parser.add_argument('--forks', type=int_list, default=[5], help='comma separated fork counts')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every API request')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--deploy-delay', type=float, default=0.0)
+    parser.add_argument('--discovery-delay', type=float, default=0.0)
+    parser.add_argument('--no-merge-patch', dest='merge_patch', action='store_false',
+                        help='reject PATCH so that updates fall back to full PUTs')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--keep', action='store_true', help='keep the working directory')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='f5-cs-e2e-')
+    results = []
+    try:
+        for name in args.playbook or sorted(PLAYBOOKS):
+            playbook_dir = os.path.join(workdir, name)
+            os.makedirs(playbook_dir)
+            playbook = prepare(playbook_dir, name)
+            for apps in args.apps:
+                for forks in args.forks:
+                    with CloudservicesSimulator(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                                deploy_delay=args.deploy_delay,
+                                                discovery_delay=args.discovery_delay,
+                                                merge_patch=args.merge_patch) as simulator:
+                        result = Run(playbook_dir, playbook, apps, forks, simulator).execute()
+                    print_report(result)
+                    results.append(result)
+    finally:
+        if args.keep:
+            sys.stdout.write('\nworking directory: {0}\n'.format(workdir))
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=4)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from test.simulator.server import CloudservicesSimulator  # noqa: F401
+from test.simulator.server import PASSWORD  # noqa: F401
+from test.simulator.server import USERNAME  # noqa: F401
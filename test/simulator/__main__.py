@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import argparse
+
+from test.simulator.server import CloudservicesSimulator
+from test.simulator.server import PASSWORD
+from test.simulator.server import USERNAME
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local F5 Cloud Services API simulator')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every request')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random extra seconds, up to this value')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='probability of an injected failure')
+    parser.add_argument('--error-code', type=int, default=503)
+    parser.add_argument('--deploy-delay', type=float, default=0.0, help='seconds until activate/suspend settle')
+    parser.add_argument('--discovery-delay', type=float, default=0.0, help='seconds until WAF discovery completes')
+    parser.add_argument('--page-size', type=int, default=0, help='subscriptions per listing page, 0 disables paging')
+    parser.add_argument('--waf', type=int, default=0, help='WAF subscriptions created at start')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    simulator = CloudservicesSimulator(
+        host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, error_code=args.error_code, deploy_delay=args.deploy_delay,
+        discovery_delay=args.discovery_delay, page_size=args.page_size, seed=args.seed, verbose=args.verbose,
+    )
+    simulator.seed_subscriptions(args.waf)
+    print('F5 Cloud Services simulator on {0}, login {1} / {2}'.format(simulator.url, USERNAME, PASSWORD))
+    try:
+        simulator.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
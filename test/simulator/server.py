@@ -0,0 +1,692 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import collections
+import copy
+import datetime
+import json
+import random
+import re
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+
+
+USERNAME = 'user@example.com'
+PASSWORD = 'password'
+
+ROLES = {
+    'r-rTLKOYBmg': 'owner',
+    'r-G0LKdYfiR': 'privileged-user',
+    'r-NAYFdYfiR': 'limited-user',
+}
+
+CATALOGS = [
+    dict(catalog_id='c-aa9N0jgHI4', service_type='waf', name='Essential App Protect'),
+    dict(catalog_id='c-aau0eSVXtL', service_type='dns', name='DNS'),
+    dict(catalog_id='c-aaxBJkfg8u', service_type='adns', name='Secondary DNS'),
+    dict(catalog_id='c-aaQnOrPjGu', service_type='gslb', name='DNS Load Balancer'),
+    dict(catalog_id='c-aacHacMCM8', service_type='beacon', name='Beacon'),
+]
+
+
+class SimulatorError(Exception):
+    def __init__(self, code, message):
+        super(SimulatorError, self).__init__(message)
+        self.code = code
+        self.message = message
+
+
+def apply_merge_patch(target, patch):
+    """Applies an RFC 7386 merge patch to ``target`` and returns the result."""
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = dict(target) if isinstance(target, dict) else dict()
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
+
+
+def now_iso():
+    return datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class SimulatorState(object):
+    """In-memory F5 Cloud Services backend.
+
+    Subscriptions move through the same states as the real service: created
+    ``DISABLED``/``UNDEPLOYED``, activated ``ACTIVE``/``DEPLOYING`` until
+    ``deploy_delay`` seconds passed, then ``DEPLOYED``; suspending mirrors
+    that with ``UNDEPLOYING``. WAF auto discovery results show up in
+    ``configuration.details`` ``discovery_delay`` seconds after creation.
+    Pending transitions are settled lazily whenever a subscription is read.
+    Subscriptions accept RFC 7386 merge patches unless ``merge_patch`` is off.
+    """
+
+    def __init__(self, deploy_delay=0.0, discovery_delay=0.0, page_size=0, merge_patch=True, clock=time.time):
+        self.deploy_delay = deploy_delay
+        self.merge_patch = merge_patch
+        self.discovery_delay = discovery_delay
+        self.page_size = page_size
+        self.clock = clock
+        self.lock = threading.RLock()
+        self._ids = collections.defaultdict(int)
+
+        self.tokens = set()
+        self.catalogs = copy.deepcopy(CATALOGS)
+        self.subscriptions = collections.OrderedDict()
+        self.transitions = dict()
+        self.discoveries = dict()
+        self.certificates = collections.OrderedDict()
+        self.accounts = collections.OrderedDict()
+        self.members = collections.defaultdict(collections.OrderedDict)
+        self.invites = collections.OrderedDict()
+
+        account_id = self.new_id('a')
+        self.user = dict(
+            id=self.new_id('u'),
+            email=USERNAME,
+            first_name='Test',
+            last_name='User',
+            primary_account_id=account_id,
+            status='active',
+        )
+        self.add_account(dict(id=account_id, name='firstaccount'))
+
+    def new_id(self, prefix):
+        with self.lock:
+            self._ids[prefix] += 1
+            return '{0}-{1:010d}'.format(prefix, self._ids[prefix])
+
+    # svc-auth
+
+    def login(self, payload):
+        if payload.get('username') != USERNAME or payload.get('password') != PASSWORD:
+            raise SimulatorError(401, 'invalid username or password')
+        token = self.new_id('token')
+        self.tokens.add(token)
+        return dict(
+            access_token=token,
+            refresh_token='refresh-' + token,
+            expires_at=str(int(self.clock()) + 3600),
+        )
+
+    def logout(self, payload):
+        self.tokens.discard(payload.get('access_token'))
+        return dict()
+
+    def relogin(self, payload):
+        token = self.new_id('token')
+        self.tokens.add(token)
+        return dict(access_token=token)
+
+    # svc-account
+
+    def add_account(self, account, role_id='r-rTLKOYBmg'):
+        account = dict(
+            dict(parent_account_id='', status='active', level='0', address=dict(), phone='', catalog_items=[]),
+            **account
+        )
+        account.setdefault('create_time', now_iso())
+        account['update_time'] = now_iso()
+        self.accounts[account['id']] = account
+        self.members[account['id']][self.user['id']] = dict(
+            account_id=account['id'],
+            user_id=self.user['id'],
+            role_id=role_id,
+            role_name=ROLES[role_id],
+            user=dict((k, self.user[k]) for k in ('id', 'email', 'first_name', 'last_name')),
+            account_name=account['name'],
+            level=account['level'],
+        )
+        return account
+
+    def get_account_or_404(self, account_id):
+        account = self.accounts.get(account_id)
+        if account is None:
+            raise SimulatorError(404, 'account {0} not found'.format(account_id))
+        return account
+
+    def get_user(self):
+        return self.user
+
+    def get_memberships(self, user_id):
+        return dict(memberships=[
+            m[user_id] for m in self.members.values() if user_id in m
+        ])
+
+    def get_account(self, account_id):
+        return self.get_account_or_404(account_id)
+
+    def batch_get_accounts(self, payload):
+        return dict(accounts=[
+            self.accounts[x] for x in payload.get('account_ids', []) if x in self.accounts
+        ])
+
+    def create_account(self, payload):
+        account = dict(payload)
+        account['id'] = self.new_id('a')
+        return self.add_account(account)
+
+    def update_account(self, account_id, payload):
+        account = self.get_account_or_404(account_id)
+        account.update(dict((k, v) for k, v in payload.items() if k not in ('id', 'catalog_items')))
+        account['update_time'] = now_iso()
+        return account
+
+    def delete_account(self, account_id, payload):
+        self.get_account_or_404(account_id)
+        del self.accounts[account_id]
+        self.members.pop(account_id, None)
+        return dict()
+
+    def get_account_catalogs(self, account_id):
+        return dict(catalog_items=self.get_account_or_404(account_id)['catalog_items'])
+
+    def enable_catalog_item(self, account_id, payload):
+        account = self.get_account_or_404(account_id)
+        catalog = next((c for c in self.catalogs if c['catalog_id'] == payload.get('catalog_id')), None)
+        if catalog is None:
+            raise SimulatorError(400, 'catalog {0} not found'.format(payload.get('catalog_id')))
+        item = dict(
+            catalog_id=catalog['catalog_id'],
+            account_id=account_id,
+            service_type=catalog['service_type'],
+            status='SUBSCRIBED',
+            create_time=now_iso(),
+        )
+        account['catalog_items'] = [x for x in account['catalog_items'] if x['catalog_id'] != item['catalog_id']]
+        account['catalog_items'].append(item)
+        return item
+
+    def disable_catalog_item(self, account_id, catalog_id):
+        account = self.get_account_or_404(account_id)
+        account['catalog_items'] = [x for x in account['catalog_items'] if x['catalog_id'] != catalog_id]
+        return dict()
+
+    def list_account_members(self, account_id):
+        account = self.get_account_or_404(account_id)
+        return dict(account_id=account_id, account_name=account['name'], users=list(self.members[account_id].values()))
+
+    def update_account_member(self, account_id, user_id, payload):
+        member = self.members[account_id].get(user_id)
+        if member is None:
+            raise SimulatorError(404, 'member {0} not found'.format(user_id))
+        member['role_id'] = payload['role_id']
+        member['role_name'] = ROLES.get(payload['role_id'], '')
+        return member
+
+    def delete_account_member(self, account_id, user_id):
+        if self.members[account_id].pop(user_id, None) is None:
+            raise SimulatorError(404, 'member {0} not found'.format(user_id))
+        return dict()
+
+    def list_invites(self):
+        return dict(invites=list(self.invites.values()))
+
+    def create_invites(self, payload):
+        created = []
+        for invitee in payload.get('invitees', []):
+            invite = dict(
+                invite_id=self.new_id('i'),
+                inviter_user_id=self.user['id'],
+                inviter_account_id=payload.get('inviter_account_id'),
+                role_id=payload.get('role_id'),
+                status='pending',
+                first_name=invitee.get('first_name', ''),
+                last_name=invitee.get('last_name', ''),
+                invitee_email=invitee.get('email', ''),
+                invitee_account_ids=payload.get('account_ids', []),
+                cascade=payload.get('cascade', ''),
+                create_time=now_iso(),
+            )
+            self.invites[invite['invite_id']] = invite
+            created.append(invite)
+        return dict(invites=created)
+
+    def delete_invite(self, invite_id):
+        if self.invites.pop(invite_id, None) is None:
+            raise SimulatorError(404, 'invite {0} not found'.format(invite_id))
+        return dict()
+
+    # svc-catalog
+
+    def get_catalogs(self):
+        return dict(Catalogs=self.catalogs)
+
+    # svc-subscription
+
+    def settle(self, subscription):
+        subscription_id = subscription['subscription_id']
+        transition = self.transitions.get(subscription_id)
+        if transition is not None and self.clock() >= transition[1]:
+            subscription['service_state'] = transition[0]
+            del self.transitions[subscription_id]
+
+        ready_at = self.discoveries.get(subscription_id)
+        if ready_at is not None and self.clock() >= ready_at:
+            subscription['configuration'].setdefault('details', dict()).update(self.discovery(subscription))
+            del self.discoveries[subscription_id]
+        return subscription
+
+    def discovery(self, subscription):
+        fqdn = ((subscription['configuration'].get('waf_service') or {}).get('application') or {}).get('fqdn', '')
+        return dict(
+            fqdn=fqdn,
+            discovery=dict(
+                cloudProvider='aws',
+                cloudRegion='us-east-1',
+                error='NO_ERROR',
+                isHTTP=True,
+                isHTTPS=False,
+                recommendedWafRegion='us-east-1',
+                ipGeolocations=[dict(ip='192.0.2.{0}'.format(len(self.subscriptions) % 250 + 1), country='united states')],
+            ),
+        )
+
+    def transition(self, subscription, status, pending, final):
+        subscription['status'] = status
+        subscription['update_time'] = now_iso()
+        if self.deploy_delay > 0:
+            subscription['service_state'] = pending
+            self.transitions[subscription['subscription_id']] = (final, self.clock() + self.deploy_delay)
+        else:
+            subscription['service_state'] = final
+            self.transitions.pop(subscription['subscription_id'], None)
+
+    def get_subscription_or_404(self, subscription_id):
+        subscription = self.subscriptions.get(subscription_id)
+        if subscription is None:
+            raise SimulatorError(404, 'subscription {0} not found'.format(subscription_id))
+        return self.settle(subscription)
+
+    def status_of(self, subscription):
+        return dict(
+            subscription_id=subscription['subscription_id'],
+            status=subscription['status'],
+            service_state=subscription['service_state'],
+        )
+
+    def list_subscriptions(self, service_type=None, account_id=None, page_token=None):
+        items = [
+            self.settle(x) for x in self.subscriptions.values()
+            if not x['deleted']
+            and (service_type is None or x['service_type'] == service_type)
+            and (account_id is None or x['account_id'] == account_id)
+        ]
+        if not self.page_size:
+            return dict(subscriptions=items)
+
+        start = int(page_token or 0)
+        result = dict(subscriptions=items[start:start + self.page_size])
+        if start + self.page_size < len(items):
+            result['next_page_token'] = str(start + self.page_size)
+        return result
+
+    def create_subscription(self, payload):
+        catalog = next((c for c in self.catalogs if c['catalog_id'] == payload.get('catalog_id')), None)
+        subscription_id = self.new_id('s')
+        service_type = payload.get('service_type') or (catalog or {}).get('service_type')
+        subscription = dict(
+            subscription_id=subscription_id,
+            account_id=payload.get('account_id') or self.user['primary_account_id'],
+            user_id=self.user['id'],
+            catalog_id=payload.get('catalog_id'),
+            service_instance_id='{0}-{1}'.format(service_type, subscription_id[2:]),
+            service_instance_name=payload.get('service_instance_name'),
+            service_type=service_type,
+            status='DISABLED',
+            service_state='UNDEPLOYED',
+            deleted=False,
+            configuration=copy.deepcopy(payload.get('configuration') or dict()),
+            create_time=now_iso(),
+            update_time=now_iso(),
+        )
+        if service_type == 'waf':
+            subscription['configuration']['details'] = dict(
+                CNAMEValue='waf-{0}.waf.prd.f5aas.com'.format(subscription_id[2:]),
+            )
+            if self.discovery_delay > 0:
+                self.discoveries[subscription_id] = self.clock() + self.discovery_delay
+            else:
+                subscription['configuration']['details'].update(self.discovery(subscription))
+        self.subscriptions[subscription_id] = subscription
+        return subscription
+
+    def update_subscription(self, subscription_id, payload):
+        subscription = self.get_subscription_or_404(subscription_id)
+        details = subscription['configuration'].get('details')
+        if 'configuration' in payload:
+            subscription['configuration'] = copy.deepcopy(payload['configuration'])
+            subscription['configuration'].pop('details', None)
+            if details is not None:
+                subscription['configuration']['details'] = details
+        if payload.get('service_instance_name'):
+            subscription['service_instance_name'] = payload['service_instance_name']
+        subscription['update_time'] = now_iso()
+        if subscription['status'] == 'ACTIVE':
+            self.transition(subscription, 'ACTIVE', 'DEPLOYING', 'DEPLOYED')
+        return subscription
+
+    def patch_subscription(self, subscription_id, payload):
+        if not self.merge_patch:
+            raise SimulatorError(405, 'PATCH is not supported')
+        subscription = self.get_subscription_or_404(subscription_id)
+        if 'configuration' in payload:
+            subscription['configuration'] = apply_merge_patch(subscription['configuration'], payload['configuration'])
+        if payload.get('service_instance_name'):
+            subscription['service_instance_name'] = payload['service_instance_name']
+        subscription['update_time'] = now_iso()
+        if subscription['status'] == 'ACTIVE':
+            self.transition(subscription, 'ACTIVE', 'DEPLOYING', 'DEPLOYED')
+        return subscription
+
+    def activate_subscription(self, subscription_id):
+        subscription = self.get_subscription_or_404(subscription_id)
+        self.transition(subscription, 'ACTIVE', 'DEPLOYING', 'DEPLOYED')
+        return self.status_of(subscription)
+
+    def suspend_subscription(self, subscription_id):
+        subscription = self.get_subscription_or_404(subscription_id)
+        self.transition(subscription, 'DISABLED', 'UNDEPLOYING', 'UNDEPLOYED')
+        return self.status_of(subscription)
+
+    def retire_subscription(self, subscription_id):
+        subscription = self.get_subscription_or_404(subscription_id)
+        subscription['status'] = 'RETIRED'
+        subscription['service_state'] = 'UNDEPLOYED'
+        subscription['deleted'] = True
+        subscription['update_time'] = now_iso()
+        self.transitions.pop(subscription_id, None)
+        return subscription
+
+    def get_subscription_status(self, subscription_id):
+        return self.status_of(self.get_subscription_or_404(subscription_id))
+
+    # svc-certificates
+
+    def post_certificate(self, payload):
+        certificate_id = self.new_id('cert')
+        self.certificates[certificate_id] = dict(
+            id=certificate_id,
+            account_id=payload.get('account_id') or self.user['primary_account_id'],
+            common_name=payload.get('common_name', 'example.com'),
+            expiration_date='2030-01-01T00:00:00Z',
+        )
+        return dict(id=certificate_id)
+
+    def get_certificates(self, account_id):
+        return dict(certificates=[x for x in self.certificates.values() if x['account_id'] == account_id])
+
+    def retire_certificate(self, certificate_id):
+        if self.certificates.pop(certificate_id, None) is None:
+            raise SimulatorError(404, 'certificate {0} not found'.format(certificate_id))
+        return dict()
+
+
+ROUTES = [
+    ('POST', r'/v1/svc-auth/login', 'login', lambda s, m, q, b: s.login(b)),
+    ('POST', r'/v1/svc-auth/logout', 'logout', lambda s, m, q, b: s.logout(b)),
+    ('POST', r'/v1/svc-auth/relogin', 'relogin', lambda s, m, q, b: s.relogin(b)),
+
+    ('GET', r'/v1/svc-account/user', 'get_current_user', lambda s, m, q, b: s.get_user()),
+    ('GET', r'/v1/svc-account/users/([^/]+)/memberships', 'get_memberships', lambda s, m, q, b: s.get_memberships(m[0])),
+    ('POST', r'/v1/svc-account/accounts/batch-get', 'batch_get_accounts', lambda s, m, q, b: s.batch_get_accounts(b)),
+    ('POST', r'/v1/svc-account/accounts', 'create_account', lambda s, m, q, b: s.create_account(b)),
+    ('GET', r'/v1/svc-account/accounts/([^/]+)', 'get_account', lambda s, m, q, b: s.get_account(m[0])),
+    ('PUT', r'/v1/svc-account/accounts/([^/]+)', 'update_account', lambda s, m, q, b: s.update_account(m[0], b)),
+    ('DELETE', r'/v1/svc-account/accounts/([^/]+)', 'delete_account', lambda s, m, q, b: s.delete_account(m[0], b)),
+    ('GET', r'/v1/svc-account/accounts/([^/]+)/catalogs', 'get_account_catalogs', lambda s, m, q, b: s.get_account_catalogs(m[0])),
+    ('POST', r'/v1/svc-account/accounts/([^/]+)/catalogs', 'enable_catalog_item', lambda s, m, q, b: s.enable_catalog_item(m[0], b)),
+    ('DELETE', r'/v1/svc-account/accounts/([^/]+)/catalogs/([^/]+)', 'disable_catalog_item',
+     lambda s, m, q, b: s.disable_catalog_item(m[0], m[1])),
+    ('GET', r'/v1/svc-account/accounts/([^/]+)/members', 'list_account_members', lambda s, m, q, b: s.list_account_members(m[0])),
+    ('PUT', r'/v1/svc-account/accounts/([^/]+)/members/([^/]+)', 'update_account_member',
+     lambda s, m, q, b: s.update_account_member(m[0], m[1], b)),
+    ('DELETE', r'/v1/svc-account/accounts/([^/]+)/members/([^/]+)', 'delete_account_member',
+     lambda s, m, q, b: s.delete_account_member(m[0], m[1])),
+    ('GET', r'/v1/svc-account/invites', 'list_invites', lambda s, m, q, b: s.list_invites()),
+    ('POST', r'/v1/svc-account/invites', 'create_invite_into_account', lambda s, m, q, b: s.create_invites(b)),
+    ('DELETE', r'/v1/svc-account/invites/([^/]+)', 'delete_invite', lambda s, m, q, b: s.delete_invite(m[0])),
+
+    ('GET', r'/v1/svc-catalog/catalogs', 'get_catalogs', lambda s, m, q, b: s.get_catalogs()),
+
+    ('GET', r'/v1/svc-subscription/subscriptions', 'get_subscriptions_by_type', lambda s, m, q, b: s.list_subscriptions(
+        q.get('service_type'), q.get('account_id'), q.get('page_token'))),
+    ('POST', r'/v1/svc-subscription/subscriptions', 'create_subscription', lambda s, m, q, b: s.create_subscription(b)),
+    ('GET', r'/v1/svc-subscription/subscriptions/([^/]+)', 'get_subscription_by_id',
+     lambda s, m, q, b: s.get_subscription_or_404(m[0])),
+    ('PUT', r'/v1/svc-subscription/subscriptions/([^/]+)', 'update_subscription', lambda s, m, q, b: s.update_subscription(m[0], b)),
+    ('PATCH', r'/v1/svc-subscription/subscriptions/([^/]+)', 'patch_subscription', lambda s, m, q, b: s.patch_subscription(m[0], b)),
+    ('GET', r'/v1/svc-subscription/subscriptions/([^/]+)/status', 'get_subscription_status',
+     lambda s, m, q, b: s.get_subscription_status(m[0])),
+    ('POST', r'/v1/svc-subscription/subscriptions/([^/]+)/activate', 'activate_subscription',
+     lambda s, m, q, b: s.activate_subscription(m[0])),
+    ('POST', r'/v1/svc-subscription/subscriptions/([^/]+)/suspend', 'suspend_subscription',
+     lambda s, m, q, b: s.suspend_subscription(m[0])),
+    ('POST', r'/v1/svc-subscription/subscriptions/([^/]+)/retire', 'retire_subscription',
+     lambda s, m, q, b: s.retire_subscription(m[0])),
+
+    ('POST', r'/v1/svc-certificates/certificates', 'post_certificate', lambda s, m, q, b: s.post_certificate(b)),
+    ('GET', r'/v1/svc-certificates/certificates/([^/]+)', 'get_certificates', lambda s, m, q, b: s.get_certificates(m[0])),
+    ('DELETE', r'/v1/svc-certificates/([^/]+)', 'retire_certificate', lambda s, m, q, b: s.retire_certificate(m[0])),
+]
+
+COMPILED_ROUTES = [(method, re.compile('^' + pattern + '$'), name, handler) for method, pattern, name, handler in ROUTES]
+PUBLIC_ROUTES = ('login', 'relogin')
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    simulator = None
+
+    def log_message(self, format, *args):
+        if self.simulator.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def _send(self, code, contents):
+        body = json.dumps(contents).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        try:
+            body = json.loads(raw.decode('utf-8')) if raw else dict()
+        except ValueError:
+            return self._send(400, dict(status=400, message='invalid JSON body'))
+
+        url = urlsplit(self.path)
+        query = dict((k, v[0]) for k, v in parse_qs(url.query).items())
+        code, contents = self.simulator.dispatch(method, url.path, query, body, self.headers)
+        self._send(code, contents)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_PATCH(self):
+        self._handle('PATCH')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+
+class CloudservicesSimulator(object):
+    """Local stand-in for the F5 Cloud Services API.
+
+    Serves svc-auth, svc-account, svc-catalog, svc-subscription and
+    svc-certificates over plain HTTP from a background thread. Every request
+    waits ``latency`` seconds, plus up to ``jitter``, and fails with
+    ``error_code`` with probability ``error_rate``; ``fail_next`` queues
+    deterministic failures. ``calls`` counts requests per API method and
+    ``requests`` keeps ``(time, method name, status code, request body size)``
+    of every request.
+
+    ::
+
+        with CloudservicesSimulator(latency=0.05, deploy_delay=2) as sim:
+            connection = RestConnection(host=sim.host, port=sim.port, use_ssl=False,
+                                        username=USERNAME, password=PASSWORD)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0, error_code=503,
+                 deploy_delay=0.0, discovery_delay=0.0, page_size=0, merge_patch=True, seed=None, verbose=False):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.verbose = verbose
+        self.random = random.Random(seed)
+        self.state = SimulatorState(deploy_delay=deploy_delay, discovery_delay=discovery_delay, page_size=page_size,
+                                    merge_patch=merge_patch)
+        self.calls = collections.Counter()
+        self.requests = list()
+        self._failures = collections.deque()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        handler = type('RequestHandler', (_RequestHandler,), dict(simulator=self))
+        self.server = _Server((host, port), handler)
+
+    @property
+    def host(self):
+        return self.server.server_address[0]
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    @property
+    def url(self):
+        return 'http://{0}:{1}'.format(self.host, self.port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='f5-cs-simulator')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def serve_forever(self):
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def fail_next(self, count=1, code=503):
+        with self._lock:
+            self._failures.extend([code] * count)
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+            del self.requests[:]
+
+    def seed_subscriptions(self, count, service_type='waf', status='ACTIVE', account_id=None):
+        """Create ``count`` subscriptions directly in the state, without requests."""
+        catalog = next(c for c in self.state.catalogs if c['service_type'] == service_type)
+        result = []
+        with self.state.lock:
+            for index in range(count):
+                name = 'app{0}.example.com'.format(len(self.state.subscriptions) + 1)
+                configuration = dict()
+                if service_type == 'waf':
+                    configuration = dict(waf_service=dict(application=dict(fqdn=name), policy=dict(encoding='utf-8')))
+                subscription = self.state.create_subscription(dict(
+                    account_id=account_id,
+                    catalog_id=catalog['catalog_id'],
+                    service_type=service_type,
+                    service_instance_name=name,
+                    configuration=configuration,
+                ))
+                if status == 'ACTIVE':
+                    subscription['status'] = 'ACTIVE'
+                    subscription['service_state'] = 'DEPLOYED'
+                result.append(subscription)
+        return result
+
+    def route(self, method, path):
+        for route_method, pattern, name, handler in COMPILED_ROUTES:
+            if route_method != method:
+                continue
+            match = pattern.match(path)
+            if match:
+                return name, match.groups(), handler
+        return None, None, None
+
+    def authorized(self, headers):
+        authorization = headers.get('Authorization') or ''
+        return authorization.startswith('Bearer ') and authorization[7:] in self.state.tokens
+
+    def dispatch(self, method, path, query, body, headers):
+        name, groups, handler = self.route(method, path)
+        with self._lock:
+            self.calls[name or 'unknown'] += 1
+            failure = self._failures.popleft() if self._failures else None
+        started = time.time()
+        code, contents = self._dispatch(name, groups, handler, method, path, query, body, headers, failure)
+        size = len(json.dumps(body)) if body else 0
+        with self._lock:
+            self.requests.append((started, name or 'unknown', code, size))
+        return code, contents
+
+    def _dispatch(self, name, groups, handler, method, path, query, body, headers, failure):
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+        if failure is None and self.error_rate and self.random.random() < self.error_rate:
+            failure = self.error_code
+        if failure is not None:
+            return failure, dict(status=failure, message='injected failure')
+
+        if handler is None:
+            return 404, dict(status=404, message='{0} {1} is not simulated'.format(method, path))
+        if name not in PUBLIC_ROUTES and not self.authorized(headers):
+            return 401, dict(status=401, message='unauthorized')
+
+        try:
+            with self.state.lock:
+                return 200, copy.deepcopy(handler(self.state, groups, query, body))
+        except SimulatorError as ex:
+            return ex.code, dict(status=ex.code, message=ex.message)
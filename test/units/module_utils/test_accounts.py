@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+import sys
+
+if sys.version_info < (2, 7):
+    pytestmark = pytest.mark.skip("F5 Ansible modules require Python >= 2.7")
+
+import unittest
+from unittest.mock import Mock
+
+try:
+    from library.module_utils.accounts import MembershipIndex
+    from library.module_utils.accounts import batch_get_accounts
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.accounts import MembershipIndex
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.accounts import batch_get_accounts
+
+
+def make_memberships(count):
+    return [dict(account_id='a-{0}'.format(i), account_name='account{0}'.format(i)) for i in range(count)]
+
+
+def fake_client():
+    client = Mock()
+    client.batch_get_accounts.side_effect = lambda payload: dict(accounts=[
+        dict(id=x, name='body-' + x) for x in payload['account_ids'] if x != 'a-missing'
+    ])
+    return client
+
+
+class TestBatchGetAccounts(unittest.TestCase):
+    def test_batches(self):
+        client = fake_client()
+        account_ids = ['a-{0}'.format(i) for i in range(250)] + ['a-missing']
+
+        accounts = batch_get_accounts(client, account_ids, 2)
+
+        assert len(accounts) == 250
+        assert accounts['a-42']['name'] == 'body-a-42'
+        assert client.batch_get_accounts.call_count == 3
+
+    def test_empty(self):
+        client = fake_client()
+        assert batch_get_accounts(client, []) == dict()
+        assert client.batch_get_accounts.call_count == 0
+
+
+class TestMembershipIndex(unittest.TestCase):
+    def test_find(self):
+        memberships = make_memberships(10)
+        memberships.append(dict(account_id='a-dup', account_name='account3'))
+        index = MembershipIndex(memberships)
+
+        assert len(index) == 11
+        assert index.find(account_id='a-7')['account_name'] == 'account7'
+        assert index.find(name='account3')['account_id'] == 'a-3'
+        assert index.find(account_id='a-missing', name='account3') is None
+        assert index.find() is None
+
+    def test_add_and_remove(self):
+        index = MembershipIndex(make_memberships(3))
+        index.add(dict(account_id='a-dup', account_name='account1'))
+
+        index.add_account(dict(id='a-new', name='new'))
+        index.remove('a-1')
+
+        assert index.find(name='new')['account_id'] == 'a-new'
+        assert index.accounts['a-new']['name'] == 'new'
+        assert index.find(account_id='a-1') is None
+        assert index.find(name='account1')['account_id'] == 'a-dup'
+
+    def test_load_accounts(self):
+        client = fake_client()
+        index = MembershipIndex(make_memberships(3))
+
+        assert [x['id'] for x in index.load_accounts(client, ['a-2', 'a-missing'])] == ['a-2']
+        assert [x['id'] for x in index.load_accounts(client)] == ['a-0', 'a-1', 'a-2']
+        assert client.batch_get_accounts.call_count == 2
+        index.load_accounts(client, ['a-0', 'a-2'])
+        assert client.batch_get_accounts.call_count == 2
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+import pytest
+import shutil
+import sys
+import tempfile
+
+if sys.version_info < (2, 7):
+    pytestmark = pytest.mark.skip("F5 Ansible modules require Python >= 2.7")
+
+import unittest
+from unittest.mock import Mock
+from unittest.mock import patch
+
+try:
+    from library.module_utils.catalogs import CatalogRegistry
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.catalogs import CatalogRegistry
+
+CATALOGS = dict(code=200, contents=dict(Catalogs=[
+    dict(catalog_id='c-waf', service_type='waf'),
+    dict(catalog_id='c-dns', service_type='dns'),
+]))
+
+
+class TestCatalogRegistry(unittest.TestCase):
+    def setUp(self):
+        self.now = [1000.0]
+        self.read = Mock(return_value=CATALOGS)
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'catalogs.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def registry(self, **kwargs):
+        return CatalogRegistry(self.read, clock=lambda: self.now[0], **kwargs)
+
+    def test_read_once(self):
+        registry = self.registry()
+
+        assert registry.get() == CATALOGS
+        assert registry.get() == CATALOGS
+        assert self.read.call_count == 1
+        assert not os.path.exists(self.path)
+
+    def test_errors_not_kept(self):
+        self.read.side_effect = [dict(code=401, contents=dict(message='expired')), CATALOGS]
+        registry = self.registry()
+
+        assert registry.get()['code'] == 401
+        assert registry.get() == CATALOGS
+        assert self.read.call_count == 2
+
+    def test_disk_cache(self):
+        assert self.registry(path=self.path).get() == CATALOGS
+
+        self.now[0] += 3599
+        assert self.registry(path=self.path, ttl=3600).get() == CATALOGS
+        assert self.read.call_count == 1
+
+        self.now[0] += 1
+        assert self.registry(path=self.path, ttl=3600).get() == CATALOGS
+        assert self.read.call_count == 2
+
+    def test_bad_disk_cache(self):
+        with open(self.path, 'w') as f:
+            f.write('{not json')
+
+        assert self.registry(path=self.path).get() == CATALOGS
+        assert self.read.call_count == 1
+        assert self.registry(path=self.path).get() == CATALOGS
+        assert self.read.call_count == 1
+
+    def test_failed_save_leaves_no_file(self):
+        with patch('os.rename', side_effect=OSError('read-only')):
+            assert self.registry(path=self.path).get() == CATALOGS
+
+        assert os.listdir(self.directory) == []
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+import sys
+
+if sys.version_info < (2, 7):
+    pytestmark = pytest.mark.skip("F5 Ansible modules require Python >= 2.7")
+
+import unittest
+
+try:
+    from library.module_utils.certificates import CertificateIndex
+    from library.module_utils.certificates import normalize_fingerprint
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.certificates import CertificateIndex
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.certificates import normalize_fingerprint
+
+
+CERTIFICATES = [
+    dict(id='cert-1', common_name='a.test.com', expiration_date='2030-02-14T19:46:40Z'),
+    dict(id='cert-2', common_name='a.test.com', expiration_date='2031-02-14T19:46:40Z'),
+    dict(id='cert-3', common_name='a.test.com', expiration_date='2030-02-14T19:46:40Z'),
+]
+
+
+class TestCertificateIndex(unittest.TestCase):
+    def test_by_name_and_expiration(self):
+        index = CertificateIndex(CERTIFICATES)
+
+        assert len(index) == 3
+        assert index.find(common_name='a.test.com', expiration_date='2030-02-14T19:46:40Z')['id'] == 'cert-1'
+        assert index.find(common_name='a.test.com', expiration_date='2031-02-14T19:46:40.000Z')['id'] == 'cert-2'
+        assert index.find(common_name='b.test.com', expiration_date='2030-02-14T19:46:40Z') is None
+        # Without fingerprints in the listing the parsed one is not used
+        assert index.find(fingerprint='AB:CD', common_name='a.test.com',
+                          expiration_date='2030-02-14T19:46:40Z')['id'] == 'cert-1'
+
+    def test_by_id(self):
+        index = CertificateIndex(CERTIFICATES)
+        assert index.get_by_id('cert-3') is CERTIFICATES[2]
+        assert index.get_by_id('cert-4') is None
+
+    def test_by_fingerprint(self):
+        index = CertificateIndex([
+            dict(CERTIFICATES[0], sha256_fingerprint='abcd'),
+            dict(CERTIFICATES[2], fingerprint='EF:01'),
+        ])
+
+        assert index.find(fingerprint='AB:CD')['id'] == 'cert-1'
+        assert index.find(fingerprint='ef01', common_name='a.test.com',
+                          expiration_date='2030-02-14T19:46:40Z')['id'] == 'cert-3'
+        # A reissued certificate with the same name is a different certificate
+        assert index.find(fingerprint='2345', common_name='a.test.com',
+                          expiration_date='2030-02-14T19:46:40Z') is None
+
+    def test_fingerprint_of_another_format(self):
+        sha1 = 'A9:4A:8F:E5:CC:B1:9B:A6:1C:4C:08:73:D3:91:E9:87:98:2F:BB:D3'
+        index = CertificateIndex([dict(CERTIFICATES[0], fingerprint=sha1)])
+        sha256 = '9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08'
+
+        assert index.find(fingerprint=sha256, common_name='a.test.com',
+                          expiration_date='2030-02-14T19:46:40Z')['id'] == 'cert-1'
+        assert index.find(fingerprint=sha256, common_name='b.test.com',
+                          expiration_date='2030-02-14T19:46:40Z') is None
+
+    def test_by_serial_and_issuer(self):
+        index = CertificateIndex([dict(CERTIFICATES[0], serial_number='0A1B', issuer='CN=ca')])
+
+        assert index.find(serial_number='0a1b', issuer='CN=ca')['id'] == 'cert-1'
+        assert index.find(serial_number='0a1b', issuer='CN=other') is None
+        # An issuer in another format falls back to the name
+        assert index.find(serial_number='0a1b', issuer='O=ca, CN=ca', common_name='a.test.com',
+                          expiration_date='2030-02-14T19:46:40Z')['id'] == 'cert-1'
+
+    def test_add(self):
+        index = CertificateIndex()
+        index.add(dict(id='cert-9', common_name='c.test.com', expiration_date='2030-01-01T00:00:00Z'),
+                  fingerprint='AA:BB')
+
+        assert index.find(fingerprint='aabb')['id'] == 'cert-9'
+        assert [x['id'] for x in index] == ['cert-9']
+
+    def test_normalize_fingerprint(self):
+        assert normalize_fingerprint('AB:cd:EF') == 'abcdef'
+        assert normalize_fingerprint('') is None
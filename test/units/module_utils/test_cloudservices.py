@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import inspect
+import pytest
+import sys
+
+if sys.version_info < (2, 7):
+    pytestmark = pytest.mark.skip("F5 Ansible modules require Python >= 2.7")
+
+import unittest
+from unittest.mock import Mock
+
+try:
+    from library.module_utils import cloudservices
+    from library.module_utils.cloudservices import CloudservicesApi
+    from library.module_utils.cloudservices import CACHE_INVALIDATION_MAP
+    from library.module_utils.cloudservices import CACHEABLE_READS
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils import cloudservices
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CACHE_INVALIDATION_MAP
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CACHEABLE_READS
+
+
+READ_CALLS = {
+    cloudservices.SUBSCRIPTION_BY_ID_URL: ('get_subscription_by_id', ('s-xxxxxxxxxx',)),
+    cloudservices.SUBSCRIPTIONS_BY_TYPE: ('get_subscriptions_by_type', ('waf', 'a-xxxxxxxxxx')),
+    cloudservices.GET_CURRENT_USER: ('get_current_user', ()),
+    cloudservices.GET_CATALOGS: ('get_catalogs', ()),
+    cloudservices.GET_CERTIFICATES_URL: ('get_certificates', ('a-xxxxxxxxxx',)),
+    cloudservices.GET_ACCOUNT: ('get_account', ('a-xxxxxxxxxx',)),
+    cloudservices.GET_MEMBERSHIPS: ('get_memberships', ('u-xxxxxxxxxx',)),
+    cloudservices.GET_ACCOUNT_MEMBERS: ('list_account_members', ('a-xxxxxxxxxx',)),
+    cloudservices.GET_INVITES: ('list_invites', ()),
+}
+
+WRITE_CALLS = {
+    'create_subscription': (dict(service_type='waf'),),
+    'update_subscription': (dict(service_type='waf'), 's-xxxxxxxxxx'),
+    'retire_subscription': (dict(omit_config=True), 's-xxxxxxxxxx'),
+    'activate_subscription': ('s-xxxxxxxxxx',),
+    'suspend_subscription': ('s-xxxxxxxxxx',),
+    'enable_catalog_item': (dict(catalog_id='c-xxxxxxxxxx'), 'a-xxxxxxxxxx'),
+    'disable_catalog_item': ('a-xxxxxxxxxx', 'c-xxxxxxxxxx'),
+    'post_certificate': (dict(certificate='pem'),),
+    'retire_certificate': ('cert-xxxxxxxxxx',),
+    'update_account': (dict(name='demo'), 'a-xxxxxxxxxx'),
+    'create_account': (dict(name='demo'),),
+    'delete_account': (dict(id='a-xxxxxxxxxx'), 'a-xxxxxxxxxx', False),
+    'delete_account_member': ('a-xxxxxxxxxx', 'u-xxxxxxxxxx'),
+    'delete_invite': ('i-xxxxxxxxxx',),
+    'update_account_member': (dict(role_id='r-xxxxxxxxxx'), 'a-xxxxxxxxxx', 'u-xxxxxxxxxx'),
+    'create_invite_into_account': (dict(role_id='r-xxxxxxxxxx'),),
+}
+
+# Public methods which never mutate cloud state
+NON_MUTATING = ('batch_get_accounts', 'get_catalog_id', 'handle_httperror', 'invalidate_cache')
+
+
+def fake_response(*args, **kwargs):
+    return dict(code=200, contents=dict(url=kwargs.get('url')))
+
+
+def fake_connection():
+    connection = Mock()
+    for verb in ('get', 'post', 'put', 'patch', 'delete'):
+        getattr(connection, verb).side_effect = fake_response
+    return connection
+
+
+def read_all(client):
+    for method, args in READ_CALLS.values():
+        getattr(client, method)(*args)
+
+
+def fetched_templates(client):
+    client.connection.get.reset_mock()
+    read_all(client)
+    urls = [c[1]['url'] for c in client.connection.get.call_args_list]
+    result = set()
+    for template, (method, args) in READ_CALLS.items():
+        if template.format(*args) in urls:
+            result.add(template)
+    return result
+
+
+class TestCache(unittest.TestCase):
+    def test_cache_disabled_by_default(self):
+        client = CloudservicesApi(fake_connection())
+        read_all(client)
+        assert fetched_templates(client) == set(READ_CALLS.keys())
+
+    def test_reads_served_from_cache(self):
+        client = CloudservicesApi(fake_connection(), use_cache=True)
+        read_all(client)
+        assert fetched_templates(client) == set()
+
+    def test_cached_contents_are_copies(self):
+        client = CloudservicesApi(fake_connection(), use_cache=True)
+        subscription = client.get_subscription_by_id('s-xxxxxxxxxx')
+        subscription['url'] = 'changed'
+        assert client.get_subscription_by_id('s-xxxxxxxxxx')['url'] != 'changed'
+
+    def test_cache_key_includes_account(self):
+        client = CloudservicesApi(fake_connection(), use_cache=True)
+        client.list_account_members('a-1')
+        client.list_account_members('a-2')
+        assert client.connection.get.call_count == 2
+
+    def test_subscription_status_not_cached(self):
+        client = CloudservicesApi(fake_connection(), use_cache=True)
+        client.get_subscription_status('s-xxxxxxxxxx')
+        client.get_subscription_status('s-xxxxxxxxxx')
+        assert client.connection.get.call_count == 2
+
+    def test_failed_reads_are_not_cached(self):
+        connection = fake_connection()
+        connection.get.side_effect = None
+        connection.get.return_value = dict(code=404, contents=dict(error='not found'))
+        client = CloudservicesApi(connection, use_cache=True)
+        for i in range(0, 2):
+            with pytest.raises(Exception):
+                client.get_subscription_by_id('s-xxxxxxxxxx')
+        assert connection.get.call_count == 2
+
+    def test_invalidate_everything(self):
+        client = CloudservicesApi(fake_connection(), use_cache=True)
+        read_all(client)
+        client.invalidate_cache()
+        assert fetched_templates(client) == set(READ_CALLS.keys())
+
+
+class TestInvalidationMap(unittest.TestCase):
+    def test_map_covers_cacheable_reads_only(self):
+        assert set(READ_CALLS.keys()) == set(CACHEABLE_READS)
+        for templates in CACHE_INVALIDATION_MAP.values():
+            assert set(templates).issubset(set(CACHEABLE_READS))
+
+    def test_every_write_is_mapped(self):
+        for name, method in inspect.getmembers(CloudservicesApi, inspect.isfunction):
+            if name.startswith('_') or name in NON_MUTATING:
+                continue
+            connection = fake_connection()
+            client = CloudservicesApi(connection)
+            argcount = len(inspect.signature(method).parameters) - 1
+            args = WRITE_CALLS.get(name, ('x',) * argcount)
+            getattr(client, name)(*args)
+            mutates = connection.post.called or connection.put.called \
+                or connection.patch.called or connection.delete.called
+            if mutates:
+                assert name in CACHE_INVALIDATION_MAP, name
+                assert name in WRITE_CALLS, name
+
+    def test_writes_invalidate_mapped_entries(self):
+        for name, args in WRITE_CALLS.items():
+            client = CloudservicesApi(fake_connection(), use_cache=True)
+            read_all(client)
+            getattr(client, name)(*args)
+            assert fetched_templates(client) == set(CACHE_INVALIDATION_MAP[name]), name
+
+    def test_failed_writes_invalidate_mapped_entries(self):
+        for name, args in WRITE_CALLS.items():
+            connection = fake_connection()
+            client = CloudservicesApi(connection, use_cache=True)
+            read_all(client)
+            for verb in ('post', 'put', 'delete'):
+                getattr(connection, verb).side_effect = None
+                getattr(connection, verb).return_value = dict(code=400, contents=dict(error='bad request'))
+            with pytest.raises(Exception):
+                getattr(client, name)(*args)
+            assert fetched_templates(client) == set(CACHE_INVALIDATION_MAP[name]), name
+
+    def test_update_subscription_invalidates_listing(self):
+        client = CloudservicesApi(fake_connection(), use_cache=True)
+        client.get_subscriptions_by_type('waf', 'a-xxxxxxxxxx')
+        client.get_subscription_by_id('s-xxxxxxxxxx')
+        client.update_subscription(dict(service_type='waf'), 's-xxxxxxxxxx')
+        client.connection.get.reset_mock()
+        client.get_subscriptions_by_type('waf', 'a-xxxxxxxxxx')
+        client.get_subscription_by_id('s-xxxxxxxxxx')
+        assert client.connection.get.call_count == 2
+
+    def test_invite_invalidates_invites(self):
+        client = CloudservicesApi(fake_connection(), use_cache=True)
+        client.list_invites()
+        client.create_invite_into_account(dict(role_id='r-xxxxxxxxxx'))
+        client.connection.get.reset_mock()
+        client.list_invites()
+        assert client.connection.get.call_count == 1
+
+
+class TestSubscriptionIterator(unittest.TestCase):
+    def test_single_page(self):
+        connection = Mock()
+        connection.get.return_value = dict(code=200, contents=dict(subscriptions=[
+            dict(subscription_id='s-1'), dict(subscription_id='s-2'),
+        ]))
+        client = CloudservicesApi(connection)
+
+        result = [s['subscription_id'] for s in client.iter_subscriptions_by_type('waf', 'a-xxxxxxxxxx')]
+
+        assert result == ['s-1', 's-2']
+        assert connection.get.call_count == 1
+
+    def test_follows_page_tokens(self):
+        pages = {
+            cloudservices.SUBSCRIPTIONS_BY_TYPE.format('waf', 'a-1'): dict(
+                subscriptions=[dict(subscription_id='s-1')], next_page_token='p2'),
+            cloudservices.SUBSCRIPTIONS_PAGE_BY_TYPE.format('waf', 'a-1', 'p2'): dict(
+                subscriptions=[dict(subscription_id='s-2')], next_page_token='p3'),
+            cloudservices.SUBSCRIPTIONS_PAGE_BY_TYPE.format('waf', 'a-1', 'p3'): dict(
+                subscriptions=[dict(subscription_id='s-3')], next_page_token=''),
+        }
+        connection = Mock()
+        connection.get.side_effect = lambda url, **kwargs: dict(code=200, contents=pages[url])
+        client = CloudservicesApi(connection)
+
+        iterator = client.iter_subscriptions_by_type('waf', 'a-1')
+        assert next(iterator)['subscription_id'] == 's-1'
+        assert connection.get.call_count == 1
+        assert [s['subscription_id'] for s in iterator] == ['s-2', 's-3']
+        assert connection.get.call_count == 3
+
+    def test_empty_listing(self):
+        connection = Mock()
+        connection.get.return_value = dict(code=200, contents=dict())
+        client = CloudservicesApi(connection)
+
+        assert list(client.iter_subscriptions_by_type('waf', 'a-xxxxxxxxxx')) == []
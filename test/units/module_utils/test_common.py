@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import copy
+import json
+import pytest
+import sys
+import threading
+
+if sys.version_info < (2, 7):
+    pytestmark = pytest.mark.skip("F5 Ansible modules require Python >= 2.7")
+
+import unittest
+
+try:
+    from library.module_utils.common import AnsibleF5Parameters
+    from library.module_utils.common import LazyChanges
+    from library.module_utils.common import backoff
+    from library.module_utils.common import config_hash
+    from library.module_utils.common import freeze
+    from library.module_utils.common import merge_patch
+    from library.module_utils.common import parallel_map
+    from library.module_utils.common import thaw
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import AnsibleF5Parameters
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import LazyChanges
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import backoff
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import config_hash
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import freeze
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import merge_patch
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import parallel_map
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import thaw
+
+
+class Parameters(AnsibleF5Parameters):
+    api_map = {
+        'serviceName': 'service_name',
+    }
+
+    @property
+    def service_name(self):
+        return self._values['service_name']
+
+    @property
+    def ttl(self):
+        return self._values['ttl']
+
+    @ttl.setter
+    def ttl(self, value):
+        self._values['ttl'] = int(value)
+
+
+class TestParameters(unittest.TestCase):
+    def test_update(self):
+        p = Parameters(params=dict(serviceName='app', ttl='30', other='x', password='secret'))
+
+        assert p.service_name == 'app'
+        assert p.ttl == 30
+        assert p.other == 'x'
+        assert p.password is None
+        assert p.missing is None
+
+    def test_setters_precomputed(self):
+        assert sorted(Parameters._setters) == ['partition', 'ttl']
+        assert Parameters._api_map == dict(serviceName='service_name')
+
+    def test_slots(self):
+        p = Parameters(params=dict(ttl=1))
+        assert type(p).__dictoffset__ == 0
+        with pytest.raises(AttributeError):
+            p.unknown = True
+
+
+class Difference(object):
+    computed = 0
+    last_want = None
+
+    def __init__(self, want, have=None):
+        self.want = want
+        self.have = have
+        Difference.computed += 1
+        Difference.last_want = want
+
+    def compare(self, param):
+        return getattr(self.have, param)
+
+
+class Manager(object):
+    changes = LazyChanges(Difference, Parameters, ['ttl'])
+
+    def __init__(self):
+        self.want = Parameters()
+        self.have = Parameters()
+        self.changes = Parameters()
+
+    def _update_changed_options(self):
+        type(self).changes.defer(self)
+
+
+class TestLazyChanges(unittest.TestCase):
+    def setUp(self):
+        Difference.computed = 0
+
+    def test_computed_once_on_read(self):
+        mm = Manager()
+        for ttl in (1, 2, 3):
+            mm.have = Parameters(params=dict(ttl=ttl))
+            mm._update_changed_options()
+        assert Difference.computed == 0
+
+        assert mm.changes.ttl == 3
+        assert mm.changes is mm.changes
+        assert Difference.computed == 1
+
+    def test_keeps_previous_changes(self):
+        mm = Manager()
+        mm.have = Parameters(params=dict(ttl=1))
+        mm._update_changed_options()
+        mm.have = Parameters()
+        mm._update_changed_options()
+
+        assert mm.changes.ttl == 1
+        assert Difference.computed == 2
+
+    def test_bounded(self):
+        mm = Manager()
+        for ttl in range(100):
+            mm.have = Parameters(params=dict(ttl=ttl))
+            mm._update_changed_options()
+
+        assert len(mm._pending_haves) == 2
+        assert mm.changes.ttl == 99
+
+    def test_newest_two_with_changes(self):
+        mm = Manager()
+        for params in (dict(ttl=1), dict(ttl=2), dict(), dict()):
+            mm.have = Parameters(params=params)
+            mm._update_changed_options()
+
+        # ttl=2 was dropped from the window, so the assigned changes remain
+        assert mm.changes.ttl is None
+
+        mm.have = Parameters(params=dict(ttl=3))
+        mm._update_changed_options()
+        mm.have = Parameters()
+        mm._update_changed_options()
+        assert mm.changes.ttl == 3
+
+    def test_reads_want_late(self):
+        mm = Manager()
+        mm.have = Parameters(params=dict(ttl=1))
+        mm._update_changed_options()
+        mm.want = Parameters(params=dict(ttl=7))
+
+        assert mm.changes.ttl == 1
+        assert Difference.last_want is mm.want
+
+    def test_assignment(self):
+        mm = Manager()
+        mm.have = Parameters(params=dict(ttl=1))
+        mm._update_changed_options()
+        mm.changes = Parameters(params=dict(ttl=5))
+
+        assert mm.changes.ttl == 5
+        assert Difference.computed == 0
+
+
+class TestConfigHash(unittest.TestCase):
+    def test_canonical(self):
+        a = dict(waf_service=dict(application=dict(port=80, enabled=True)), ips=['a', 'b'])
+        b = dict(ips=['a', 'b'], waf_service=dict(application=dict(enabled=True, port=80.0)))
+        assert config_hash(a) == config_hash(b)
+        assert config_hash(a) != config_hash(dict(a, ips=['b', 'a']))
+
+    def test_ignores_server_keys(self):
+        config = dict(gslb_service=dict(zone='example.com'))
+        have = dict(config, details=dict(CNAMEValue='x'), nameservers=['ns1'], update_comment='u')
+        assert config_hash(config) == config_hash(have)
+        assert config_hash(config) != config_hash(have, ignore=())
+
+
+class TestMergePatch(unittest.TestCase):
+    def test_delta(self):
+        have = dict(
+            waf_service=dict(policy=dict(encoding='utf-8', ips=['a']), application=dict(fqdn='a.com')),
+            details=dict(CNAMEValue='x'),
+            old=True,
+        )
+        want = dict(
+            waf_service=dict(policy=dict(encoding='utf-8', ips=['a', 'b']), application=dict(fqdn='a.com')),
+            new=1,
+        )
+
+        patch = merge_patch(have, want, keep=('details',))
+
+        assert patch == dict(waf_service=dict(policy=dict(ips=['a', 'b'])), new=1, old=None)
+
+    def test_unchanged(self):
+        config = dict(dns_service=dict(zone='example.com'))
+        assert merge_patch(config, dict(config)) == dict()
+
+
+class TestFrozen(unittest.TestCase):
+    def setUp(self):
+        self.value = dict(policy=dict(ips=['a'], campaigns=[dict(name='c')]), enabled=True)
+        self.frozen = freeze(self.value)
+
+    def test_reads_like_value(self):
+        assert self.frozen == self.value
+        assert json.dumps(self.frozen, sort_keys=True) == json.dumps(self.value, sort_keys=True)
+        assert config_hash(self.frozen) == config_hash(self.value)
+        assert freeze(self.frozen) is self.frozen
+
+    def test_read_only(self):
+        with pytest.raises(TypeError):
+            self.frozen['enabled'] = False
+        with pytest.raises(TypeError):
+            self.frozen['policy'].update(ips=[])
+        with pytest.raises(TypeError):
+            self.frozen['policy']['ips'].append('b')
+        with pytest.raises(TypeError):
+            self.frozen['policy']['campaigns'][0].pop('name')
+        assert self.frozen == self.value
+
+    def test_copy_on_write(self):
+        changed = self.frozen.copy()
+        changed['enabled'] = False
+        replaced = self.frozen.replace(enabled=False, extra=dict(a=1))
+
+        assert changed['policy'] is self.frozen['policy']
+        assert replaced['policy'] is self.frozen['policy']
+        assert replaced == dict(self.value, enabled=False, extra=dict(a=1))
+        assert self.frozen['enabled'] is True
+        assert copy.deepcopy(self.frozen) is self.frozen
+        assert type(copy.copy(self.frozen['policy']['ips'])) is list
+
+    def test_thaw(self):
+        value = thaw(self.frozen)
+        value['policy']['campaigns'][0]['name'] = 'd'
+
+        assert type(value['policy']['ips']) is list
+        assert self.frozen['policy']['campaigns'][0]['name'] == 'c'
+
+
+class TestBackoff(unittest.TestCase):
+    def test_intervals(self):
+        now = [100.0]
+
+        def clock():
+            return now[0]
+
+        delays = []
+        for delay in backoff(60, first=2, maximum=15, clock=clock):
+            delays.append(delay)
+            now[0] += delay
+
+        assert delays == [2, 4, 8, 15, 15, 15, 1]
+
+    def test_expired(self):
+        assert list(backoff(0)) == []
+
+
+class TestParallelMap(unittest.TestCase):
+    def test_keeps_order(self):
+        assert parallel_map(lambda x: x * 2, range(20), 4) == [x * 2 for x in range(20)]
+
+    def test_inline(self):
+        threads = parallel_map(lambda x: threading.current_thread(), [1], 4)
+        assert threads == [threading.current_thread()]
+        assert parallel_map(lambda x: x, [], 4) == []
+
+    def test_bounded(self):
+        lock = threading.Lock()
+        state = dict(running=0, peak=0)
+
+        def work(x):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            threading.Event().wait(0.01)
+            with lock:
+                state['running'] -= 1
+            return x
+
+        parallel_map(work, range(12), 3)
+        assert 1 < state['peak'] <= 3
+
+    def test_raises(self):
+        def work(x):
+            if x == 3:
+                raise ValueError('bad item')
+            return x
+
+        with pytest.raises(ValueError):
+            parallel_map(work, range(6), 2)
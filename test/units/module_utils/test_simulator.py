@@ -0,0 +1,651 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import io
+import os
+import pytest
+import shutil
+import sys
+import tempfile
+
+if sys.version_info < (2, 7):
+    pytestmark = pytest.mark.skip("F5 Ansible modules require Python >= 2.7")
+
+import unittest
+from unittest.mock import Mock
+from unittest.mock import patch
+
+from ansible.errors import AnsibleConnectionFailure
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.urls import open_url
+
+from test.simulator import CloudservicesSimulator
+from test.simulator import PASSWORD
+from test.simulator import USERNAME
+from test.units.modules.utils import set_module_args
+
+try:
+    from library.httpapi.f5 import HttpApi
+    from library.module_utils.cloudservices import CloudservicesApi
+    from library.module_utils.common import F5ModuleError
+    from library.module_utils.rest import RestConnection
+    from library.modules.f5_cs_eap_subscription_app import ArgumentSpec
+    from library.modules.f5_cs_eap_subscription_app import ModuleManager
+    from library.modules import f5_cs_catalog_items
+    from library.modules import f5_cs_organization
+    from library.modules import f5_cs_primary_dns
+    from library.modules import f5_cs_secondary_dns
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.httpapi.f5 import HttpApi
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import F5ModuleError
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.rest import RestConnection
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_subscription_app import ArgumentSpec
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_subscription_app import ModuleManager
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules import f5_cs_catalog_items
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules import f5_cs_organization
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules import f5_cs_primary_dns
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules import f5_cs_secondary_dns
+
+
+class FakeHttpapiConnection(object):
+    """The parts of the httpapi connection plugin that HttpApi relies on."""
+
+    def __init__(self, url):
+        self._url = url
+        self._auth = None
+
+    def _log_messages(self, message):
+        pass
+
+    def send(self, path, data, method='GET', headers=None):
+        headers = dict(headers or {})
+        if self._auth:
+            headers.update(self._auth)
+        response = open_url(self._url + path, data=data, headers=headers, method=method)
+        return response, io.BytesIO(response.read())
+
+
+class SimulatorTestCase(unittest.TestCase):
+    simulator_args = dict()
+
+    def setUp(self):
+        self.simulator = CloudservicesSimulator(**self.simulator_args).start()
+        self.connection = RestConnection(host=self.simulator.host, port=self.simulator.port, use_ssl=False,
+                                         username=USERNAME, password=PASSWORD)
+        self.client = CloudservicesApi(self.connection)
+
+    def tearDown(self):
+        self.simulator.stop()
+
+
+class TestSimulator(SimulatorTestCase):
+    def test_subscription_lifecycle(self):
+        user = self.client.get_current_user()
+        catalog = next(c for c in self.client.get_catalogs()['Catalogs'] if c['service_type'] == 'waf')
+        created = self.client.create_subscription(dict(
+            account_id=user['primary_account_id'],
+            catalog_id=catalog['catalog_id'],
+            service_instance_name='app.example.com',
+            service_type='waf',
+            configuration=dict(waf_service=dict(application=dict(fqdn='app.example.com'))),
+        ))
+        subscription_id = created['subscription_id']
+
+        assert created['status'] == 'DISABLED'
+        assert created['configuration']['details']['discovery']['ipGeolocations']
+
+        assert self.client.activate_subscription(subscription_id)['service_state'] == 'DEPLOYED'
+        listing = self.client.get_subscriptions_by_type('waf', user['primary_account_id'])
+        assert [x['subscription_id'] for x in listing['subscriptions']] == [subscription_id]
+
+        assert self.client.suspend_subscription(subscription_id)['status'] == 'DISABLED'
+        self.client.retire_subscription(dict(omit_config=True), subscription_id)
+        listing = self.client.get_subscriptions_by_type('waf', user['primary_account_id'])
+        assert listing['subscriptions'] == []
+
+        assert self.simulator.calls['login'] == 1
+        assert self.simulator.calls['get_subscriptions_by_type'] == 2
+        assert [x[1] for x in self.simulator.requests[:2]] == ['login', 'get_current_user']
+        assert all(x[2] < 400 for x in self.simulator.requests)
+
+    def test_unknown_subscription(self):
+        with pytest.raises(AnsibleConnectionFailure):
+            self.client.get_subscription_by_id('s-missing')
+
+    def test_unauthorized(self):
+        connection = RestConnection(host=self.simulator.host, port=self.simulator.port, use_ssl=False)
+        response = connection.get('/v1/svc-account/user')
+        assert response['code'] == 401
+
+    def test_injected_failure(self):
+        self.client.list_invites()
+        self.simulator.fail_next(code=503)
+        with pytest.raises(AnsibleConnectionFailure):
+            self.client.list_invites()
+        assert self.client.list_invites() is not None
+
+    def test_current_user_read_once(self):
+        assert self.client.get_current_user()['email'] == USERNAME
+        assert CloudservicesApi(self.connection).get_current_user()['email'] == USERNAME
+        assert self.simulator.calls['get_current_user'] == 1
+
+    def test_accounts_and_certificates(self):
+        user = self.client.get_current_user()
+        account = self.client.create_account(dict(name='second'))
+        memberships = self.client.get_memberships(user['id'])['memberships']
+        assert sorted(x['account_name'] for x in memberships) == ['firstaccount', 'second']
+
+        self.client.enable_catalog_item(dict(account_id=account['id'], catalog_id='c-aa9N0jgHI4'), account['id'])
+        assert [x['status'] for x in self.client.get_account(account['id'])['catalog_items']] == ['SUBSCRIBED']
+
+        certificate = self.client.post_certificate(dict(account_id=account['id'], certificate='...'))
+        assert [x['id'] for x in self.client.get_certificates(account['id'])['certificates']] == [certificate['id']]
+
+    def test_certificate_index(self):
+        account_id = self.client.get_current_user()['primary_account_id']
+        assert len(self.client.get_certificate_index(account_id)) == 0
+
+        certificate = self.client.post_certificate(dict(account_id=account_id, certificate='...', common_name='a.com'))
+        index = self.client.get_certificate_index(account_id)
+        assert index is self.client.get_certificate_index(account_id)
+        assert index.find(common_name='a.com', expiration_date='2030-01-01T00:00:00Z')['id'] == certificate['id']
+        assert self.simulator.calls['get_certificates'] == 2
+
+    def test_httpapi_send_request(self):
+        httpapi = HttpApi(FakeHttpapiConnection(self.simulator.url))
+        httpapi.login(USERNAME, PASSWORD)
+
+        response = httpapi.get('/v1/svc-account/user')
+        assert response['code'] == 200
+        assert response['contents']['email'] == USERNAME
+
+
+class TestSimulatorCatalogs(SimulatorTestCase):
+    def test_read_once_per_connection(self):
+        assert self.client.get_catalog_id('waf') == 'c-aa9N0jgHI4'
+        assert CloudservicesApi(self.connection).get_catalog_id('adns') == 'c-aaxBJkfg8u'
+        assert CloudservicesApi(self.connection).get_catalogs()['Catalogs']
+        assert self.simulator.calls['get_catalogs'] == 1
+
+        with pytest.raises(AnsibleConnectionFailure):
+            self.client.get_catalog_id('unknown')
+
+    def test_httpapi(self):
+        httpapi = HttpApi(FakeHttpapiConnection(self.simulator.url))
+        httpapi.login(USERNAME, PASSWORD)
+        client = CloudservicesApi(httpapi)
+
+        assert client.get_catalog_id('gslb') == 'c-aaQnOrPjGu'
+        assert CloudservicesApi(httpapi).get_catalog_id('dns') == 'c-aau0eSVXtL'
+        assert self.simulator.calls['get_catalogs'] == 1
+
+    def test_disk_cache(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'catalogs.json')
+
+        for x in range(2):
+            connection = RestConnection(host=self.simulator.host, port=self.simulator.port, use_ssl=False,
+                                        username=USERNAME, password=PASSWORD, catalog_cache_path=path)
+            assert CloudservicesApi(connection).get_catalog_id('waf') == 'c-aa9N0jgHI4'
+        assert self.simulator.calls['get_catalogs'] == 1
+
+
+class TestSimulatorMergePatch(SimulatorTestCase):
+    def update(self, subscription, **policy):
+        payload = dict(
+            account_id=subscription['account_id'],
+            catalog_id=subscription['catalog_id'],
+            service_instance_name=subscription['service_instance_name'],
+            service_type='waf',
+            configuration=dict(
+                waf_service=dict(subscription['configuration']['waf_service'], policy=policy),
+                update_comment='update',
+            ),
+        )
+        return self.client.update_subscription(payload, subscription['subscription_id'], current=subscription)
+
+    def test_patch(self):
+        subscription = self.simulator.seed_subscriptions(1)[0]
+        self.client.get_current_user()
+
+        updated = self.update(subscription, encoding='utf-8', ips=['10.0.0.1'])
+
+        assert updated['configuration']['waf_service']['policy']['ips'] == ['10.0.0.1']
+        assert updated['configuration']['details']['CNAMEValue']
+        assert self.simulator.calls['patch_subscription'] == 1
+        assert self.simulator.calls['update_subscription'] == 0
+        assert self.client.merge_patch is True
+        assert 0 < self.client.payload_bytes['sent'] < self.client.payload_bytes['full']
+
+    def test_put_fallback(self):
+        self.simulator.state.merge_patch = False
+        subscription = self.simulator.seed_subscriptions(1)[0]
+        self.client.get_current_user()
+
+        self.update(subscription, encoding='utf-8')
+        updated = self.update(subscription, encoding='utf-16')
+
+        assert updated['configuration']['waf_service']['policy'] == dict(encoding='utf-16')
+        assert self.simulator.calls['patch_subscription'] == 1
+        assert self.simulator.calls['update_subscription'] == 2
+        assert self.client.merge_patch is False
+        assert self.client.payload_bytes['sent'] == self.client.payload_bytes['full']
+
+
+class TestSimulatorPaging(SimulatorTestCase):
+    simulator_args = dict(page_size=10, deploy_delay=60)
+
+    def test_paging(self):
+        self.simulator.seed_subscriptions(25)
+        account_id = self.client.get_current_user()['primary_account_id']
+
+        subscriptions = list(self.client.iter_subscriptions_by_type('waf', account_id))
+        assert len(subscriptions) == 25
+        assert self.simulator.calls['get_subscriptions_by_type'] == 3
+
+    def test_deploy_delay(self):
+        subscription_id = self.simulator.seed_subscriptions(1, status='DISABLED')[0]['subscription_id']
+
+        state = self.client.activate_subscription(subscription_id)
+        assert (state['status'], state['service_state']) == ('ACTIVE', 'DEPLOYING')
+
+        self.simulator.state.clock = Mock(return_value=self.simulator.state.transitions[subscription_id][1])
+        state = self.client.get_subscription_status(subscription_id)
+        assert state['service_state'] == 'DEPLOYED'
+
+
+class TestSimulatorModule(SimulatorTestCase):
+    def test_create_subscription_app(self):
+        set_module_args(dict(
+            service_instance_name='fqdn.demo.com',
+            wait_status_change=True,
+        ))
+        spec = ArgumentSpec()
+        module = AnsibleModule(argument_spec=spec.argument_spec, supports_check_mode=spec.supports_check_mode)
+
+        results = ModuleManager(module=module, client=self.client).exec_module()
+
+        assert results['changed'] is True
+        subscription = self.simulator.state.subscriptions[results['subscription_id']]
+        assert subscription['status'] == 'ACTIVE'
+        assert subscription['configuration']['waf_service']['application']['waf_regions']['aws']['us-east-1']
+
+
+class TestSimulatorAutoDiscovery(SimulatorTestCase):
+    simulator_args = dict(discovery_delay=60)
+
+    def run_module(self, **kwargs):
+        set_module_args(dict(discovery_timeout=0, **kwargs))
+        spec = ArgumentSpec()
+        module = AnsibleModule(argument_spec=spec.argument_spec, supports_check_mode=spec.supports_check_mode)
+        module.warn = Mock()
+        return ModuleManager(module=module, client=self.client).exec_module()
+
+    def complete_discovery(self):
+        self.simulator.state.clock = Mock(return_value=max(self.simulator.state.discoveries.values()))
+
+    def test_pending_then_resume(self):
+        results = self.run_module(service_instance_name='fqdn.demo.com')
+
+        assert results['changed'] is True
+        assert results['discovery_pending'] is True
+        assert results['retry_after'] == 15
+        subscription = self.simulator.state.subscriptions[results['subscription_id']]
+        assert subscription['status'] == 'DISABLED'
+        assert 'waf_regions' not in subscription['configuration']['waf_service']['application']
+
+        self.complete_discovery()
+        results = self.run_module(service_instance_name='fqdn.demo.com')
+
+        assert results['changed'] is True
+        assert results['discovery_pending'] is False
+        assert results['discovery']['ipGeolocations']
+        assert subscription['status'] == 'ACTIVE'
+        assert subscription['configuration']['waf_service']['application']['waf_regions']['aws']['us-east-1']
+
+        results = self.run_module(service_instance_name='fqdn.demo.com')
+        assert results['changed'] is False
+        assert 'discovery_pending' not in results
+
+    def test_fqdns(self):
+        fqdns = ['app{0}.demo.com'.format(x) for x in range(5)]
+
+        results = self.run_module(fqdns=fqdns, workers=3)
+
+        assert results['changed'] is True
+        assert results['discovery_pending'] is True
+        assert [x['fqdn'] for x in results['apps']] == fqdns
+        assert all(x['discovery_pending'] for x in results['apps'])
+        assert self.simulator.calls['create_subscription'] == 5
+        assert self.simulator.calls['get_subscription_by_id'] == 5
+
+        self.complete_discovery()
+        results = self.run_module(fqdns=fqdns + fqdns[:1], workers=3)
+
+        assert results['changed'] is True
+        assert results['discovery_pending'] is False
+        assert len(results['apps']) == 5
+        assert not any(x['discovery_pending'] for x in results['apps'])
+        assert self.simulator.calls['create_subscription'] == 5
+        assert all(x['status'] == 'ACTIVE' for x in self.simulator.state.subscriptions.values())
+
+        results = self.run_module(fqdns=fqdns)
+        assert results['changed'] is False
+        assert all('waf_regions' in x['configuration']['waf_service']['application'] for x in results['apps'])
+
+
+class TestSimulatorApps(SimulatorTestCase):
+    def run_module(self, **kwargs):
+        set_module_args(kwargs)
+        spec = ArgumentSpec()
+        module = AnsibleModule(argument_spec=spec.argument_spec, supports_check_mode=spec.supports_check_mode)
+        return ModuleManager(module=module, client=self.client).exec_module()
+
+    def test_apps(self):
+        first, second = self.simulator.seed_subscriptions(2)
+        policy = dict(encoding='utf-8', compliance_enforcement=dict(data_guard=dict(enabled=True)))
+        apps = [
+            dict(service_instance_name='new{0}.demo.com'.format(x), configuration=dict(
+                waf_service=dict(application=dict(fqdn='new{0}.demo.com'.format(x)), policy=policy),
+            ))
+            for x in range(4)
+        ]
+        apps.append(dict(service_instance_name=first['service_instance_name'], configuration=dict(
+            waf_service=dict(policy=dict(encoding='utf-16')),
+        )))
+        apps.append(dict(service_instance_name=second['service_instance_name'], state='absent'))
+
+        results = self.run_module(apps=apps, patch=True, workers=4)
+
+        assert results['changed'] is True
+        assert [x['service_instance_name'] for x in results['apps']] == [x['service_instance_name'] for x in apps]
+        assert [x['changed'] for x in results['apps']] == [True] * 6
+        assert self.simulator.calls['get_current_user'] == 1
+        assert self.simulator.calls['get_subscriptions_by_type'] == 1
+        assert self.simulator.calls['create_subscription'] == 4
+        assert self.simulator.calls['activate_subscription'] == 4
+        assert first['configuration']['waf_service']['policy'] == dict(encoding='utf-16')
+        assert second['status'] == 'RETIRED'
+
+        results = self.run_module(apps=apps, patch=True, workers=4)
+
+        assert results['changed'] is False
+        assert self.simulator.calls['create_subscription'] == 4
+
+    def test_failed_app(self):
+        first, second = self.simulator.seed_subscriptions(2)
+        self.client.retire_subscription = Mock(side_effect=AnsibleConnectionFailure('retire failed'))
+
+        results = self.run_module(state='absent', apps=[
+            dict(service_instance_name=first['service_instance_name']),
+            dict(service_instance_name=second['service_instance_name'], state='suspended'),
+        ])
+
+        assert results['failed'] is True
+        assert results['msg'] == '1 of 2 applications failed: {0}'.format(first['service_instance_name'])
+        assert results['apps'][0]['msg'] == 'retire failed'
+        assert results['apps'][1]['changed'] is True
+        assert second['status'] == 'DISABLED'
+
+    def test_app_warnings_and_account(self):
+        first, second, third = self.simulator.seed_subscriptions(3)
+        second['service_instance_name'] = first['service_instance_name']
+        account_id = self.client.get_current_user()['primary_account_id']
+        self.client.suspend_subscription = Mock(wraps=self.client.suspend_subscription)
+
+        set_module_args(dict(account_id=account_id, state='suspended', workers=2, apps=[
+            dict(service_instance_name=first['service_instance_name']),
+            dict(service_instance_name=third['service_instance_name']),
+            dict(service_instance_name=first['service_instance_name'], state='fetch'),
+        ]))
+        spec = ArgumentSpec()
+        module = AnsibleModule(argument_spec=spec.argument_spec, supports_check_mode=spec.supports_check_mode)
+        module.warn = Mock()
+        results = ModuleManager(module=module, client=self.client).exec_module()
+
+        assert [x['changed'] for x in results['apps']] == [True, True, False]
+        assert module.warn.call_count == 2
+        assert all(second['subscription_id'] in x[0][0] for x in module.warn.call_args_list)
+        assert self.client.account_id is None
+        assert all(x[1]['account_id'] == account_id for x in self.client.suspend_subscription.call_args_list)
+
+
+class TestSimulatorPrimaryDnsZones(SimulatorTestCase):
+    simulator_args = dict(deploy_delay=60)
+
+    def run_module(self, **kwargs):
+        set_module_args(kwargs)
+        spec = f5_cs_primary_dns.ArgumentSpec()
+        module = AnsibleModule(argument_spec=spec.argument_spec, supports_check_mode=spec.supports_check_mode)
+        return f5_cs_primary_dns.ModuleManager(module=module, client=self.client).exec_module()
+
+    def test_zones(self):
+        kept, unlisted = self.simulator.seed_subscriptions(2, service_type='dns')
+        zones = [dict(zone='zone{0}.example.com'.format(x)) for x in range(5)]
+        zones.append(dict(zone=kept['service_instance_name']))
+        state = self.simulator.state
+        clock = Mock(side_effect=lambda: max([0] + [x[1] for x in state.transitions.values()]))
+
+        with patch.object(f5_cs_primary_dns.time, 'sleep') as sleep:
+            sleep.side_effect = lambda delay: setattr(state, 'clock', clock)
+            results = self.run_module(zones=zones, retire_unlisted=True, workers=3)
+
+        assert results['changed'] is True
+        names = [x['service_instance_name'] for x in results['apps']]
+        assert names == [x['zone'] for x in zones] + [unlisted['service_instance_name']]
+        assert [x['changed'] for x in results['apps']] == [True] * 5 + [False, True]
+        assert results['apps'][-1]['state'] == 'absent'
+        assert unlisted['status'] == 'RETIRED'
+        assert all(x['service_state'] == 'DEPLOYED' for x in results['apps'][:5])
+        assert self.simulator.calls['get_current_user'] == 1
+        assert self.simulator.calls['get_subscriptions_by_type'] == 1
+        assert self.simulator.calls['activate_subscription'] == 5
+        assert self.simulator.calls['get_subscription_status'] == 10
+        assert sleep.call_count == 1
+
+    def test_failed_zone(self):
+        self.client.create_subscription = Mock(side_effect=AnsibleConnectionFailure('create failed'))
+
+        results = self.run_module(zones=[dict(zone='zone.example.com')])
+
+        assert results['failed'] is True
+        assert results['msg'] == '1 zones failed: zone.example.com'
+        assert results['apps'][0]['msg'] == 'create failed'
+        assert self.simulator.calls['activate_subscription'] == 0
+
+    def test_zones_validation(self):
+        self.simulator.seed_subscriptions(2, service_type='dns')
+
+        with pytest.raises(F5ModuleError, match='state present'):
+            self.run_module(state='absent', zones=[dict(zone='zone.example.com')])
+        with pytest.raises(F5ModuleError, match='at least one zone'):
+            self.run_module(zones=[], retire_unlisted=True)
+        with pytest.raises(F5ModuleError, match='at least one zone'):
+            self.run_module(zone='zone.example.com', retire_unlisted=True)
+        assert self.simulator.calls['retire_subscription'] == 0
+
+
+class TestSimulatorSecondaryDnsZones(SimulatorTestCase):
+    def run_module(self, **kwargs):
+        set_module_args(kwargs)
+        spec = f5_cs_secondary_dns.ArgumentSpec()
+        module = AnsibleModule(argument_spec=spec.argument_spec, supports_check_mode=spec.supports_check_mode)
+        return f5_cs_secondary_dns.ModuleManager(module=module, client=self.client).exec_module()
+
+    def test_zones(self):
+        kept, unlisted = self.simulator.seed_subscriptions(2, service_type='adns')
+        zones = [dict(zone='zone{0}.example.com'.format(x), master_servers=['192.0.2.1']) for x in range(3)]
+        zones.append(dict(zone=kept['service_instance_name'], master_servers=['192.0.2.2', '192.0.2.1']))
+
+        results = self.run_module(zones=zones, retire_unlisted=True, workers=3)
+
+        assert results['changed'] is True
+        assert results['summary'] == dict(created=3, updated=1, retired=1, unchanged=0, failed=0)
+        assert results['errors'] == dict()
+        assert kept['configuration']['adns_service']['master_servers'] == ['192.0.2.2', '192.0.2.1']
+        assert unlisted['status'] == 'RETIRED'
+        assert self.simulator.calls['get_catalogs'] == 1
+        assert self.simulator.calls['get_subscriptions_by_type'] == 1
+        assert self.simulator.calls['activate_subscription'] == 3
+        assert self.simulator.calls['get_subscription_status'] == 3
+
+        zones[-1]['master_servers'] = ['192.0.2.1', '192.0.2.2']
+        results = self.run_module(zones=zones, retire_unlisted=True)
+
+        assert results['changed'] is False
+        assert results['summary'] == dict(created=0, updated=0, retired=0, unchanged=4, failed=0)
+
+    def test_failed_zone(self):
+        create_subscription = self.client.create_subscription
+
+        def create(payload, **kwargs):
+            if payload['service_instance_name'] == 'bad.example.com':
+                raise AnsibleConnectionFailure('create failed')
+            return create_subscription(payload, **kwargs)
+
+        self.client.create_subscription = Mock(side_effect=create)
+        results = self.run_module(zones=[
+            dict(zone='bad.example.com', master_servers=['192.0.2.1']),
+            dict(zone='good.example.com', master_servers=['192.0.2.1']),
+        ])
+
+        assert results['failed'] is True
+        assert results['changed'] is True
+        assert results['summary'] == dict(created=1, updated=0, retired=0, unchanged=0, failed=1)
+        assert results['errors'] == {'bad.example.com': 'create failed'}
+
+    def test_zones_validation(self):
+        with pytest.raises(F5ModuleError, match='state present'):
+            self.run_module(state='fetch', zones=[dict(zone='zone.example.com', master_servers=['192.0.2.1'])])
+        with pytest.raises(F5ModuleError, match='at least one zone'):
+            self.run_module(zones=[], retire_unlisted=True)
+
+    def test_single_zone_update(self):
+        zone, = self.simulator.seed_subscriptions(1, service_type='adns')
+        zone['configuration'] = dict(adns_service=dict(zone=zone['service_instance_name'], master_servers=['192.0.2.1']))
+
+        results = self.run_module(service_instance_name=zone['service_instance_name'], master_servers=['192.0.2.2'])
+
+        assert results['changed'] is True
+        assert zone['configuration']['adns_service']['master_servers'] == ['192.0.2.2']
+
+        results = self.run_module(state='absent', service_instance_name=zone['service_instance_name'])
+
+        assert results['changed'] is True
+        assert zone['status'] == 'RETIRED'
+
+
+class TestSimulatorCatalogItems(SimulatorTestCase):
+    def run_module(self, **kwargs):
+        set_module_args(kwargs)
+        spec = f5_cs_catalog_items.ArgumentSpec()
+        module = AnsibleModule(argument_spec=spec.argument_spec, supports_check_mode=spec.supports_check_mode)
+        return f5_cs_catalog_items.ModuleManager(module=module, client=self.client).exec_module()
+
+    def test_services(self):
+        results = self.run_module(services=['eap', 'dns', 'dnslb', 'secondary_dns'], workers=4)
+
+        assert results['changed'] is True
+        assert len(results['enabled']) == 4
+        assert self.simulator.calls['get_account'] == 1
+        assert self.simulator.calls['enable_catalog_item'] == 4
+
+        results = self.run_module(services=['eap', 'dns', 'dnslb', 'beacon'], state='absent')
+
+        assert results['changed'] is True
+        assert sorted(results['disabled']) == ['c-aa9N0jgHI4', 'c-aaQnOrPjGu', 'c-aau0eSVXtL']
+        assert [x['service_type'] for x in results['catalog_items']] == ['adns']
+        assert self.simulator.calls['disable_catalog_item'] == 3
+
+    def test_child_accounts(self):
+        parent_id = self.client.get_current_user()['primary_account_id']
+        children = [
+            self.client.create_account(dict(name='child{0}'.format(x), parent_account_id=parent_id))['id']
+            for x in range(5)
+        ]
+        self.client.create_account(dict(name='other'))
+        self.client.enable_catalog_item(dict(account_id=children[0], catalog_id='c-aa9N0jgHI4'), children[0])
+        self.simulator.reset_calls()
+
+        results = self.run_module(parent_account_id=parent_id, services=['eap', 'dns'], workers=4)
+
+        assert results['changed'] is True
+        assert [x['account_id'] for x in results['accounts']] == children
+        assert results['accounts'][0]['enabled'] == ['c-aau0eSVXtL']
+        assert all(len(x['enabled']) == 2 for x in results['accounts'][1:])
+        assert self.simulator.calls['get_account'] == 0
+        assert self.simulator.calls['batch_get_accounts'] == 2
+        assert self.simulator.calls['enable_catalog_item'] == 9
+
+    def test_failed_account(self):
+        account_id = self.client.create_account(dict(name='child'))['id']
+
+        results = self.run_module(account_ids=[account_id, 'a-missing'], services=['eap'], state='present')
+
+        assert results['failed'] is True
+        assert results['msg'] == '1 of 2 accounts failed: a-missing'
+        assert results['accounts'][0]['enabled'] == ['c-aa9N0jgHI4']
+        assert results['accounts'][1]['failed'] is True
+        assert self.simulator.calls['batch_get_accounts'] == 1
+
+
+class TestSimulatorOrganizations(SimulatorTestCase):
+    def run_module(self, **kwargs):
+        set_module_args(kwargs)
+        spec = f5_cs_organization.ArgumentSpec()
+        module = AnsibleModule(argument_spec=spec.argument_spec, supports_check_mode=spec.supports_check_mode)
+        return f5_cs_organization.ModuleManager(module=module, client=self.client).exec_module()
+
+    def test_accounts(self):
+        parent_id = self.client.get_current_user()['primary_account_id']
+        for name in ('kept', 'changed', 'unlisted'):
+            self.client.create_account(dict(name=name, parent_account_id=parent_id, phone='1', address=dict()))
+        self.client.create_account(dict(name='other', parent_account_id='', phone='1', address=dict()))
+        self.simulator.reset_calls()
+
+        accounts = [dict(name=x) for x in ('kept', 'new1', 'new2')]
+        accounts.append(dict(name='changed', phone='2'))
+        results = self.run_module(accounts=accounts, parent_account_id=parent_id, phone='1', retire_unlisted=True,
+                                  workers=4)
+
+        assert results['changed'] is True
+        assert [(x['name'], x['state'], x['changed']) for x in results['accounts']] == [
+            ('kept', 'present', False), ('new1', 'present', True), ('new2', 'present', True),
+            ('changed', 'present', True), ('unlisted', 'absent', True),
+        ]
+        assert results['accounts'][1]['parent_account_id'] == parent_id
+        assert self.simulator.calls['get_current_user'] == 0
+        assert self.simulator.calls['get_memberships'] == 1
+        assert self.simulator.calls['batch_get_accounts'] == 1
+        assert self.simulator.calls['get_account'] == 0
+        assert self.simulator.calls['create_account'] == 2
+        assert self.simulator.calls['update_account'] == 1
+        assert self.simulator.calls['delete_account'] == 1
+
+        results = self.run_module(accounts=accounts, parent_account_id=parent_id, phone='1', retire_unlisted=True)
+
+        assert results['changed'] is False
+        assert len(results['accounts']) == 4
+
+    def test_failed_account(self):
+        create_account = self.client.create_account
+
+        def create(payload):
+            if payload['name'] == 'broken':
+                raise AnsibleConnectionFailure('invalid name')
+            return create_account(payload)
+
+        self.client.create_account = create
+        results = self.run_module(accounts=[dict(name='broken'), dict(name='fine')])
+
+        assert results['changed'] is True
+        assert results['failed'] is True
+        assert results['msg'] == '1 of 2 accounts failed: broken'
+        assert results['accounts'][1]['account_id']
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+import sys
+
+if sys.version_info < (2, 7):
+    pytestmark = pytest.mark.skip("F5 Ansible modules require Python >= 2.7")
+
+import unittest
+from unittest.mock import Mock
+
+try:
+    from library.module_utils.subscriptions import SubscriptionIndex
+    from library.module_utils.subscriptions import announce_warnings
+    from library.module_utils.subscriptions import get_field
+    from library.module_utils.subscriptions import project_fields
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import SubscriptionIndex
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import announce_warnings
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import get_field
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.subscriptions import project_fields
+
+
+def make_subscriptions(count):
+    return [
+        dict(subscription_id='s-{0}'.format(i), service_instance_name='app-{0}.demo.net'.format(i))
+        for i in range(0, count)
+    ]
+
+
+class TestSubscriptionIndex(unittest.TestCase):
+    def test_lookup_by_id_and_name(self):
+        index = SubscriptionIndex(make_subscriptions(100))
+
+        assert len(index) == 100
+        assert index.get_by_id('s-42')['service_instance_name'] == 'app-42.demo.net'
+        assert index.get_by_name('app-7.demo.net')['subscription_id'] == 's-7'
+        assert index.get_by_id('s-missing') is None
+        assert index.get_by_name('missing.demo.net') is None
+        assert index.warnings == []
+
+    def test_find_prefers_subscription_id(self):
+        index = SubscriptionIndex(make_subscriptions(10))
+
+        assert index.find(subscription_id='s-3', service_instance_name='app-5.demo.net')['subscription_id'] == 's-3'
+        assert index.find(service_instance_name='app-5.demo.net')['subscription_id'] == 's-5'
+        assert index.find(subscription_id='s-missing', service_instance_name='app-5.demo.net') is None
+        assert index.find() is None
+
+    def test_duplicate_names_warn(self):
+        subscriptions = make_subscriptions(3)
+        subscriptions.append(dict(subscription_id='s-dup', service_instance_name='app-1.demo.net'))
+        index = SubscriptionIndex(subscriptions)
+
+        subscription = index.get_by_name('app-1.demo.net')
+
+        assert subscription['subscription_id'] == 's-1'
+        assert len(index.warnings) == 1
+        assert 's-1' in index.warnings[0]
+        assert 's-dup' in index.warnings[0]
+
+    def test_duplicate_names_warn_only_when_used(self):
+        subscriptions = make_subscriptions(3)
+        subscriptions.append(dict(subscription_id='s-dup', service_instance_name='app-1.demo.net'))
+        index = SubscriptionIndex(subscriptions)
+
+        index.get_by_name('app-2.demo.net')
+        index.get_by_id('s-1')
+
+        assert index.warnings == []
+        assert index.duplicates == {'app-1.demo.net': ['s-1', 's-dup']}
+
+    def test_keeps_lookup_tables_only(self):
+        subscriptions = make_subscriptions(3)
+        subscriptions.append(dict(subscription_id='s-dup', service_instance_name='app-1.demo.net'))
+        subscriptions.append(dict(subscription_id='s-0', service_instance_name='app-0.demo.net'))
+        index = SubscriptionIndex(iter(subscriptions))
+
+        assert not hasattr(index, 'subscriptions')
+        assert [x['subscription_id'] for x in index] == ['s-0', 's-1', 's-2', 's-dup']
+        assert len(index) == 4
+
+    def test_announce_warnings_once(self):
+        subscriptions = make_subscriptions(3)
+        subscriptions.append(dict(subscription_id='s-dup', service_instance_name='app-1.demo.net'))
+        index = SubscriptionIndex(subscriptions)
+        module = Mock()
+
+        index.get_by_name('app-1.demo.net')
+        announce_warnings(module, index)
+        announce_warnings(module, index)
+
+        assert module.warn.call_count == 1
+        assert index.warnings == []
+
+
+class TestProjectFields(unittest.TestCase):
+    def setUp(self):
+        self.subscription = dict(
+            subscription_id='s-1',
+            service_instance_name='app.demo.net',
+            configuration=dict(
+                details=dict(CNAMEValue='waf-1.waf.prd.f5aas.com', discovery=dict(cloudProvider='aws')),
+                waf_service=dict(policy=dict(encoding='utf-8')),
+            ),
+        )
+
+    def test_get_field(self):
+        assert get_field(self.subscription, 'configuration.details.CNAMEValue') == 'waf-1.waf.prd.f5aas.com'
+        assert get_field(self.subscription, 'configuration.details.missing') is None
+        assert get_field(self.subscription, 'subscription_id.missing', '') == ''
+
+    def test_no_fields_returns_item(self):
+        assert project_fields(self.subscription, None) is self.subscription
+        assert project_fields(self.subscription, []) is self.subscription
+
+    def test_nested_paths(self):
+        result = project_fields(self.subscription, ['subscription_id', 'configuration.details.CNAMEValue'])
+
+        assert result == dict(
+            subscription_id='s-1',
+            configuration=dict(details=dict(CNAMEValue='waf-1.waf.prd.f5aas.com')),
+        )
+
+    def test_missing_paths_skipped(self):
+        result = project_fields(self.subscription, ['status', 'configuration.details.missing', 'subscription_id.x'])
+
+        assert result == dict()
+
+    def test_parent_kept_whole(self):
+        result = project_fields(self.subscription, ['configuration.details.CNAMEValue', 'configuration.details'])
+
+        assert result['configuration']['details'] == self.subscription['configuration']['details']
+        assert 'waf_service' not in result['configuration']
+
+    def test_source_not_modified(self):
+        project_fields(self.subscription, ['configuration.details', 'configuration.details.CNAMEValue'])
+
+        assert set(self.subscription['configuration']['details'].keys()) == set(['CNAMEValue', 'discovery'])
@@ -14,6 +14,7 @@ import sys
 if sys.version_info < (2, 7):
     pytestmark = pytest.mark.skip("F5 Ansible modules require Python >= 2.7")
 
+from ansible.errors import AnsibleConnectionFailure
 from ansible.module_utils.basic import AnsibleModule
 
 import unittest
@@ -55,6 +56,15 @@ def load_fixture(name):
     return data
 
 
+CATALOGS = dict(Catalogs=[
+    dict(catalog_id='c-aa9N0jgHI4', service_type='waf'),
+    dict(catalog_id='c-aau0eSVXtL', service_type='dns'),
+    dict(catalog_id='c-aaxBJkfg8u', service_type='adns'),
+    dict(catalog_id='c-aaQnOrPjGu', service_type='gslb'),
+    dict(catalog_id='c-aacHacMCM8', service_type='beacon'),
+])
+
+
 class TestParameters(unittest.TestCase):
     def test_module_parameters(self):
         args = dict(
@@ -86,6 +96,7 @@ class TestOrganizationOperate(unittest.TestCase):
         self.api_client.get_current_user = Mock(return_value=get_user_fake)
         self.api_client.disable_catalog_item = Mock(return_value=dict())
         self.api_client.get_account = Mock(return_value=get_account_fake)
+        self.api_client.get_catalogs = Mock(return_value=CATALOGS)
 
     def test_subscribe(self, *args):
         set_module_args(dict(
@@ -162,3 +173,87 @@ class TestOrganizationOperate(unittest.TestCase):
         assert results['catalog_id'] == 'c-aaxBJkfg8u'
         assert results['status'] == 'SUBSCRIBED'
         assert results['service'] == 'secondary_dns'
+        assert self.api_client.get_catalogs.call_count == 0
+
+    def test_services_from_catalogs(self, *args):
+        self.api_client.get_catalogs = Mock(return_value=dict(Catalogs=[dict(catalog_id='c-other', service_type='adns')]))
+        set_module_args(dict(
+            state='fetch',
+            account_id='a-xxxxxxxxxx',
+            service='secondary_dns',
+            catalog_ids=['c-other'],
+            services=['secondary_dns'],
+        ))
+
+        module = AnsibleModule(
+            argument_spec=self.spec.argument_spec,
+            supports_check_mode=self.spec.supports_check_mode
+        )
+
+        mm = ModuleManager(module=module, client=self.api_client)
+        mm.resolve_catalogs()
+
+        assert mm.want.catalog_id == 'c-other'
+        assert mm.want.catalog_ids == ['c-other']
+        assert self.api_client.get_catalogs.call_count == 1
+
+
+class TestCatalogItemsList(unittest.TestCase):
+    def setUp(self):
+        self.spec = ArgumentSpec()
+        self.api_client = CloudservicesApi(Mock())
+        self.api_client.login = Mock()
+        self.api_client.get_current_user = Mock(return_value=load_fixture('f5_cs_subscription_app_get_user.json'))
+        self.api_client.get_account = Mock(return_value=load_fixture('f5_cs_organization_get_account.json'))
+        self.api_client.enable_catalog_item = Mock(side_effect=self.enable_catalog_item)
+        self.api_client.disable_catalog_item = Mock(return_value=dict())
+        self.api_client.get_catalogs = Mock(return_value=CATALOGS)
+
+    def enable_catalog_item(self, payload, account_id):
+        assert account_id == 'a-xxxxxxxxxx'
+        if payload['catalog_id'] == 'c-broken':
+            raise AnsibleConnectionFailure('catalog c-broken not found')
+        return dict(payload, status='SUBSCRIBED')
+
+    def run_module(self, **kwargs):
+        set_module_args(dict(account_id='a-xxxxxxxxxx', **kwargs))
+        module = AnsibleModule(
+            argument_spec=self.spec.argument_spec,
+            supports_check_mode=self.spec.supports_check_mode
+        )
+        mm = ModuleManager(module=module, client=self.api_client)
+        return mm.exec_module()
+
+    def test_subscribe(self, *args):
+        results = self.run_module(services=['secondary_dns', 'eap', 'dns'], catalog_ids=['c-aa9N0jgHI4'])
+
+        assert results['changed'] is True
+        assert sorted(results['enabled']) == ['c-aa9N0jgHI4', 'c-aau0eSVXtL']
+        assert results['disabled'] == []
+        assert len(results['catalog_items']) == 3
+        assert self.api_client.get_account.call_count == 1
+        assert self.api_client.enable_catalog_item.call_count == 2
+
+    def test_unsubscribe(self, *args):
+        results = self.run_module(services=['secondary_dns', 'eap'], state='absent')
+
+        assert results['changed'] is True
+        assert results['disabled'] == ['c-aaxBJkfg8u']
+        assert results['catalog_items'] == []
+        self.api_client.disable_catalog_item.assert_called_once_with('a-xxxxxxxxxx', 'c-aaxBJkfg8u')
+
+    def test_unchanged(self, *args):
+        results = self.run_module(services=['secondary_dns'])
+
+        assert results['changed'] is False
+        assert results['enabled'] == []
+        assert self.api_client.enable_catalog_item.call_count == 0
+
+    def test_failed_item(self, *args):
+        results = self.run_module(catalog_ids=['c-broken', 'c-aa9N0jgHI4'])
+
+        assert results['changed'] is True
+        assert results['failed'] is True
+        assert results['enabled'] == ['c-aa9N0jgHI4']
+        assert results['errors'] == {'c-broken': 'catalog c-broken not found'}
+        assert results['msg'] == '1 of 2 catalog items failed: c-broken'
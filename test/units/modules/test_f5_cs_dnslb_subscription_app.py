@@ -91,7 +91,7 @@ class TestSubscriptionAppCreate(unittest.TestCase):
 
     def create_subscription(self, payload, *args, **kwargs):
         assert payload['account_id'] == 'a-xxxxxxxxxx'
-        assert payload['catalog_id'] == 'c-aaQnOrPjGu'
+        assert payload['catalog_id'] == 'c-xxxxxxxxxx'
         assert payload['service_instance_name'] == 'fqdn.demo.com'
         assert payload['configuration']['gslb_service']['zone'] == 'fqdn.demo.com'
         assert payload['configuration']['gslb_service']['virtual_servers']['ipEndpoint_1']['address'] == '12.34.56.78'
@@ -11,6 +11,8 @@ import json
 import pytest
 import sys
 
+import OpenSSL.crypto
+
 if sys.version_info < (2, 7):
     pytestmark = pytest.mark.skip("F5 Ansible modules require Python >= 2.7")
 
@@ -18,6 +20,7 @@ from ansible.module_utils.basic import AnsibleModule
 
 import unittest
 from unittest.mock import Mock
+from unittest.mock import patch
 
 from test.units.modules.utils import set_module_args
 
@@ -25,11 +28,13 @@ try:
     from library.modules.f5_cs_eap_certificate import ModuleParameters
     from library.modules.f5_cs_eap_certificate import ModuleManager
     from library.modules.f5_cs_eap_certificate import ArgumentSpec
+    from library.modules.f5_cs_eap_certificate import parse_certificate
     from library.module_utils.cloudservices import CloudservicesApi
 except ImportError:
     from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_certificate import ModuleParameters
     from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_certificate import ModuleManager
     from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_certificate import ArgumentSpec
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_certificate import parse_certificate
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
 
 
@@ -55,6 +60,20 @@ def load_fixture(name):
     return data
 
 
+def make_certificate(common_name, not_after):
+    key = OpenSSL.crypto.PKey()
+    key.generate_key(OpenSSL.crypto.TYPE_RSA, 2048)
+    cert = OpenSSL.crypto.X509()
+    cert.get_subject().CN = common_name
+    cert.get_issuer().CN = 'test-ca'
+    cert.set_serial_number(0x1234)
+    cert.set_notBefore(b'20200101000000Z')
+    cert.set_notAfter(not_after)
+    cert.set_pubkey(key)
+    cert.sign(key, 'sha256')
+    return cert, OpenSSL.crypto.dump_certificate(OpenSSL.crypto.FILETYPE_PEM, cert).decode('utf-8')
+
+
 class TestParameters(unittest.TestCase):
     def test_module_parameters(self):
         subscription = dict(
@@ -195,4 +214,57 @@ class TestManager(unittest.TestCase):
 
         assert results['changed'] is False
         certificate = results['certificates'][0]
-        assert certificate['id'] == 'cert-xxxxxxxxxx'
\ No newline at end of file
+        assert certificate['id'] == 'cert-xxxxxxxxxx'
+
+    def find_existing_certificate(self, pem):
+        set_module_args(dict(state='present', certificate=pem))
+
+        module = AnsibleModule(
+            argument_spec=self.spec.argument_spec,
+            supports_check_mode=self.spec.supports_check_mode
+        )
+
+        mm = ModuleManager(module=module, client=self.api_client)
+        return mm.find_existing_certificate()
+
+    def test_find_by_name_and_expiration(self, *args):
+        cert, pem = make_certificate('fqdn.test.com', b'20300214194640Z')
+
+        assert self.find_existing_certificate(pem) == 'cert-xxxxxxxxxx'
+        assert self.find_existing_certificate('cert') is None
+        _, other = make_certificate('fqdn.test.com', b'20300214194641Z')
+        assert self.find_existing_certificate(other) is None
+        self.api_client.get_certificates.assert_called_once()
+
+    def test_find_by_fingerprint(self, *args):
+        cert, pem = make_certificate('fqdn.test.com', b'20300214194640Z')
+        certificates = load_fixture('f5_cs_eap_certificate_get_certificates.json')['certificates']
+        self.api_client.get_certificates = Mock(return_value=dict(certificates=[
+            dict(certificates[0], sha256_fingerprint='00:11'),
+            dict(certificates[1], sha256_fingerprint=cert.digest('sha256').decode('utf-8')),
+        ]))
+
+        assert self.find_existing_certificate(pem) == 'cert-yyyyyyyyyyy'
+
+    def test_find_by_fingerprint_of_another_format(self, *args):
+        cert, pem = make_certificate('fqdn.test.com', b'20300214194640Z')
+        certificates = load_fixture('f5_cs_eap_certificate_get_certificates.json')['certificates']
+        self.api_client.get_certificates = Mock(return_value=dict(certificates=[
+            dict(x, fingerprint=cert.digest('sha1').decode('utf-8')) for x in certificates
+        ]))
+
+        assert self.find_existing_certificate(pem) == 'cert-xxxxxxxxxx'
+
+    def test_identical_pem_parsed_once(self, *args):
+        cert, pem = make_certificate('fqdn.test.com', b'20300214194640Z')
+        target = ModuleManager.__module__ + '.parse_certificate'
+
+        with patch(target, side_effect=parse_certificate) as parse:
+            for i in range(3):
+                assert self.find_existing_certificate(pem) == 'cert-xxxxxxxxxx'
+
+        assert parse.call_count == 1
+        parsed = parse_certificate(pem)
+        assert parsed['serial_number'] == '1234'
+        assert parsed['issuer'] == 'CN=test-ca'
+        assert parsed['expiration_date'] == '2030-02-14T19:46:40Z'
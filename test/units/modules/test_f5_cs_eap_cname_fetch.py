@@ -14,6 +14,7 @@ import sys
 if sys.version_info < (2, 7):
     pytestmark = pytest.mark.skip("F5 Ansible modules require Python >= 2.7")
 
+from ansible.errors import AnsibleConnectionFailure
 from ansible.module_utils.basic import AnsibleModule
 
 import unittest
@@ -26,11 +27,13 @@ try:
     from library.modules.f5_cs_eap_cname_fetch import ModuleManager
     from library.modules.f5_cs_eap_cname_fetch import ArgumentSpec
     from library.module_utils.cloudservices import CloudservicesApi
+    from library.module_utils.common import F5ModuleError
 except ImportError:
     from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_cname_fetch import ModuleParameters
     from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_cname_fetch import ModuleManager
     from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_cname_fetch import ArgumentSpec
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.common import F5ModuleError
 
 
 fixture_path = os.path.join(os.path.dirname(__file__), 'fixtures')
@@ -97,3 +100,92 @@ class TestManager(unittest.TestCase):
         assert results['CNAMEValue'] == 'waf-xxxxxxxxxx.waf.prd.f5aas.com'
         assert results['subscription_id'] == 's-xxxxxxxxxx'
 
+
+class TestBatchManager(unittest.TestCase):
+    def setUp(self):
+        self.spec = ArgumentSpec()
+        subscription = load_fixture('f5_cs_eap_cname_fetch_get_eap_subscription.json')
+        self.listing = dict(subscriptions=[subscription])
+        self.other = dict(subscription, subscription_id='s-yyyyyyyyyy', service_type='dns')
+        self.other['configuration'] = dict(details=dict(CNAMEValue='waf-yyyyyyyyyy.waf.prd.f5aas.com'))
+
+        self.connection = Mock()
+        self.api_client = CloudservicesApi(self.connection)
+        self.api_client.get_current_user = Mock(return_value=dict(primary_account_id='a-xxxxxxxxxx'))
+        self.api_client.get_subscriptions_by_type = Mock(return_value=self.listing)
+        self.api_client.get_subscription_by_id = Mock(return_value=self.other)
+
+    def get_module(self, args):
+        set_module_args(args)
+        return AnsibleModule(
+            argument_spec=self.spec.argument_spec,
+            supports_check_mode=self.spec.supports_check_mode,
+            mutually_exclusive=self.spec.mutually_exclusive,
+        )
+
+    def test_cname_fetch_batch(self, *args):
+        module = self.get_module(dict(
+            subscription_ids=['s-xxxxxxxxxx', 's-yyyyyyyyyy'],
+        ))
+
+        mm = ModuleManager(module=module, client=self.api_client)
+        results = mm.exec_module()
+
+        assert results['cnames'] == {
+            's-xxxxxxxxxx': 'waf-xxxxxxxxxx.waf.prd.f5aas.com',
+            's-yyyyyyyyyy': 'waf-yyyyyyyyyy.waf.prd.f5aas.com',
+        }
+        assert self.api_client.get_subscriptions_by_type.call_count == 1
+        self.api_client.get_subscription_by_id.assert_called_once_with('s-yyyyyyyyyy', account_id='a-xxxxxxxxxx')
+
+    def test_cname_fetch_batch_other_account(self, *args):
+        module = self.get_module(dict(
+            subscription_ids=['s-yyyyyyyyyy'],
+            account_id='a-yyyyyyyyyy',
+        ))
+
+        mm = ModuleManager(module=module, client=self.api_client)
+        results = mm.exec_module()
+
+        assert results['cnames'] == {'s-yyyyyyyyyy': 'waf-yyyyyyyyyy.waf.prd.f5aas.com'}
+        self.api_client.get_subscriptions_by_type.assert_called_once_with('waf', 'a-yyyyyyyyyy')
+        self.api_client.get_subscription_by_id.assert_called_once_with('s-yyyyyyyyyy', account_id='a-yyyyyyyyyy')
+        assert self.api_client.get_current_user.call_count == 0
+
+    def test_cname_fetch_all(self, *args):
+        module = self.get_module(dict(
+            all_subscriptions=True,
+            account_id='a-xxxxxxxxxx',
+        ))
+
+        mm = ModuleManager(module=module, client=self.api_client)
+        results = mm.exec_module()
+
+        assert results['cnames'] == {'s-xxxxxxxxxx': 'waf-xxxxxxxxxx.waf.prd.f5aas.com'}
+        self.api_client.get_subscriptions_by_type.assert_called_once_with('waf', 'a-xxxxxxxxxx')
+        assert self.api_client.get_current_user.call_count == 0
+        assert self.api_client.get_subscription_by_id.call_count == 0
+
+    def test_cname_fetch_batch_empty(self, *args):
+        module = self.get_module(dict(
+            subscription_ids=[],
+        ))
+
+        mm = ModuleManager(module=module, client=self.api_client)
+        results = mm.exec_module()
+
+        assert results['cnames'] == {}
+        assert self.api_client.get_subscriptions_by_type.call_count == 0
+        assert self.api_client.get_subscription_by_id.call_count == 0
+
+    def test_cname_fetch_batch_missing(self, *args):
+        module = self.get_module(dict(
+            subscription_ids=['s-zzzzzzzzzz'],
+        ))
+        self.api_client.get_subscription_by_id = Mock(side_effect=AnsibleConnectionFailure('not found'))
+
+        mm = ModuleManager(module=module, client=self.api_client)
+        with pytest.raises(F5ModuleError) as ex:
+            mm.exec_module()
+
+        assert 's-zzzzzzzzzz (not found)' in str(ex.value)
@@ -25,12 +25,16 @@ try:
     from library.modules.f5_cs_eap_subscription_app import ModuleParameters
     from library.modules.f5_cs_eap_subscription_app import ModuleManager
     from library.modules.f5_cs_eap_subscription_app import ArgumentSpec
+    from library.modules.f5_cs_eap_subscription_app import ReportableChanges
     from library.module_utils.cloudservices import CloudservicesApi
+    from library.module_utils.cloudservices import f5_cs_eap_default_policy
 except ImportError:
     from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_subscription_app import ModuleParameters
     from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_subscription_app import ModuleManager
     from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_subscription_app import ArgumentSpec
+    from ansible_collections.f5devcentral.cloudservices.plugins.modules.f5_cs_eap_subscription_app import ReportableChanges
     from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import CloudservicesApi
+    from ansible_collections.f5devcentral.cloudservices.plugins.module_utils.cloudservices import f5_cs_eap_default_policy
 
 
 fixture_path = os.path.join(os.path.dirname(__file__), 'fixtures')
@@ -83,6 +87,30 @@ class TestParameters(unittest.TestCase):
         assert p.activate is True
         assert p.configuration['waf_service']['application']['description'] == 'test'
 
+    def test_default_policy_shared(self):
+        args = dict(
+            service_instance_name='new-fqdn.demo.com',
+            patch=False,
+            waf_regions=dict(aws=[dict(name='us-east-1', value=dict(endpoint=dict(ips=['192.168.1.1'])))]),
+        )
+
+        first = ModuleParameters(params=args).configuration
+        second = ModuleParameters(params=args).configuration
+
+        assert first['waf_service']['policy'] is f5_cs_eap_default_policy
+        assert second['waf_service']['policy'] is f5_cs_eap_default_policy
+        assert json.loads(json.dumps(first))['waf_service']['policy'] == f5_cs_eap_default_policy
+        with pytest.raises(TypeError):
+            first['waf_service']['policy']['threat_campaigns']['enabled'] = False
+
+    def test_reportable_configuration_is_mutable(self):
+        changes = ReportableChanges(params=dict(configuration=dict(waf_service=dict(policy=f5_cs_eap_default_policy))))
+        policy = changes.to_return()['configuration']['waf_service']['policy']
+
+        assert type(policy) is dict
+        assert type(policy['threat_campaigns']['campaigns']) is list
+        assert policy == f5_cs_eap_default_policy
+
 
 class TestSubscriptionAppCreate(unittest.TestCase):
     def setUp(self):
@@ -194,6 +222,27 @@ class TestSubscriptionAppCreate(unittest.TestCase):
         assert results['configuration']['waf_service']['application']['description'] == ''
         assert results['configuration']['waf_service']['application']['waf_regions']['aws']['eu-west-2']['endpoint']['ips'] == ['192.168.1.1']
 
+    def test_subscription_fetch_all_fields(self, *args):
+        set_module_args(dict(
+            state='fetch',
+            fields=['subscription_id', 'configuration.details.CNAMEValue'],
+        ))
+
+        module = AnsibleModule(
+            argument_spec=self.spec.argument_spec,
+            supports_check_mode=self.spec.supports_check_mode
+        )
+
+        mm = ModuleManager(module=module, client=self.api_client)
+        results = mm.exec_module()
+
+        assert results['changed'] is False
+        assert len(results['apps']) > 0
+        for app in results['apps']:
+            assert set(app.keys()) == set(['subscription_id', 'configuration'])
+            assert set(app['configuration'].keys()) == set(['details'])
+            assert list(app['configuration']['details'].keys()) == ['CNAMEValue']
+
     def test_subscription_retire(self, *args):
         set_module_args(dict(
             state='absent',
@@ -309,6 +358,49 @@ class TestSubscriptionBatchUpdate(unittest.TestCase):
         assert results['subscription_id'] == 's-xxxxxxxxxx'
 
 
+class TestSubscriptionConfigurationHash(unittest.TestCase):
+    def setUp(self):
+        self.spec = ArgumentSpec()
+        self.api_client = CloudservicesApi(Mock())
+        self.api_client.login = Mock()
+        self.api_client.get_subscriptions_by_type = Mock(
+            return_value=load_fixture('f5_cs_eap_certificate_get_subscriptions.json'))
+        self.api_client.update_subscription = Mock(
+            return_value=load_fixture('f5_cs_eap_subscription_app_update_batch.json'))
+
+    def run_module(self, **kwargs):
+        set_module_args(dict(
+            subscription_id='s-xxxxxxxxxx',
+            service_instance_name='fqdn.demo.com',
+            configuration=dict(waf_service=dict(custom_parameter=True)),
+            **kwargs
+        ))
+        module = AnsibleModule(
+            argument_spec=self.spec.argument_spec,
+            supports_check_mode=self.spec.supports_check_mode
+        )
+        mm = ModuleManager(module=module, client=self.api_client)
+        return mm.exec_module()
+
+    def test_stored_hash_skips_read(self, *args):
+        results = self.run_module(account_id='a-xxxxxxxxxx')
+        assert results['changed'] is True
+        assert self.api_client.get_subscriptions_by_type.call_count == 1
+
+        results = self.run_module(account_id='a-xxxxxxxxxx', configuration_hash=results['configuration_hash'])
+
+        assert results['changed'] is False
+        assert results['subscription_id'] == 's-xxxxxxxxxx'
+        assert self.api_client.get_subscriptions_by_type.call_count == 1
+        assert self.api_client.update_subscription.call_count == 1
+
+    def test_stale_hash(self, *args):
+        results = self.run_module(account_id='a-xxxxxxxxxx', configuration_hash='0' * 64)
+
+        assert results['changed'] is True
+        assert self.api_client.update_subscription.call_count == 1
+
+
 class TestSubscriptionPatchUpdate(unittest.TestCase):
     def setUp(self):
         self.spec = ArgumentSpec()
@@ -358,3 +450,38 @@ class TestSubscriptionPatchUpdate(unittest.TestCase):
         assert results['subscription_id'] == 's-xxxxxxxxxx'
         assert results['configuration']['waf_service']['custom_parameter'] is True
         assert results['configuration']['waf_service']['application']['fqdn'] == 'fqdn.demo.com'
+
+
+class TestSubscriptionDuplicateNames(unittest.TestCase):
+    def setUp(self):
+        self.spec = ArgumentSpec()
+        get_subscriptions_fake = load_fixture('f5_cs_eap_certificate_get_subscriptions.json')
+        subscriptions = [dict(s) for s in get_subscriptions_fake['subscriptions']]
+        duplicate = dict(subscriptions[0])
+        duplicate['subscription_id'] = 's-duplicated'
+        subscriptions.append(duplicate)
+        connection = Mock()
+        self.api_client = CloudservicesApi(connection)
+        self.api_client.get_current_user = Mock(return_value=load_fixture('f5_cs_subscription_app_get_user.json'))
+        self.api_client.get_subscriptions_by_type = Mock(return_value=dict(subscriptions=subscriptions))
+        self.name = subscriptions[0]['service_instance_name']
+        self.subscription_id = subscriptions[0]['subscription_id']
+
+    def test_subscription_fetch_duplicate_name(self, *args):
+        set_module_args(dict(
+            state='fetch',
+            service_instance_name=self.name,
+        ))
+
+        module = AnsibleModule(
+            argument_spec=self.spec.argument_spec,
+            supports_check_mode=self.spec.supports_check_mode
+        )
+        module.warn = Mock()
+
+        mm = ModuleManager(module=module, client=self.api_client)
+        results = mm.exec_module()
+
+        assert results['subscription_id'] == self.subscription_id
+        assert module.warn.call_count == 1
+        assert 's-duplicated' in module.warn.call_args[0][0]
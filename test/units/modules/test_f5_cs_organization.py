@@ -101,6 +101,7 @@ class TestOrganizationOperate(unittest.TestCase):
         self.api_client.get_current_user = Mock(return_value=get_user_fake)
         self.api_client.get_memberships = Mock(return_value=get_memberships_fake)
         self.api_client.get_account = Mock(return_value=get_account_fake)
+        self.api_client.batch_get_accounts = Mock(return_value=dict(accounts=[get_account_fake]))
         self.api_client.create_account = Mock(side_effect=self.create_account)
         self.api_client.delete_account = Mock(return_value=dict())
 
@@ -170,6 +171,27 @@ class TestOrganizationOperate(unittest.TestCase):
         assert results['address']['street_1'] == ''
         assert results['address']['street_2'] == ''
         assert results['phone'] == ''
+        self.api_client.batch_get_accounts.assert_called_once_with(dict(account_ids=['a-xxxxxxxxxx']))
+        assert self.api_client.get_account.call_count == 0
+
+    def test_organization_lookups_share_index(self, *args):
+        set_module_args(dict(
+            state='fetch',
+            name='firstaccount',
+        ))
+
+        module = AnsibleModule(
+            argument_spec=self.spec.argument_spec,
+            supports_check_mode=self.spec.supports_check_mode
+        )
+
+        for x in range(3):
+            results = ModuleManager(module=module, client=self.api_client).exec_module()
+            assert results['account_id'] == 'a-xxxxxxxxxx'
+
+        assert self.api_client.get_current_user.call_count == 1
+        assert self.api_client.get_memberships.call_count == 1
+        assert self.api_client.batch_get_accounts.call_count == 1
 
     def test_subscription_fetch_all(self, *args):
         set_module_args(dict(
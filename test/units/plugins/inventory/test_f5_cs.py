@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import pytest
+import sys
+
+if sys.version_info < (2, 7):
+    pytestmark = pytest.mark.skip("F5 Ansible modules require Python >= 2.7")
+
+import unittest
+from unittest.mock import Mock
+
+from ansible.errors import AnsibleError
+from ansible.inventory.data import InventoryData
+
+try:
+    from library.plugins.inventory.f5_cs import InventoryModule
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.inventory.f5_cs import InventoryModule
+
+
+fixture_path = os.path.join(os.path.dirname(__file__), '..', '..', 'modules', 'fixtures')
+fixture_data = {}
+
+
+def load_fixture(name):
+    path = os.path.join(fixture_path, name)
+
+    if path in fixture_data:
+        return fixture_data[path]
+
+    with open(path) as f:
+        data = f.read()
+
+    try:
+        data = json.loads(data)
+    except Exception:
+        pass
+
+    fixture_data[path] = data
+    return data
+
+
+class FakeCache(dict):
+    pass
+
+
+class TestInventory(unittest.TestCase):
+    def setUp(self):
+        self.options = dict(
+            cache=False,
+            account_ids=None,
+            service_types=['waf', 'dns'],
+            statuses=None,
+            strict=False,
+            compose={},
+            groups={},
+            keyed_groups=[],
+            password='s3cret',
+        )
+        self.plugin = InventoryModule()
+        self.plugin.inventory = InventoryData()
+        self.plugin.get_option = lambda name: self.options[name]
+
+        waf = load_fixture('f5_cs_eap_subscription_app_fetch.json')
+        self.client = Mock()
+        self.client.get_current_user = Mock(return_value=dict(id='u-xxxxxxxxxx'))
+        self.client.get_memberships = Mock(return_value=dict(memberships=[
+            dict(account_id='a-xxxxxxxxxx', account_name='Demo'),
+        ]))
+        self.client.iter_subscriptions_by_type = Mock(side_effect=lambda service_type, account_id: iter(
+            [waf] if service_type == 'waf' else [dict(subscription_id='s-yyyyyyyyyy', service_type='dns', status='DISABLED')]
+        ))
+        self.plugin.get_client = Mock(return_value=self.client)
+
+    def test_populate(self, *args):
+        self.plugin.populate(self.plugin.read_from_cloud())
+        inventory = self.plugin.inventory
+
+        assert sorted(inventory.hosts.keys()) == ['s-xxxxxxxxxx', 's-yyyyyyyyyy']
+        host = inventory.get_host('s-xxxxxxxxxx')
+        assert host.vars['f5_cs_status'] == 'ACTIVE'
+        assert host.vars['f5_cs_cname'] == 'waf-xxxxxxxxxx.waf.prd.f5aas.com'
+        assert host.vars['f5_cs_account_name'] == 'Demo'
+        assert [h.name for h in inventory.groups['f5_cs_waf'].hosts] == ['s-xxxxxxxxxx']
+        assert [h.name for h in inventory.groups['f5_cs_account_a_xxxxxxxxxx'].hosts] == ['s-xxxxxxxxxx', 's-yyyyyyyyyy']
+        assert [h.name for h in inventory.groups['f5_cs_region_aws_us_east_1'].hosts] == ['s-xxxxxxxxxx']
+        self.client.connection.logout.assert_called_once()
+
+    def test_populate_statuses(self, *args):
+        self.options['statuses'] = ['ACTIVE']
+        self.plugin.populate(self.plugin.read_from_cloud())
+
+        assert list(self.plugin.inventory.hosts.keys()) == ['s-xxxxxxxxxx']
+
+    def test_account_ids(self, *args):
+        self.options['account_ids'] = ['a-zzzzzzzzzz']
+        results = self.plugin.read_from_cloud()
+
+        assert results['accounts'] == [dict(account_id='a-zzzzzzzzzz', account_name='')]
+        self.client.iter_subscriptions_by_type.assert_any_call('waf', 'a-zzzzzzzzzz')
+
+    def test_password_not_displayed(self, *args):
+        self.client.get_current_user = Mock(side_effect=Exception('login failed for password s3cret'))
+
+        with pytest.raises(AnsibleError) as ex:
+            self.plugin.read_from_cloud()
+
+        assert 's3cret' not in str(ex.value)
+        assert 'login failed for password ********' in str(ex.value)
+
+    def test_parse_uses_cache(self, *args):
+        self.options['cache'] = True
+        self.plugin._read_config_data = Mock()
+        self.plugin._cache = FakeCache()
+        self.plugin.get_cache_key = Mock(return_value='f5_cs_key')
+
+        self.plugin.parse(InventoryData(), None, 'f5_cs.yml', cache=False)
+        assert self.client.iter_subscriptions_by_type.call_count == 2
+        assert 'f5_cs_key' in self.plugin._cache
+
+        self.plugin.parse(InventoryData(), None, 'f5_cs.yml', cache=True)
+        assert self.client.iter_subscriptions_by_type.call_count == 2
+        assert sorted(self.plugin.inventory.hosts.keys()) == ['s-xxxxxxxxxx', 's-yyyyyyyyyy']
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2020, F5 Networks Inc.
+# GNU General Public License v3.0 (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+import sys
+
+if sys.version_info < (2, 7):
+    pytestmark = pytest.mark.skip("F5 Ansible modules require Python >= 2.7")
+
+import unittest
+from unittest.mock import Mock
+
+from ansible.errors import AnsibleConnectionFailure
+from ansible.errors import AnsibleError
+
+try:
+    from library.plugins.lookup import f5_cs_subscription
+    from library.plugins.lookup.f5_cs_subscription import LookupModule
+except ImportError:
+    from ansible_collections.f5devcentral.cloudservices.plugins.lookup import f5_cs_subscription
+    from ansible_collections.f5devcentral.cloudservices.plugins.lookup.f5_cs_subscription import LookupModule
+
+
+def make_subscription(subscription_id, service_type='waf'):
+    return dict(
+        subscription_id=subscription_id,
+        service_type=service_type,
+        service_state='DEPLOYED',
+        configuration=dict(details=dict(CNAMEValue='waf-{0}.waf.prd.f5aas.com'.format(subscription_id))),
+    )
+
+
+class TestLookup(unittest.TestCase):
+    def setUp(self):
+        f5_cs_subscription._resolvers.clear()
+        self.options = dict(
+            field='configuration.details.CNAMEValue',
+            account_id='a-xxxxxxxxxx',
+            service_type='waf',
+            api_host='api.cloudservices.f5.com',
+            api_port=None,
+            use_ssl=True,
+            validate_certs=True,
+            username='user@example.com',
+            password='password',
+        )
+        self.lookup = LookupModule()
+        self.lookup.set_options = Mock()
+        self.lookup.get_option = lambda name: self.options[name]
+
+        self.connection = Mock()
+        self.listing = [make_subscription('s-{0:010d}'.format(x)) for x in range(500)]
+        self.connection.get = Mock(side_effect=self.get)
+        self.patcher = unittest.mock.patch.object(f5_cs_subscription, 'RestConnection', return_value=self.connection)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        f5_cs_subscription._resolvers.clear()
+
+    def get(self, url, account_id=None):
+        if 'service_type=' in url:
+            return dict(code=200, contents=dict(subscriptions=self.listing))
+        subscription_id = url.rsplit('/', 1)[-1]
+        if subscription_id == 's-dnsxxxxxxx':
+            return dict(code=200, contents=make_subscription(subscription_id, 'dns'))
+        return dict(code=404, contents=dict(status=404, message='not found'))
+
+    def test_batch(self, *args):
+        terms = [x['subscription_id'] for x in self.listing]
+        results = self.lookup.run(terms)
+
+        assert len(results) == 500
+        assert results[0] == 'waf-s-0000000000.waf.prd.f5aas.com'
+        assert self.connection.get.call_count == 1
+
+        assert self.lookup.run(terms[:10]) == results[:10]
+        assert self.connection.get.call_count == 1
+
+    def test_fallback_by_id(self, *args):
+        results = self.lookup.run(['s-0000000001', 's-dnsxxxxxxx'])
+
+        assert results == ['waf-s-0000000001.waf.prd.f5aas.com', 'waf-s-dnsxxxxxxx.waf.prd.f5aas.com']
+        assert self.connection.get.call_count == 2
+
+    def test_dotted_field(self, *args):
+        self.options['field'] = 'service_state'
+        assert self.lookup.run(['s-0000000001']) == ['DEPLOYED']
+
+    def test_missing_subscription(self, *args):
+        with pytest.raises(AnsibleError) as ex:
+            self.lookup.run(['s-missingxxx'])
+        assert 's-missingxxx was not found' in str(ex.value)
+
+        assert self.lookup.run(['s-missingxxx'], default='') == ['']
+        assert self.connection.get.call_count == 2
+
+    def test_listing_failure(self, *args):
+        self.connection.get = Mock(side_effect=AnsibleConnectionFailure('timed out'))
+        with pytest.raises(AnsibleError) as ex:
+            self.lookup.run(['s-0000000001'])
+        assert 'timed out' in str(ex.value)